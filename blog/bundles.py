@@ -0,0 +1,413 @@
+# blog/bundles.py
+"""
+İmtahan bundle formatı (staging <-> production köçürmə üçün).
+
+Bundle = ZIP arxiv:
+  manifest.json      -> {"format": "emsarena.exam-bundle", "version": 1, ...}
+  records.msgpack    -> msgpack record axını: {"t": <tip>, "d": {<sahələr>}}
+  media/<fayl adı>   -> sual şəkli/videosu, paint və cavab faylları
+
+Record sırası sabitdir (FK-lar həmişə əvvəlki record-lara baxır):
+  exam -> block* -> question* -> option* [-> attempt* -> answer* -> answer_option* -> answer_file*]
+
+Export queryset-ləri iterator() ilə axıdır, import isə Unpacker ilə oxuyub
+tip-tip batch-lərlə bulk_create edir -> 10k+ sualda da yaddaş sabit qalır
+(yalnız köhnə id -> yeni id xəritələri saxlanılır).
+"""
+
+from __future__ import annotations
+
+import datetime
+import json
+import shutil
+import zipfile
+from collections import Counter
+
+import msgpack
+from django.contrib.auth import get_user_model
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import models, transaction
+from django.utils import timezone
+
+from .models import (
+    Exam, QuestionBlock, ExamQuestion, ExamQuestionOption,
+    ExamAttempt, ExamAnswer, ExamAnswerFile, question_fingerprint,
+)
+
+
+BUNDLE_FORMAT = "emsarena.exam-bundle"
+BUNDLE_VERSION = 1
+
+MANIFEST_NAME = "manifest.json"
+RECORDS_NAME = "records.msgpack"
+MEDIA_PREFIX = "media/"
+
+CHUNK_SIZE = 2000
+BATCH_SIZE = 1000
+
+
+class BundleError(ValueError):
+    """Bundle oxunmadı / format uyğun deyil."""
+
+
+# ------------------------
+# Helpers
+# ------------------------
+
+def _data_fields(model, *, skip=()):
+    """
+    Kopyalanan "adi" sahələr: pk, FK-lar və skip xaric.
+    (FK-lar export/import zamanı ayrıca remap olunur)
+    """
+    return [
+        f for f in model._meta.concrete_fields
+        if not f.primary_key and not f.is_relation and f.name not in skip
+    ]
+
+
+def _pack_value(v):
+    if isinstance(v, (datetime.datetime, datetime.date, datetime.time)):
+        return v.isoformat()
+    return v
+
+
+def _auto_date_fields(model):
+    return [
+        f for f in model._meta.concrete_fields
+        if isinstance(f, models.DateField) and (f.auto_now or f.auto_now_add)
+    ]
+
+
+def _kwargs_from_record(model, data: dict, fields) -> dict:
+    out = {}
+    for f in fields:
+        if f.attname in data:
+            out[f.attname] = f.to_python(data[f.attname])
+    return out
+
+
+# ------------------------
+# Export
+# ------------------------
+
+def export_exam_bundle(exam: Exam, fileobj, *, include_attempts: bool = False) -> dict:
+    """
+    Exam-i bundle kimi `fileobj`-a yazır (seekable olmalıdır, məs. TemporaryFile).
+    Manifest-i qaytarır.
+    """
+    counts = Counter()
+    media = set()
+
+    def rows(qs, fields, *extra):
+        names = [f.attname for f in fields]
+        return qs.order_by("id").values("id", *extra, *names).iterator(chunk_size=CHUNK_SIZE)
+
+    with zipfile.ZipFile(fileobj, "w", compression=zipfile.ZIP_DEFLATED, allowZip64=True) as zf:
+        with zf.open(RECORDS_NAME, "w", force_zip64=True) as out:
+            packer = msgpack.Packer()
+
+            def emit(kind, row):
+                out.write(packer.pack({"t": kind, "d": {k: _pack_value(v) for k, v in row.items()}}))
+                counts[kind] += 1
+
+            exam_fields = _data_fields(Exam, skip=("slug",))
+            for row in rows(Exam.objects.filter(pk=exam.pk), exam_fields):
+                emit("exam", row)
+
+            block_fields = _data_fields(QuestionBlock)
+            for row in rows(QuestionBlock.objects.filter(exam=exam), block_fields):
+                emit("block", row)
+
+            q_fields = _data_fields(ExamQuestion)
+            for row in rows(ExamQuestion.objects.filter(exam=exam), q_fields, "block_id"):
+                media.update(n for n in (row.get("image"), row.get("video")) if n)
+                emit("question", row)
+
+            opt_fields = _data_fields(ExamQuestionOption)
+            opt_qs = ExamQuestionOption.objects.filter(question__exam=exam)
+            for row in rows(opt_qs, opt_fields, "question_id"):
+                emit("option", row)
+
+            if include_attempts:
+                att_fields = _data_fields(ExamAttempt)
+                att_qs = ExamAttempt.objects.filter(exam=exam)
+                for row in rows(att_qs, att_fields, "user__username"):
+                    emit("attempt", row)
+
+                ans_fields = _data_fields(ExamAnswer)
+                ans_qs = ExamAnswer.objects.filter(attempt__exam=exam)
+                for row in rows(ans_qs, ans_fields, "attempt_id", "question_id"):
+                    if row.get("paint_image"):
+                        media.add(row["paint_image"])
+                    emit("answer", row)
+
+                through = ExamAnswer.selected_options.through
+                sel_qs = (
+                    through.objects
+                    .filter(examanswer__attempt__exam=exam)
+                    .order_by("id")
+                    .values_list("examanswer_id", "examquestionoption_id")
+                    .iterator(chunk_size=CHUNK_SIZE)
+                )
+                for answer_id, option_id in sel_qs:
+                    emit("answer_option", {"answer_id": answer_id, "option_id": option_id})
+
+                file_fields = _data_fields(ExamAnswerFile)
+                file_qs = ExamAnswerFile.objects.filter(answer__attempt__exam=exam)
+                for row in rows(file_qs, file_fields, "answer_id"):
+                    media.add(row["file"])
+                    emit("answer_file", row)
+
+        # media faylları (storage-da olmayanlar keçilir)
+        for name in sorted(media):
+            if not default_storage.exists(name):
+                continue
+            with default_storage.open(name, "rb") as src, zf.open(MEDIA_PREFIX + name, "w", force_zip64=True) as dst:
+                shutil.copyfileobj(src, dst)
+            counts["media"] += 1
+
+        manifest = {
+            "format": BUNDLE_FORMAT,
+            "version": BUNDLE_VERSION,
+            "created_at": timezone.now().isoformat(),
+            "exam_title": exam.title,
+            "include_attempts": bool(include_attempts),
+            "counts": dict(counts),
+        }
+        zf.writestr(MANIFEST_NAME, json.dumps(manifest, ensure_ascii=False))
+
+    return manifest
+
+
+# ------------------------
+# Import
+# ------------------------
+
+class _BundleLoader:
+    """
+    Record-ları tip üzrə batch-ə yığır və FK-ları yeni id-lərə bağlayaraq yazır.
+    """
+
+    def __init__(self, zf: zipfile.ZipFile, author, title: str | None):
+        self.zf = zf
+        self.members = set(zf.namelist())
+        self.author = author
+        self.title = title
+
+        self.exam: Exam | None = None
+        self.block_map: dict[int, int] = {}
+        self.question_map: dict[int, int] = {}
+        self.option_map: dict[int, int] = {}
+        self.attempt_map: dict[int, int] = {}
+        self.answer_map: dict[int, int] = {}
+        self.media_map: dict[str, str] = {}
+        self.user_cache: dict[str, int | None] = {}
+
+        self._kind: str | None = None
+        self._buf: list[dict] = []
+
+    # ---- batching ----
+
+    def add(self, kind: str, data: dict) -> None:
+        if kind != self._kind or len(self._buf) >= BATCH_SIZE:
+            self.flush()
+            self._kind = kind
+        self._buf.append(data)
+
+    def flush(self) -> None:
+        if not self._buf:
+            return
+        handler = getattr(self, f"_load_{self._kind}", None)
+        if handler is None:
+            raise BundleError(f"Naməlum record tipi: {self._kind}")
+        if self._kind != "exam" and self.exam is None:
+            raise BundleError("Bundle-da exam record-u yoxdur.")
+        handler(self._buf)
+        self._buf = []
+
+    # ---- media ----
+
+    def _media(self, name: str | None) -> str:
+        if not name:
+            return ""
+        if name in self.media_map:
+            return self.media_map[name]
+        member = MEDIA_PREFIX + name
+        new_name = ""
+        if member in self.members:
+            with self.zf.open(member) as fh:
+                new_name = default_storage.save(name, File(fh, name=name))
+        self.media_map[name] = new_name
+        return new_name
+
+    def discard_media(self) -> None:
+        """Import alınmadısa: bu import-un storage-a yazdığı faylları silir."""
+        for new_name in self.media_map.values():
+            if new_name:
+                default_storage.delete(new_name)
+        self.media_map.clear()
+
+    # ---- bulk write ----
+
+    def _bulk_create(self, model, objs, rows, id_map=None):
+        created = model.objects.bulk_create(objs, batch_size=BATCH_SIZE)
+
+        # auto_now / auto_now_add bulk_create-də "indi" ilə əvəzlənir -> orijinalı bərpa et
+        auto_fields = [f for f in _auto_date_fields(model) if any(f.attname in r for r in rows)]
+        if auto_fields:
+            for obj, row in zip(created, rows):
+                for f in auto_fields:
+                    if row.get(f.attname):
+                        setattr(obj, f.attname, f.to_python(row[f.attname]))
+            model.objects.bulk_update(created, [f.attname for f in auto_fields], batch_size=BATCH_SIZE)
+
+        if id_map is not None:
+            for obj, row in zip(created, rows):
+                id_map[row["id"]] = obj.id
+        return created
+
+    # ---- record handlers ----
+
+    def _load_exam(self, rows):
+        if self.exam is not None or len(rows) != 1:
+            raise BundleError("Bundle-da yalnız bir exam olmalıdır.")
+        row = rows[0]
+        exam = Exam(**_kwargs_from_record(Exam, row, _data_fields(Exam, skip=("slug",))))
+        exam.author = self.author
+        if self.title:
+            exam.title = self.title
+        exam.is_active = False
+        exam.save()
+        self.exam = exam
+
+    def _load_block(self, rows):
+        fields = _data_fields(QuestionBlock)
+        objs = [QuestionBlock(exam=self.exam, **_kwargs_from_record(QuestionBlock, r, fields)) for r in rows]
+        self._bulk_create(QuestionBlock, objs, rows, self.block_map)
+
+    def _load_question(self, rows):
+        fields = _data_fields(ExamQuestion)
+        objs = []
+        for r in rows:
+            kw = _kwargs_from_record(ExamQuestion, r, fields)
+            kw["image"] = self._media(r.get("image")) or None
+            kw["video"] = self._media(r.get("video")) or None
+            kw["fingerprint"] = question_fingerprint(kw.get("text", ""))
+            objs.append(ExamQuestion(exam=self.exam, block_id=self.block_map.get(r.get("block_id")), **kw))
+        self._bulk_create(ExamQuestion, objs, rows, self.question_map)
+
+    def _load_option(self, rows):
+        fields = _data_fields(ExamQuestionOption)
+        rows = [r for r in rows if r.get("question_id") in self.question_map]
+        objs = [
+            ExamQuestionOption(question_id=self.question_map[r["question_id"]], **_kwargs_from_record(ExamQuestionOption, r, fields))
+            for r in rows
+        ]
+        self._bulk_create(ExamQuestionOption, objs, rows, self.option_map)
+
+    def _user_id(self, username: str | None) -> int | None:
+        if not username:
+            return None
+        if username not in self.user_cache:
+            User = get_user_model()
+            self.user_cache[username] = User.objects.filter(username=username).values_list("id", flat=True).first()
+        return self.user_cache[username]
+
+    def _load_attempt(self, rows):
+        # user-lər username ilə tapılır; bu instansiyada olmayanların cəhdləri keçilir
+        fields = _data_fields(ExamAttempt)
+        rows = [r for r in rows if self._user_id(r.get("user__username"))]
+        objs = [
+            ExamAttempt(exam=self.exam, user_id=self._user_id(r["user__username"]), **_kwargs_from_record(ExamAttempt, r, fields))
+            for r in rows
+        ]
+        self._bulk_create(ExamAttempt, objs, rows, self.attempt_map)
+
+    def _load_answer(self, rows):
+        fields = _data_fields(ExamAnswer)
+        rows = [r for r in rows if r.get("attempt_id") in self.attempt_map and r.get("question_id") in self.question_map]
+        objs = []
+        for r in rows:
+            kw = _kwargs_from_record(ExamAnswer, r, fields)
+            kw["paint_image"] = self._media(r.get("paint_image")) or None
+            objs.append(ExamAnswer(
+                attempt_id=self.attempt_map[r["attempt_id"]],
+                question_id=self.question_map[r["question_id"]],
+                **kw,
+            ))
+        self._bulk_create(ExamAnswer, objs, rows, self.answer_map)
+
+    def _load_answer_option(self, rows):
+        through = ExamAnswer.selected_options.through
+        through.objects.bulk_create(
+            [
+                through(examanswer_id=self.answer_map[r["answer_id"]], examquestionoption_id=self.option_map[r["option_id"]])
+                for r in rows
+                if r.get("answer_id") in self.answer_map and r.get("option_id") in self.option_map
+            ],
+            batch_size=BATCH_SIZE,
+        )
+
+    def _load_answer_file(self, rows):
+        fields = _data_fields(ExamAnswerFile)
+        rows = [r for r in rows if r.get("answer_id") in self.answer_map]
+        objs = []
+        for r in rows:
+            kw = _kwargs_from_record(ExamAnswerFile, r, fields)
+            kw["file"] = self._media(r.get("file"))
+            objs.append(ExamAnswerFile(answer_id=self.answer_map[r["answer_id"]], **kw))
+        self._bulk_create(ExamAnswerFile, objs, rows)
+
+
+def read_bundle_manifest(zf: zipfile.ZipFile) -> dict:
+    try:
+        manifest = json.loads(zf.read(MANIFEST_NAME))
+    except KeyError:
+        raise BundleError("manifest.json tapılmadı.")
+    except ValueError:
+        raise BundleError("manifest.json oxunmadı.")
+
+    if manifest.get("format") != BUNDLE_FORMAT:
+        raise BundleError("Bu fayl imtahan bundle-ı deyil.")
+    if int(manifest.get("version") or 0) > BUNDLE_VERSION:
+        raise BundleError(f"Bundle versiyası ({manifest.get('version')}) dəstəklənmir.")
+    return manifest
+
+
+def import_exam_bundle(fileobj, *, author, title: str | None = None) -> Exam:
+    """
+    Bundle-dan yeni Exam yaradır (deaktiv, yeni slug ilə) və onu qaytarır.
+    Hər şey bir transaction-dadır: xəta olsa heç nə yazılmır.
+    """
+    try:
+        zf = zipfile.ZipFile(fileobj)
+    except zipfile.BadZipFile:
+        raise BundleError("Bundle faylı zədəlidir və açıla bilmədi.")
+
+    with zf:
+        read_bundle_manifest(zf)
+        if RECORDS_NAME not in zf.namelist():
+            raise BundleError("records.msgpack tapılmadı.")
+
+        loader = _BundleLoader(zf, author, title)
+        try:
+            with transaction.atomic():
+                with zf.open(RECORDS_NAME) as fh:
+                    try:
+                        for rec in msgpack.Unpacker(fh, raw=False):
+                            loader.add(rec["t"], rec["d"])
+                    except (msgpack.UnpackException, ValueError, KeyError, TypeError) as e:
+                        if isinstance(e, BundleError):
+                            raise
+                        raise BundleError(f"Record oxunmadı: {e}")
+                loader.flush()
+        except Exception:
+            # DB rollback oldu, storage-a yazılmış media isə öz-özünə silinmir
+            loader.discard_media()
+            raise
+
+        if loader.exam is None:
+            raise BundleError("Bundle-da exam record-u yoxdur.")
+
+    return loader.exam
@@ -0,0 +1,98 @@
+# blog/cloning.py
+"""
+İmtahanın sürətli surətini çıxarmaq (semestrdən semestrə təkrar istifadə üçün).
+
+Exam -> QuestionBlock -> ExamQuestion -> ExamQuestionOption sətirləri
+`values()` ilə oxunur, FK-lar yaddaşda yenidən bağlanır və hər cədvəl
+bir neçə bulk_create ilə yazılır (sətir-sətir save yoxdur).
+Şəkil/video faylları kopyalanmır, eyni fayla istinad edilir.
+"""
+
+from __future__ import annotations
+
+from django.db import transaction
+
+from .models import Exam, QuestionBlock, ExamQuestion, ExamQuestionOption
+
+
+BATCH_SIZE = 1000
+
+
+def _copyable_attnames(model, *, skip=()) -> list[str]:
+    return [
+        f.attname for f in model._meta.concrete_fields
+        if not f.primary_key and f.name not in skip
+    ]
+
+
+def _copy_m2m(field_name: str, src_id: int, dst_id: int) -> None:
+    field = Exam._meta.get_field(field_name)
+    through = field.remote_field.through
+    src_col = field.m2m_column_name()
+    dst_col = field.m2m_reverse_name()
+
+    target_ids = through.objects.filter(**{src_col: src_id}).values_list(dst_col, flat=True)
+    through.objects.bulk_create(
+        [through(**{src_col: dst_id, dst_col: t}) for t in target_ids],
+        batch_size=BATCH_SIZE,
+    )
+
+
+def clone_exam(exam: Exam, *, author=None, title: str | None = None) -> Exam:
+    """
+    Exam-in tam surətini yaradır və yeni Exam-i qaytarır.
+    - yeni slug avtomatik yaranır
+    - surət deaktiv yaranır (müəllim yoxlayıb özü aktiv etsin)
+    - attempt-lər kopyalanmır
+    """
+    with transaction.atomic():
+        new_exam = Exam(**{
+            name: getattr(exam, name)
+            for name in _copyable_attnames(Exam, skip=("slug", "created_at"))
+        })
+        if author is not None:
+            new_exam.author = author
+        new_exam.title = title or f"{exam.title} (kopya)"
+        new_exam.is_active = False
+        new_exam.save()
+
+        _copy_m2m("allowed_users", exam.id, new_exam.id)
+        _copy_m2m("allowed_groups", exam.id, new_exam.id)
+
+        # ---- Bloklar ----
+        block_cols = _copyable_attnames(QuestionBlock, skip=("exam",))
+        old_blocks = list(QuestionBlock.objects.filter(exam=exam).order_by("id").values("id", *block_cols))
+        new_blocks = QuestionBlock.objects.bulk_create(
+            [QuestionBlock(exam_id=new_exam.id, **{c: row[c] for c in block_cols}) for row in old_blocks],
+            batch_size=BATCH_SIZE,
+        )
+        block_map = {row["id"]: b.id for row, b in zip(old_blocks, new_blocks)}
+
+        # ---- Suallar (media: eyni fayl adı -> istinad kopyası) ----
+        q_cols = _copyable_attnames(ExamQuestion, skip=("exam",))
+        old_questions = list(ExamQuestion.objects.filter(exam=exam).order_by("id").values("id", *q_cols))
+        new_questions = []
+        for row in old_questions:
+            data = {c: row[c] for c in q_cols}
+            data["block_id"] = block_map.get(row["block_id"])
+            new_questions.append(ExamQuestion(exam_id=new_exam.id, **data))
+        new_questions = ExamQuestion.objects.bulk_create(new_questions, batch_size=BATCH_SIZE)
+        question_map = {row["id"]: q.id for row, q in zip(old_questions, new_questions)}
+
+        # ---- Variantlar ----
+        opt_cols = _copyable_attnames(ExamQuestionOption, skip=("question",))
+        opts = (
+            ExamQuestionOption.objects
+            .filter(question__exam=exam)
+            .order_by("id")
+            .values("question_id", *opt_cols)
+        )
+        ExamQuestionOption.objects.bulk_create(
+            [
+                ExamQuestionOption(question_id=question_map[row["question_id"]], **{c: row[c] for c in opt_cols})
+                for row in opts
+            ],
+            batch_size=BATCH_SIZE,
+        )
+
+    return new_exam
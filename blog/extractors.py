@@ -0,0 +1,268 @@
+# blog/extractors.py
+"""
+Yüklənən sual bankı fayllarından (.txt / .docx / .pdf) mətn çıxaran engine.
+
+- PDF səhifələri process pool-da paralel oxunur (böyük fayllarda)
+- DOCX `word/document.xml` lxml.iterparse ilə stream olunur (DOM qurulmur)
+- nəticə upload-un SHA-256 hash-i ilə cache-lənir: preview/save zamanı
+  eyni fayl təkrar yüklənəndə heç nə yenidən parse olunmur
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.cache import cache
+from lxml import etree
+
+try:
+    from pypdf import PdfReader
+except Exception:
+    PdfReader = None
+
+
+MAX_UPLOAD_BYTES = 5 * 1024 * 1024  # 5MB
+
+CACHE_PREFIX = "upload_text"
+CACHE_TIMEOUT = getattr(settings, "UPLOAD_TEXT_CACHE_SECONDS", 60 * 60)
+
+# bundan az səhifəli PDF-lər üçün pool açmağa dəyməz (process start > qazanc)
+PDF_PARALLEL_MIN_PAGES = getattr(settings, "PDF_PARALLEL_MIN_PAGES", 8)
+PDF_POOL_WORKERS = getattr(settings, "PDF_POOL_WORKERS", None) or min(4, os.cpu_count() or 1)
+
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+W_BODY = f"{W_NS}body"
+W_P = f"{W_NS}p"
+W_T = f"{W_NS}t"
+# python-docx `paragraph.text` ilə eyni davranış: tab -> \t, br/cr -> \n
+W_CHAR_MAP = {
+    f"{W_NS}tab": "\t",
+    f"{W_NS}ptab": "\t",
+    f"{W_NS}br": "\n",
+    f"{W_NS}cr": "\n",
+    f"{W_NS}noBreakHyphen": "-",
+}
+
+
+def normalize_pdf_extracted_text(text: str) -> str:
+    """
+    PDF-dən çıxan mətni parser üçün uyğun formaya salır:
+    - sual nömrələrinin qabağına boş sətir əlavə edir (… \n\n12) …)
+    - A–E variantlarının qabağına newline əlavə edir (… \nA) …)
+    - "Cavab:" sətrini yeni sətrə keçirir
+    - '*' işarəsi ilə variant arasında boşluğu düzəldir (*A) kimi)
+    """
+    if not text:
+        return ""
+
+    t = text.replace("\r", "\n")
+
+    # çoxlu boşluqları normallaşdır
+    t = re.sub(r"[ \t]+", " ", t)
+
+    # "Cavab:" həmişə yeni sətirdən başlasın
+    t = re.sub(r"(?i)\s+(Cavab\s*:)", r"\n\1", t)
+
+    # "* A)" kimi çıxırsa "*A)" et
+    t = re.sub(r"\*\s+([A-E])", r"*\1", t, flags=re.IGNORECASE)
+
+    # Sual nömrələri: " 12)" və ya " 12." -> yeni blok kimi başlasın
+    # (Variant daxilində 1) 2) olsa belə parser artıq IN_OPT-də bunu sual saymır, problem olmur.)
+    t = re.sub(r"(?<!\n)\s+(\d{1,4})\s*([\)\.])", r"\n\n\1\2", t)
+
+    # Variantlar: " A)" / " *A)" / " B." və s -> yeni sətirdən başlasın
+    t = re.sub(r"(?<!\n)\s+(\*?[A-E])\s*([\)\.])", r"\n\1\2", t, flags=re.IGNORECASE)
+
+    # 3+ boş sətiri 2-yə sal
+    t = re.sub(r"\n{3,}", "\n\n", t)
+
+    return t.strip()
+
+
+# ------------------------
+# Hash + cache
+# ------------------------
+
+def _read_upload(uploaded_file) -> tuple[bytes, str]:
+    """
+    Upload-u bir dəfə oxuyur və eyni keçiddə SHA-256 hesablayır.
+    (5MB limit olduğu üçün yaddaşda saxlamaq problem deyil)
+    """
+    h = hashlib.sha256()
+    buf = io.BytesIO()
+    if hasattr(uploaded_file, "seek"):
+        uploaded_file.seek(0)
+    for chunk in uploaded_file.chunks():
+        h.update(chunk)
+        buf.write(chunk)
+    return buf.getvalue(), h.hexdigest()
+
+
+def _cache_key(digest: str, ext: str) -> str:
+    return f"{CACHE_PREFIX}:{ext.lstrip('.')}:{digest}"
+
+
+# ------------------------
+# DOCX (stream)
+# ------------------------
+
+def _docx_paragraph_text(p) -> str:
+    parts = []
+    for el in p.iter():
+        if el.tag == W_T:
+            parts.append(el.text or "")
+        else:
+            ch = W_CHAR_MAP.get(el.tag)
+            if ch:
+                parts.append(ch)
+    return "".join(parts)
+
+
+def _extract_docx(data: bytes) -> str:
+    """
+    `word/document.xml`-i iterparse ilə oxuyur.
+    Yalnız body səviyyəli paragraflar götürülür (Document.paragraphs kimi),
+    hər element emal olunan kimi silinir ki, yaddaş sabit qalsın.
+    """
+    try:
+        zf = zipfile.ZipFile(io.BytesIO(data))
+    except zipfile.BadZipFile:
+        raise ValueError("DOCX faylı zədəlidir və açıla bilmədi.")
+
+    with zf:
+        if "word/document.xml" not in zf.namelist():
+            # qeyri-standart part adı -> köhnə yol (python-docx rels-dən tapır)
+            from docx import Document
+            doc = Document(io.BytesIO(data))
+            return "\n".join(t for t in ((p.text or "").strip() for p in doc.paragraphs) if t)
+
+        lines = []
+        with zf.open("word/document.xml") as fh:
+            context = etree.iterparse(
+                fh,
+                events=("end",),
+                resolve_entities=False,
+                no_network=True,
+                huge_tree=True,
+            )
+            for _, el in context:
+                parent = el.getparent()
+                if parent is None or parent.tag != W_BODY:
+                    continue
+
+                if el.tag == W_P:
+                    t = _docx_paragraph_text(el).strip()
+                    if t:
+                        lines.append(t)
+
+                # body-nin birbaşa uşağı bitdi -> onu və əvvəlkiləri at
+                el.clear()
+                while el.getprevious() is not None:
+                    del parent[0]
+
+        return "\n".join(lines)
+
+
+# ------------------------
+# PDF (parallel pages)
+# ------------------------
+
+_PDF_POOL: ProcessPoolExecutor | None = None
+
+
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    global _PDF_POOL
+    if _PDF_POOL is None:
+        _PDF_POOL = ProcessPoolExecutor(max_workers=PDF_POOL_WORKERS)
+    return _PDF_POOL
+
+
+def _reset_pdf_pool() -> None:
+    global _PDF_POOL
+    if _PDF_POOL is not None:
+        _PDF_POOL.shutdown(wait=False, cancel_futures=True)
+    _PDF_POOL = None
+
+
+def _pdf_pages_text(data: bytes, start: int, stop: int) -> list[str]:
+    """
+    Worker process-də işləyir: [start, stop) səhifələrinin mətnini qaytarır.
+    PdfReader pickle olunmadığı üçün hər worker faylı özü açır.
+    """
+    reader = PdfReader(io.BytesIO(data))
+    out = []
+    for i in range(start, stop):
+        out.append((reader.pages[i].extract_text() or "").strip())
+    return out
+
+
+def _extract_pdf(data: bytes) -> str:
+    if PdfReader is None:
+        raise ValueError("PDF oxuma üçün 'pypdf' quraşdırılmayıb. `pip install pypdf` edin.")
+
+    page_count = len(PdfReader(io.BytesIO(data)).pages)
+
+    texts: list[str] | None = None
+    if page_count >= PDF_PARALLEL_MIN_PAGES and PDF_POOL_WORKERS > 1:
+        step = -(-page_count // PDF_POOL_WORKERS)  # ceil
+        ranges = [(s, min(s + step, page_count)) for s in range(0, page_count, step)]
+        try:
+            pool = _get_pdf_pool()
+            futures = [pool.submit(_pdf_pages_text, data, s, e) for s, e in ranges]
+            texts = [t for f in futures for t in f.result()]
+        except BrokenProcessPool:
+            # pool ölübsə (worker kill və s.) -> sıfırla, serial davam et
+            _reset_pdf_pool()
+            texts = None
+
+    if texts is None:
+        texts = _pdf_pages_text(data, 0, page_count)
+
+    raw = "\n\n".join(t for t in texts if t)
+
+    # ✅ əsas fix burada
+    return normalize_pdf_extracted_text(raw)
+
+
+# ------------------------
+# Public API
+# ------------------------
+
+def extract_upload_text(uploaded_file) -> str:
+    """
+    Upload-dan mətn çıxarır (.txt / .docx / .pdf).
+    Eyni məzmunlu fayl üçün nəticə cache-dən qaytarılır.
+    """
+    name = uploaded_file.name.lower()
+    ext = os.path.splitext(name)[1]
+
+    # təhlükəsizlik: böyük fayl limiti (məs: 5MB)
+    if uploaded_file.size > MAX_UPLOAD_BYTES:
+        raise ValueError("Fayl çox böyükdür (max 5MB).")
+
+    if ext not in (".txt", ".docx", ".pdf"):
+        raise ValueError("Yalnız .docx, .pdf, .txt qəbul olunur.")
+
+    data, digest = _read_upload(uploaded_file)
+    key = _cache_key(digest, ext)
+
+    text = cache.get(key)
+    if text is not None:
+        return text
+
+    if ext == ".txt":
+        text = data.decode("utf-8", errors="ignore")
+    elif ext == ".docx":
+        text = _extract_docx(data)
+    else:
+        text = _extract_pdf(data)
+
+    cache.set(key, text, CACHE_TIMEOUT)
+    return text
@@ -0,0 +1,53 @@
+# Köhnə 1..n sıra açarlarını boşluqlu açarlara (1024, 2048, ...) keçirir:
+# əks halda köhnə imtahanda ilk drag-and-drop həmişə tam rebalance edir.
+
+from django.db import migrations
+from django.db.models import F
+
+
+ORDER_GAP = 1024  # blog/ordering.py (migration-da sabit saxlanılır)
+
+
+def _respace(model, scope: str) -> None:
+    """
+    Scope daxilində mövcud sıranı saxlayıb açarları GAP, 2*GAP, ... edir.
+    Əvvəl dəyişən sətirlər bütün köhnə / yeni açarlardan yuxarı sürüşdürülür
+    -> (scope, order) unique constraint-i aralıq vəziyyətdə pozulmur.
+    """
+    rows = model.objects.order_by(scope, "order", "id").values_list("id", scope, "order")
+    changed = {}
+    max_old = max_count = 0
+    current, position = object(), 0
+    for pk, key, order in rows.iterator(chunk_size=2000):
+        position = position + 1 if key == current else 1
+        current = key
+        max_old = max(max_old, order or 0)
+        max_count = max(max_count, position)
+        if order != position * ORDER_GAP:
+            changed[pk] = position * ORDER_GAP
+    if not changed:
+        return
+
+    shift = max(max_old, max_count * ORDER_GAP) + 1
+    ids = list(changed)
+    for i in range(0, len(ids), 500):
+        model.objects.filter(id__in=ids[i:i + 500]).update(order=F("order") + shift)
+    model.objects.bulk_update(
+        [model(id=pk, order=order) for pk, order in changed.items()], ["order"], batch_size=500,
+    )
+
+
+def respace_orders(apps, schema_editor):
+    _respace(apps.get_model("blog", "QuestionBlock"), "exam_id")
+    _respace(apps.get_model("blog", "ExamQuestion"), "exam_id")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0032_remove_examquestion_paint_force_disable"),
+    ]
+
+    operations = [
+        migrations.RunPython(respace_orders, migrations.RunPython.noop),
+    ]
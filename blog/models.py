@@ -7,11 +7,14 @@ from django.utils.crypto import get_random_string
 from django.utils import timezone
 from datetime import timedelta
 from django.contrib.auth.models import Group
+import hashlib
 import itertools
+import re
 from django.templatetags.static import static
 from .validators import validate_file_extension, validate_file_size, validate_zip_contents
 from django.core.exceptions import ValidationError
 from django.core.validators import FileExtensionValidator
+from .ordering import GapOrderedMixin
 
 
 
@@ -548,7 +551,9 @@ class Exam(models.Model):
     
     
 # --- BU YENİ MODELİ ƏLAVƏ EDİN (Exam modelindən sonra, ExamQuestion-dan əvvəl) ---
-class QuestionBlock(models.Model):
+class QuestionBlock(GapOrderedMixin, models.Model):
+    order_scope = ("exam",)
+
     exam = models.ForeignKey(Exam, on_delete=models.CASCADE, related_name='question_blocks', verbose_name="İmtahan")
     name = models.CharField("Blok adı", max_length=100)
     order = models.PositiveIntegerField("Sıra", default=1)
@@ -571,7 +576,18 @@ class QuestionBlock(models.Model):
 # ---------------------------------------------------------------------------------
 
 
-class ExamQuestion(models.Model):
+def question_fingerprint(text: str) -> str:
+    """
+    Sual mətninin sabit fingerprint-i (ExamQuestion.fingerprint, 64 simvol).
+    Boşluq/böyük-kiçik hərf fərqi nəzərə alınmır.
+    """
+    norm = re.sub(r"\s+", " ", (text or "").strip().lower())
+    return hashlib.sha256(norm.encode("utf-8")).hexdigest()
+
+
+class ExamQuestion(GapOrderedMixin, models.Model):
+    order_scope = ("exam",)
+
     points = models.PositiveIntegerField(default=1)
     fingerprint = models.CharField(max_length=64, blank=True, db_index=True)
     ANSWER_MODE_CHOICES = (
@@ -654,7 +670,15 @@ class ExamQuestion(models.Model):
         ordering = ["order", "id"]
 
     def __str__(self):
-        return f"{self.exam.title} – {self.order}. sual"
+        return f"{self.exam.title} – {self.order_position()}. sual"
+
+    def save(self, *args, **kwargs):
+        # fingerprint həmişə text-dən: bank sync-i sualları onunla uyğunlaşdırır
+        self.fingerprint = question_fingerprint(self.text)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "text" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "fingerprint"}
+        super().save(*args, **kwargs)
 
     @property
     def effective_time_limit(self):
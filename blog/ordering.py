@@ -0,0 +1,177 @@
+# blog/ordering.py
+"""
+Boşluqlu (gap-based) sıralama: ExamQuestion, QuestionBlock, CourseTopic üçün.
+
+`order` sütunu 1, 2, 3 əvəzinə ORDER_GAP addımı ilə yazılır (1024, 2048, ...).
+Drag-and-drop ilə bir elementi yerindən tərpətmək = qonşu açarların ortası
+-> cəmi BİR sətrin UPDATE-i (N sətri yenidən nömrələmək lazım deyil).
+Boşluq qalmayanda (qonşular arası fərq 1) scope yenidən balanslaşdırılır.
+
+Model tərəfdə:
+    class CourseTopic(GapOrderedMixin, models.Model):
+        order_scope = ("course",)
+
+Mixin sahə əlavə etmir -> migration tələb olunmur.
+
+`order` daxili açardır (1024, 2048, ...): istifadəçiyə göstərilən nömrə
+`order_position()` / `with_positions()` ilə hesablanan 1-based mövqedir.
+"""
+
+from __future__ import annotations
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Max, Q, Value, When, Window
+from django.db.models.functions import RowNumber
+
+
+ORDER_GAP = 1024
+
+
+class GapOrderedMixin:
+    """
+    `order` sahəsi olan modellər üçün sıralama API-si.
+    `order_scope` - sıranın hansı FK daxilində keçərli olduğu (məs. ("exam",)).
+    """
+
+    order_field = "order"
+    order_scope: tuple[str, ...] = ()
+
+    # ---- scope ----
+
+    @classmethod
+    def _order_scope_kwargs(cls, scope: dict) -> dict:
+        out = {}
+        for name in cls.order_scope:
+            attname = cls._meta.get_field(name).attname
+            if name in scope:
+                out[attname] = getattr(scope[name], "pk", scope[name])
+            elif attname in scope:
+                out[attname] = scope[attname]
+            else:
+                raise TypeError(f"{cls.__name__}: '{name}' scope verilməyib.")
+        return out
+
+    @classmethod
+    def ordered_in_scope(cls, **scope):
+        return cls._default_manager.filter(**cls._order_scope_kwargs(scope)).order_by(cls.order_field, "pk")
+
+    # ---- append ----
+
+    @classmethod
+    def next_order(cls, **scope) -> int:
+        """Scope-un sonuna əlavə olunacaq element üçün açar (max + GAP)."""
+        qs = cls._default_manager.filter(**cls._order_scope_kwargs(scope))
+        current = qs.aggregate(m=Max(cls.order_field)).get("m") or 0
+        return current + ORDER_GAP
+
+    # ---- rebalance ----
+
+    @classmethod
+    def _renumber(cls, ids: list, current_max: int) -> None:
+        """
+        `ids` sırası ilə GAP, 2*GAP, ... yazır. İki UPDATE: əvvəl hamısı mövcud
+        açarlardan yuxarı sürüşdürülür, sonra yerinə qoyulur -> (course, order)
+        kimi unique constraint-lər sətir-sətir yoxlamada da pozulmur.
+        """
+        f = cls.order_field
+        shift = max(current_max, len(ids) * ORDER_GAP) + 1
+        whens = [When(pk=pk, then=Value(i * ORDER_GAP + shift)) for i, pk in enumerate(ids, start=1)]
+        base = cls._default_manager.filter(pk__in=ids)
+        base.update(**{f: Case(*whens, output_field=IntegerField())})
+        base.update(**{f: F(f) - shift})
+
+    @classmethod
+    def rebalance_order(cls, **scope) -> list:
+        """
+        Scope-u hazırkı sıra ilə yenidən nömrələyir (boşluqları bərpa edir).
+        Yeni sıra ilə pk siyahısını qaytarır.
+        """
+        with transaction.atomic():
+            rows = list(cls.ordered_in_scope(**scope).select_for_update().values_list("pk", cls.order_field))
+            if rows:
+                cls._renumber([pk for pk, _ in rows], max(o for _, o in rows))
+        return [pk for pk, _ in rows]
+
+    # ---- move ----
+
+    @classmethod
+    def _neighbour_keys(cls, pk, position: int, scope: dict) -> list[int]:
+        qs = cls.ordered_in_scope(**scope).exclude(pk=pk).values_list(cls.order_field, flat=True)
+        if position == 0:
+            return [None] + list(qs[:1])
+        return list(qs[position - 1:position + 1])
+
+    @classmethod
+    def _key_between(cls, prev, nxt) -> int | None:
+        if prev is None and nxt is None:
+            return ORDER_GAP
+        if prev is None:
+            if nxt > ORDER_GAP:
+                return nxt - ORDER_GAP
+            return nxt // 2 if nxt >= 2 else None
+        if nxt is None:
+            return prev + ORDER_GAP
+        if nxt - prev > 1:
+            return (prev + nxt) // 2
+        return None
+
+    @classmethod
+    def move_to_position(cls, pk, position: int, **scope) -> int:
+        """
+        Elementi scope daxilində `position` (0-based) yerinə köçürür.
+        Adətən 1 SELECT (iki qonşu açar) + 1 UPDATE. Yeni açarı qaytarır.
+        """
+        position = max(0, int(position))
+        f = cls.order_field
+
+        with transaction.atomic():
+            keys = cls._neighbour_keys(pk, position, scope)
+            if position > 0 and not keys:
+                # sondan kənar -> sona at
+                keys = [cls.ordered_in_scope(**scope).exclude(pk=pk).values_list(f, flat=True).last(), None]
+
+            prev = keys[0] if keys else None
+            nxt = keys[1] if len(keys) > 1 else None
+            new_key = cls._key_between(prev, nxt)
+
+            if new_key is None:
+                # boşluq qalmayıb -> balansla və yenidən hesabla
+                cls.rebalance_order(**scope)
+                keys = cls._neighbour_keys(pk, position, scope)
+                prev = keys[0] if keys else None
+                nxt = keys[1] if len(keys) > 1 else None
+                new_key = cls._key_between(prev, nxt)
+
+            cls._default_manager.filter(pk=pk, **cls._order_scope_kwargs(scope)).update(**{f: new_key})
+        return new_key
+
+    # ---- göstərilən mövqe ----
+
+    @classmethod
+    def with_positions(cls, qs):
+        """
+        `position` (1-based, scope daxilində) window funksiyası ilə - siyahıda
+        sətir başına sorğu olmasın. Row number WHERE-dən sonra hesablanır:
+        scope-u tam əhatə edən queryset-lərdə istifadə et.
+        """
+        f = cls.order_field
+        return qs.annotate(position=Window(
+            RowNumber(),
+            partition_by=[F(cls._meta.get_field(name).attname) for name in cls.order_scope],
+            order_by=[F(f).asc(), F("pk").asc()],
+        ))
+
+    def order_position(self) -> int:
+        """1-based mövqe; with_positions ilə gəlibsə sorğusuz, yoxsa bir COUNT."""
+        annotated = getattr(self, "position", None)
+        if annotated is not None:
+            return annotated
+        cls, f = type(self), self.order_field
+        key = getattr(self, f)
+        scope = cls._order_scope_kwargs({
+            name: getattr(self, cls._meta.get_field(name).attname) for name in cls.order_scope
+        })
+        before = cls._default_manager.filter(**scope).filter(
+            Q(**{f"{f}__lt": key}) | Q(**{f: key, "pk__lt": self.pk})
+        )
+        return before.count() + 1
@@ -1,3 +1,366 @@
-from django.test import TestCase
+import io
+import os
+import shutil
+import tempfile
+import zipfile
 
-# Create your tests here.
+import msgpack
+from django.contrib.auth.models import Group, User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .ordering import ORDER_GAP
+from .bundles import RECORDS_NAME, BundleError, export_exam_bundle, import_exam_bundle
+from .models import (
+    Exam, QuestionBlock, ExamQuestion, ExamQuestionOption,
+    ExamAttempt, ExamAnswer, question_fingerprint,
+)
+
+
+class MediaRootMixin:
+    """Test faylları müvəqqəti MEDIA_ROOT-a yazılır."""
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+
+    def media_files(self):
+        return sorted(
+            os.path.relpath(os.path.join(root, name), self.media_root)
+            for root, _, names in os.walk(self.media_root)
+            for name in names
+        )
+
+
+class ExamBundleTests(MediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.author = User.objects.create_user(username="teacher", password="p")
+        self.student = User.objects.create_user(username="student", password="p")
+
+        self.exam = Exam.objects.create(title="Bundle", author=self.author)
+        self.block = QuestionBlock.objects.create(exam=self.exam, name="Blok 1", order=1024)
+        image = default_storage.save("exam_media/q1.png", ContentFile(b"png-bytes"))
+        self.q1 = ExamQuestion.objects.create(
+            exam=self.exam, block=self.block, text="Q1", order=1024, points=3, image=image,
+        )
+        self.q2 = ExamQuestion.objects.create(exam=self.exam, text="Q2", order=2048, answer_mode="multiple")
+        for q in (self.q1, self.q2):
+            for j in range(3):
+                ExamQuestionOption.objects.create(question=q, text=f"{q.text}-{j}", is_correct=(j != 2))
+
+        attempt = ExamAttempt.objects.create(user=self.student, exam=self.exam, correct_count=1)
+        answer = ExamAnswer.objects.create(attempt=attempt, question=self.q1, is_correct=True)
+        answer.selected_options.set(self.q1.options.filter(is_correct=True)[:1])
+
+    def export(self, **kwargs):
+        buf = io.BytesIO()
+        export_exam_bundle(self.exam, buf, **kwargs)
+        buf.seek(0)
+        return buf
+
+    def test_round_trip_copies_structure_attempts_and_media(self):
+        imported = import_exam_bundle(self.export(include_attempts=True), author=self.author, title="Kopya")
+
+        self.assertNotEqual(imported.pk, self.exam.pk)
+        self.assertEqual(imported.title, "Kopya")
+        self.assertFalse(imported.is_active)
+        self.assertEqual(list(imported.question_blocks.values_list("name", "order")), [("Blok 1", 1024)])
+
+        questions = list(imported.questions.order_by("order"))
+        self.assertEqual(
+            [(q.text, q.order, q.points, q.answer_mode, q.block.name if q.block else None) for q in questions],
+            [("Q1", 1024, 3, "single", "Blok 1"), ("Q2", 2048, 1, "multiple", None)],
+        )
+        for q in questions:
+            self.assertEqual(
+                list(q.options.order_by("id").values_list("text", "is_correct")),
+                [(f"{q.text}-0", True), (f"{q.text}-1", True), (f"{q.text}-2", False)],
+            )
+
+        # media yeni fayl kimi yazılır, məzmunu eynidir
+        self.assertNotEqual(questions[0].image.name, self.q1.image.name)
+        with questions[0].image.open("rb") as fh:
+            self.assertEqual(fh.read(), b"png-bytes")
+
+        attempt = ExamAttempt.objects.get(exam=imported)
+        self.assertEqual((attempt.user_id, attempt.correct_count), (self.student.id, 1))
+        answer = attempt.answers.get()
+        self.assertEqual(answer.question_id, questions[0].id)
+        self.assertEqual(list(answer.selected_options.values_list("text", flat=True)), ["Q1-0"])
+
+    def test_export_without_attempts(self):
+        imported = import_exam_bundle(self.export(), author=self.author)
+        self.assertEqual(imported.questions.count(), 2)
+        self.assertFalse(ExamAttempt.objects.filter(exam=imported).exists())
+
+    def test_failed_import_rolls_back_rows_and_media(self):
+        # düzgün bundle + sonda naməlum record: suallar (və media) artıq yazılıb, sonra xəta
+        src = zipfile.ZipFile(self.export())
+        broken = io.BytesIO()
+        with zipfile.ZipFile(broken, "w") as zf:
+            for name in src.namelist():
+                data = src.read(name)
+                if name == RECORDS_NAME:
+                    data += msgpack.packb({"t": "bogus", "d": {}})
+                zf.writestr(name, data)
+        broken.seek(0)
+
+        exams_before = Exam.objects.count()
+        files_before = self.media_files()
+        with self.assertRaises(BundleError):
+            import_exam_bundle(broken, author=self.author)
+
+        self.assertEqual(Exam.objects.count(), exams_before)
+        self.assertEqual(self.media_files(), files_before)
+
+    def test_rejects_non_bundle_zip(self):
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, "w") as zf:
+            zf.writestr("hello.txt", "x")
+        buf.seek(0)
+        with self.assertRaises(BundleError):
+            import_exam_bundle(buf, author=self.author)
+
+
+class QuestionBankSyncTests(TestCase):
+    """process_question_bank: blokların sualları diff ilə yenilənir (id-lər qorunur)."""
+
+    def setUp(self):
+        self.teacher = User.objects.create_user(username="teacher", password="p")
+        self.teacher.groups.add(Group.objects.get_or_create(name="teacher")[0])
+        self.exam = Exam.objects.create(title="Bank", author=self.teacher)
+        self.client.force_login(self.teacher)
+        self.url = reverse("process_question_bank", args=[self.exam.slug])
+
+    def save_bank(self, *blocks, deleted=()):
+        """blocks: (ad, mövcud blok və ya None, [sual mətnləri])"""
+        data = {"deleted_block_ids": ",".join(str(b.id) for b in deleted)}
+        for i, (name, block, texts) in enumerate(blocks):
+            data[f"block_name_{i}"] = name
+            data[f"block_content_{i}"] = "\n".join(f"{n}. {t}" for n, t in enumerate(texts, start=1))
+            if block is not None:
+                data[f"block_db_id_{i}"] = str(block.id)
+        response = self.client.post(self.url, data)
+        self.assertEqual(response.status_code, 302)
+
+    def block(self, name):
+        return QuestionBlock.objects.get(exam=self.exam, name=name)
+
+    def ids_by_text(self):
+        return dict(ExamQuestion.objects.filter(exam=self.exam).values_list("text", "id"))
+
+    def layout(self):
+        return list(
+            ExamQuestion.objects.filter(exam=self.exam)
+            .order_by("order", "id")
+            .values_list("block__name", "text")
+        )
+
+    def test_first_save_creates_blocks_with_exam_wide_order(self):
+        self.save_bank(("A", None, ["a1", "a2"]), ("B", None, ["b1"]))
+
+        self.assertEqual(self.layout(), [("A", "a1"), ("A", "a2"), ("B", "b1")])
+        orders = list(ExamQuestion.objects.filter(exam=self.exam).order_by("order").values_list("order", flat=True))
+        self.assertEqual(orders, [1024, 2048, 3072])
+        self.assertTrue(all(ExamQuestion.objects.filter(exam=self.exam).values_list("fingerprint", flat=True)))
+
+    def test_edited_text_keeps_question_id_and_answers(self):
+        self.save_bank(("A", None, ["a1", "a2"]))
+        ids = self.ids_by_text()
+        student = User.objects.create_user(username="student", password="p")
+        attempt = ExamAttempt.objects.create(user=student, exam=self.exam)
+        ExamAnswer.objects.create(attempt=attempt, question_id=ids["a2"], text_answer="x")
+
+        self.save_bank(("A", self.block("A"), ["a1", "a2 (düzəliş)"]))
+
+        self.assertEqual(self.ids_by_text(), {"a1": ids["a1"], "a2 (düzəliş)": ids["a2"]})
+        self.assertTrue(ExamAnswer.objects.filter(question_id=ids["a2"]).exists())
+
+    def test_insert_reorder_and_delete_follow_text(self):
+        self.save_bank(("A", None, ["a1", "a2", "a3"]))
+        ids = self.ids_by_text()
+
+        # a3 önə keçir, a1 yerinə yeni mətn: uyğun gəlməyən köhnə sual redaktə sayılır
+        self.save_bank(("A", self.block("A"), ["a3", "new", "a2"]))
+
+        self.assertEqual(self.layout(), [("A", "a3"), ("A", "new"), ("A", "a2")])
+        self.assertEqual(self.ids_by_text(), {"a3": ids["a3"], "new": ids["a1"], "a2": ids["a2"]})
+
+        # sual çıxarılır -> yalnız o silinir; artıq sual -> yeni sətir
+        self.save_bank(("A", self.block("A"), ["a3", "a2"]))
+        self.assertEqual(self.ids_by_text(), {"a3": ids["a3"], "a2": ids["a2"]})
+        self.assertFalse(ExamQuestion.objects.filter(id=ids["a1"]).exists())
+
+        self.save_bank(("A", self.block("A"), ["a3", "a2", "a4"]))
+        after = self.ids_by_text()
+        self.assertEqual((after["a3"], after["a2"]), (ids["a3"], ids["a2"]))
+        self.assertNotIn(after["a4"], ids.values())
+
+    def test_case_and_whitespace_edits_are_saved(self):
+        self.save_bank(("A", None, ["paris is capital", "b"]))
+        ids = self.ids_by_text()
+
+        # fingerprint eynidir, amma mətn fərqlidir -> yazılmalıdır
+        self.save_bank(("A", self.block("A"), ["Paris is  capital", "b"]))
+        self.assertEqual(self.ids_by_text(), {"Paris is  capital": ids["paris is capital"], "b": ids["b"]})
+
+    def test_question_edited_elsewhere_can_be_reverted_in_bank(self):
+        self.save_bank(("A", None, ["a1", "a2"]))
+        ids = self.ids_by_text()
+
+        # edit_exam_question kimi: model save() fingerprint-i yeniləyir
+        q = ExamQuestion.objects.get(id=ids["a1"])
+        q.text = "Changed elsewhere"
+        q.save()
+        self.assertEqual(q.fingerprint, question_fingerprint("Changed elsewhere"))
+
+        self.save_bank(("A", self.block("A"), ["a1", "a2"]))
+        self.assertEqual(self.ids_by_text(), {"a1": ids["a1"], "a2": ids["a2"]})
+
+    def test_stale_fingerprint_is_recomputed_from_text(self):
+        self.save_bank(("A", None, ["a1", "a2"]))
+        ids = self.ids_by_text()
+        # köhnə sətir: text save() keçmədən dəyişib
+        ExamQuestion.objects.filter(id=ids["a1"]).update(text="Changed elsewhere")
+
+        self.save_bank(("A", self.block("A"), ["a1", "a2"]))
+        self.assertEqual(self.ids_by_text(), {"a1": ids["a1"], "a2": ids["a2"]})
+        self.assertEqual(ExamQuestion.objects.get(id=ids["a1"]).fingerprint, question_fingerprint("a1"))
+
+    def test_resaving_unchanged_bank_writes_no_questions(self):
+        self.save_bank(("A", None, ["a1", "a2"]), ("B", None, ["b1"]))
+        A, B = self.block("A"), self.block("B")
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.save_bank(("A", A, ["a1", "a2"]), ("B", B, ["b1"]))
+
+        writes = [
+            q["sql"] for q in ctx.captured_queries
+            if '"blog_examquestion"' in q["sql"] and not q["sql"].startswith("SELECT")
+        ]
+        self.assertEqual(writes, [])
+
+    def test_growing_first_block_shifts_later_blocks(self):
+        self.save_bank(("A", None, ["a1"]), ("B", None, ["b1", "b2"]))
+        A, B = self.block("A"), self.block("B")
+        ids = self.ids_by_text()
+
+        self.save_bank(("A", A, ["a1", "a2"]), ("B", B, ["b1", "b2"]))
+
+        self.assertEqual(self.layout(), [("A", "a1"), ("A", "a2"), ("B", "b1"), ("B", "b2")])
+        self.assertEqual(self.ids_by_text()["b1"], ids["b1"])
+
+    def test_deleted_block_and_duplicate_names(self):
+        self.save_bank(("A", None, ["a1"]), ("B", None, ["b1"]))
+        A, B = self.block("A"), self.block("B")
+
+        self.save_bank(("A", A, ["a1"]), deleted=[B])
+        self.assertFalse(QuestionBlock.objects.filter(id=B.id).exists())
+
+        # eyni adlı iki blok -> heç nə yazılmır
+        self.save_bank(("A", A, ["a1", "a2"]), ("a", None, ["x"]))
+        self.assertEqual(QuestionBlock.objects.filter(exam=self.exam).count(), 1)
+        self.assertNotIn("a2", self.ids_by_text())
+
+
+def _updates(ctx, table):
+    return [q["sql"] for q in ctx.captured_queries if q["sql"].startswith(f'UPDATE "{table}"')]
+
+
+class GapOrderingTests(TestCase):
+    """GapOrderedMixin: sual / blok sıralaması (scope = exam)."""
+
+    def setUp(self):
+        self.teacher = User.objects.create_user(username="teacher", password="p")
+        self.teacher.groups.add(Group.objects.get_or_create(name="teacher")[0])
+        self.exam = Exam.objects.create(title="Order", author=self.teacher)
+        self.other = Exam.objects.create(title="Other", author=self.teacher)
+        self.questions = [
+            ExamQuestion.objects.create(exam=self.exam, text=f"q{i}", order=ExamQuestion.next_order(exam=self.exam))
+            for i in range(4)
+        ]
+        ExamQuestion.objects.create(exam=self.other, text="x", order=ORDER_GAP)
+
+    def texts(self):
+        return list(ExamQuestion.ordered_in_scope(exam=self.exam).values_list("text", flat=True))
+
+    def test_next_order_appends_with_gap_per_scope(self):
+        self.assertEqual(
+            list(ExamQuestion.ordered_in_scope(exam=self.exam).values_list("order", flat=True)),
+            [ORDER_GAP, 2 * ORDER_GAP, 3 * ORDER_GAP, 4 * ORDER_GAP],
+        )
+        self.assertEqual(ExamQuestion.next_order(exam=self.other), 2 * ORDER_GAP)
+        self.assertEqual(QuestionBlock.next_order(exam=self.exam), ORDER_GAP)
+
+    def test_move_updates_a_single_row(self):
+        q3 = self.questions[3]
+        with CaptureQueriesContext(connection) as ctx:
+            key = ExamQuestion.move_to_position(q3.id, 1, exam=self.exam)
+
+        self.assertEqual(len(_updates(ctx, "blog_examquestion")), 1)
+        self.assertEqual(key, ORDER_GAP + ORDER_GAP // 2)
+        self.assertEqual(self.texts(), ["q0", "q3", "q1", "q2"])
+
+    def test_move_to_front_and_past_the_end(self):
+        ExamQuestion.move_to_position(self.questions[2].id, 0, exam=self.exam)
+        self.assertEqual(self.texts(), ["q2", "q0", "q1", "q3"])
+
+        ExamQuestion.move_to_position(self.questions[2].id, 99, exam=self.exam)
+        self.assertEqual(self.texts(), ["q0", "q1", "q3", "q2"])
+
+    def test_exhausted_gap_rebalances_scope_only(self):
+        # q0 və q1 arasında boşluq qalmayıb
+        ExamQuestion.objects.filter(id=self.questions[1].id).update(order=ORDER_GAP + 1)
+
+        key = ExamQuestion.move_to_position(self.questions[3].id, 1, exam=self.exam)
+
+        self.assertEqual(self.texts(), ["q0", "q3", "q1", "q2"])
+        orders = list(ExamQuestion.ordered_in_scope(exam=self.exam).values_list("order", flat=True))
+        self.assertEqual(orders[1], key)
+        self.assertEqual(len(set(orders)), 4)
+        self.assertTrue(all(b - a > 1 for a, b in zip(orders, orders[1:])))
+        self.assertEqual(ExamQuestion.objects.get(exam=self.other).order, ORDER_GAP)
+
+    def test_positions_are_one_based_and_hide_gap_keys(self):
+        ExamQuestion.move_to_position(self.questions[3].id, 1, exam=self.exam)
+        q3 = ExamQuestion.objects.get(id=self.questions[3].id)
+        self.assertEqual(q3.order_position(), 2)
+        self.assertEqual(str(q3), f"{self.exam.title} – 2. sual")
+
+        annotated = ExamQuestion.with_positions(ExamQuestion.objects.all()).order_by("exam_id", "order")
+        with self.assertNumQueries(1):
+            positions = [(q.text, q.position, q.order_position()) for q in annotated]
+        self.assertEqual(
+            positions, [("q0", 1, 1), ("q3", 2, 2), ("q1", 3, 3), ("q2", 4, 4), ("x", 1, 1)],
+        )
+
+    def test_scope_is_required(self):
+        with self.assertRaises(TypeError):
+            ExamQuestion.next_order()
+
+    def test_move_endpoints(self):
+        self.client.force_login(self.teacher)
+        url = reverse("move_exam_question", args=[self.exam.slug, self.questions[0].id])
+
+        response = self.client.post(url, {"position": "2"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()["ok"], response.json()["order"]), (True, 3))  # açar yox, mövqe
+        self.assertEqual(self.texts(), ["q1", "q2", "q0", "q3"])
+
+        self.assertEqual(self.client.post(url, {"position": "abc"}).status_code, 400)
+
+        blocks = [QuestionBlock.objects.create(exam=self.exam, name=n, order=QuestionBlock.next_order(exam=self.exam)) for n in "AB"]
+        url = reverse("move_question_block", args=[self.exam.slug, blocks[1].id])
+        self.assertEqual(self.client.post(url, {"position": "0"}).json()["order"], 1)
+        self.assertEqual(
+            list(QuestionBlock.ordered_in_scope(exam=self.exam).values_list("name", flat=True)), ["B", "A"],
+        )
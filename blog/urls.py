@@ -49,6 +49,7 @@ urlpatterns = [
     path("exams/create/", views.createAndEditExamView, name="create_exam"),
     path("exams/code-check/", views.exam_code_check, name="exam_code_check"),
     path("exams/assigned/", views.assigned_student_exam_list, name="assigned_exam_list"),
+    path("exams/import-bundle/", views.exam_bundle_import, name="exam_bundle_import"),
 
     
     # 2. Tələbə tarixi və müəllim statistikası
@@ -89,11 +90,16 @@ urlpatterns = [
     path("exams/<slug:slug>/toggle-active/", views.toggle_exam_active, name="toggle_exam_active"),
     path("exams/<slug:slug>/edit/", views.createAndEditExamView, name="edit_exam"),
     path("exams/<slug:slug>/delete/", views.delete_exam, name="delete_exam"),
+    path("exams/<slug:slug>/duplicate/", views.duplicate_exam, name="duplicate_exam"),
+    path("exams/<slug:slug>/export-bundle/", views.exam_bundle_export, name="exam_bundle_export"),
+    path("exams/<slug:slug>/print-variants/", views.exam_print_variants, name="exam_print_variants"),
     path("exams/<slug:slug>/results/", views.teacher_exam_results, name="teacher_exam_results"),
     
     # Sual əməliyyatları
     path("exams/<slug:slug>/questions/<int:question_id>/edit/", views.edit_exam_question, name="edit_exam_question"),
     path("exams/<slug:slug>/questions/<int:question_id>/delete/", views.delete_exam_question, name="delete_exam_question"),
+    path("exams/<slug:slug>/questions/<int:question_id>/move/", views.move_exam_question, name="move_exam_question"),
+    path("exams/<slug:slug>/blocks/<int:block_id>/move/", views.move_question_block, name="move_question_block"),
 
     # Tələbə Prosesi
     path("exams/<slug:slug>/start/", views.start_exam, name="start_exam"),
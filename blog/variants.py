@@ -0,0 +1,206 @@
+# blog/variants.py
+"""
+Kağız imtahanlar üçün çap variantları (DOCX) + cavab açarı.
+
+Sualların seçimi və variantların qarışdırılması views.py-dakı məntiqlə
+(generate_random_questions_for_attempt / build_shuffled_options) edilir,
+bura yalnız sadə dict payload-lar gəlir. DOCX render process pool-da gedir,
+hazır olan hər variant dərhal ZIP stream-ə yazılır -> 200 variant üçün
+cavab dəqiqələrlə gözləmədən yüklənməyə başlayır.
+"""
+
+from __future__ import annotations
+
+import io
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from docx import Document
+from docx.shared import Cm, Pt
+
+
+VARIANTS_MAX = getattr(settings, "PRINT_VARIANTS_MAX", 200)
+
+# az variant üçün pool açmağa dəyməz
+RENDER_PARALLEL_MIN = getattr(settings, "PRINT_VARIANTS_PARALLEL_MIN", 4)
+RENDER_POOL_WORKERS = getattr(settings, "PRINT_VARIANTS_WORKERS", None) or min(4, os.cpu_count() or 1)
+
+
+# ------------------------
+# DOCX render (worker process-də işləyir)
+# ------------------------
+
+def render_variant_docx(payload: dict) -> bytes:
+    """
+    Bir variantın DOCX faylı.
+    payload: {"exam_title", "variant_no", "questions": [{"text", "image_path",
+              "points", "multi", "options": [{"label", "text"}]}]}
+    """
+    doc = Document()
+    doc.styles["Normal"].font.size = Pt(11)
+
+    doc.add_heading(payload["exam_title"], level=1)
+    doc.add_paragraph(f"Variant {payload['variant_no']}").runs[0].bold = True
+    doc.add_paragraph("Ad, Soyad: ______________________    Qrup: __________")
+
+    for no, q in enumerate(payload["questions"], start=1):
+        p = doc.add_paragraph()
+        p.paragraph_format.space_before = Pt(8)
+        p.add_run(f"{no}. ").bold = True
+        p.add_run(q["text"])
+        if q.get("points", 1) != 1:
+            p.add_run(f"  ({q['points']} bal)").italic = True
+        if q.get("multi"):
+            p.add_run("  (bir neçə düzgün cavab)").italic = True
+
+        image_path = q.get("image_path")
+        if image_path and os.path.exists(image_path):
+            try:
+                doc.add_picture(image_path, width=Cm(10))
+            except Exception:
+                # dəstəklənməyən format -> şəkilsiz davam
+                pass
+
+        if q["options"]:
+            for opt in q["options"]:
+                op = doc.add_paragraph(f"{opt['label']}) {opt['text']}")
+                op.paragraph_format.left_indent = Cm(0.75)
+                op.paragraph_format.space_after = Pt(0)
+        else:
+            # yazılı sual -> cavab üçün yer
+            for _ in range(4):
+                doc.add_paragraph("_" * 80)
+
+    buf = io.BytesIO()
+    doc.save(buf)
+    return buf.getvalue()
+
+
+def render_answer_key_docx(exam_title: str, keys: list[dict]) -> bytes:
+    """
+    Bütün variantların cavab açarı bir sənəddə.
+    keys: [{"variant_no", "answers": ["B", "A,C", "—", ...]}]
+    """
+    doc = Document()
+    doc.styles["Normal"].font.size = Pt(10)
+    doc.add_heading(f"{exam_title} — cavab açarı", level=1)
+
+    for key in keys:
+        doc.add_heading(f"Variant {key['variant_no']}", level=2)
+        doc.add_paragraph("   ".join(f"{no}) {ans}" for no, ans in enumerate(key["answers"], start=1)))
+
+    buf = io.BytesIO()
+    doc.save(buf)
+    return buf.getvalue()
+
+
+# ------------------------
+# Pool
+# ------------------------
+
+_RENDER_POOL: ProcessPoolExecutor | None = None
+
+
+def _get_render_pool() -> ProcessPoolExecutor:
+    global _RENDER_POOL
+    if _RENDER_POOL is None:
+        _RENDER_POOL = ProcessPoolExecutor(max_workers=RENDER_POOL_WORKERS)
+    return _RENDER_POOL
+
+
+def _reset_render_pool() -> None:
+    global _RENDER_POOL
+    if _RENDER_POOL is not None:
+        _RENDER_POOL.shutdown(wait=False, cancel_futures=True)
+    _RENDER_POOL = None
+
+
+def _rendered_variants(payloads: list[dict]):
+    """
+    (payload, docx_bytes) cütlərini variant sırası ilə verir.
+    Pool-a hamısı birdən göndərilir, nəticələr hazır olduqca oxunur.
+    """
+    futures = None
+    if len(payloads) >= RENDER_PARALLEL_MIN and RENDER_POOL_WORKERS > 1:
+        try:
+            pool = _get_render_pool()
+            futures = [pool.submit(render_variant_docx, p) for p in payloads]
+        except BrokenProcessPool:
+            _reset_render_pool()
+            futures = None
+
+    if futures is None:
+        for p in payloads:
+            yield p, render_variant_docx(p)
+        return
+
+    try:
+        for p, fut in zip(payloads, futures):
+            try:
+                data = fut.result()
+            except BrokenProcessPool:
+                # pool ölübsə -> qalanları serial render et
+                _reset_render_pool()
+                data = render_variant_docx(p)
+            yield p, data
+    finally:
+        # klient yükləməni yarıda kəsibsə, növbədəki işləri ləğv et
+        for fut in futures:
+            fut.cancel()
+
+
+# ------------------------
+# ZIP stream
+# ------------------------
+
+class _ZipStream(io.RawIOBase):
+    """
+    Seek olunmayan yazma buferi: ZipFile buraya yazır, biz yazılanı
+    hissə-hissə götürüb StreamingHttpResponse-a veririk.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: list[bytes] = []
+        self._pos = 0
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        data = bytes(b)
+        self._chunks.append(data)
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._pos
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_variants_zip(exam_title: str, payloads: list[dict], keys: list[dict]):
+    """
+    ZIP-i bayt hissələri kimi generator şəklində qaytarır:
+    variant_001.docx ... + cavab_acari.docx.
+    DOCX özü artıq sıxılmış olduğu üçün ZIP_STORED istifadə olunur.
+    """
+    stream = _ZipStream()
+    width = max(3, len(str(len(payloads))))
+
+    with zipfile.ZipFile(stream, "w", compression=zipfile.ZIP_STORED) as zf:
+        for payload, data in _rendered_variants(payloads):
+            zf.writestr(f"variant_{payload['variant_no']:0{width}d}.docx", data)
+            yield stream.drain()
+
+        zf.writestr("cavab_acari.docx", render_answer_key_docx(exam_title, keys))
+        yield stream.drain()
+
+    # central directory
+    yield stream.drain()
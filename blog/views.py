@@ -1,7 +1,7 @@
 # blog/views.py
 import random
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import HttpResponse, Http404, JsonResponse, HttpResponseNotAllowed, HttpResponseForbidden
+from django.http import HttpResponse, Http404, JsonResponse, HttpResponseNotAllowed, HttpResponseForbidden, FileResponse, StreamingHttpResponse
 from django.views.decorators.http import require_POST
 from django.contrib import messages
 from django.contrib.auth.models import User
@@ -17,7 +17,7 @@ from django.utils import timezone
 from django.utils.text import slugify
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from datetime import timedelta
-from .models import Post, Category, Comment, Subscriber, Question, Exam, ExamQuestion, ExamQuestionOption, ExamAttempt, ExamAnswer, ExamAnswerFile, StudentGroup, QuestionBlock, EmailOTP
+from .models import Post, Category, Comment, Subscriber, Question, Exam, ExamQuestion, ExamQuestionOption, ExamAttempt, ExamAnswer, ExamAnswerFile, StudentGroup, QuestionBlock, EmailOTP, question_fingerprint
 from .forms import (
     SubscriptionForm,
     RegisterForm,
@@ -38,16 +38,20 @@ from django.db.models import Prefetch
 from django.db.models import Q
 import re
 import json
+import hashlib
+import secrets
+import tempfile
 from collections import defaultdict
 from docx import Document
 import os
-try:
-    from pypdf import PdfReader
-except Exception:
-    PdfReader = None
-
+from .extractors import extract_upload_text
+from .cloning import clone_exam
+from .bundles import BundleError, export_exam_bundle, import_exam_bundle
+from .ordering import ORDER_GAP
+from .variants import VARIANTS_MAX, stream_variants_zip
 from .utils import generate_otp, send_verify_email, _save_paint_png_to_answer, _clear_paint_from_answer
 from django.db import transaction
+from django.core.cache import cache
 
 User = get_user_model()
 signer = TimestampSigner()
@@ -71,42 +75,6 @@ def _norm(text: str) -> str:
 
 
 
-def normalize_pdf_extracted_text(text: str) -> str:
-    """
-    PDF-dən çıxan mətni parser üçün uyğun formaya salır:
-    - sual nömrələrinin qabağına boş sətir əlavə edir (… \n\n12) …)
-    - A–E variantlarının qabağına newline əlavə edir (… \nA) …)
-    - "Cavab:" sətrini yeni sətrə keçirir
-    - '*' işarəsi ilə variant arasında boşluğu düzəldir (*A) kimi)
-    """
-    if not text:
-        return ""
-
-    t = text.replace("\r", "\n")
-
-    # çoxlu boşluqları normallaşdır
-    t = re.sub(r"[ \t]+", " ", t)
-
-    # "Cavab:" həmişə yeni sətirdən başlasın
-    t = re.sub(r"(?i)\s+(Cavab\s*:)", r"\n\1", t)
-
-    # "* A)" kimi çıxırsa "*A)" et
-    t = re.sub(r"\*\s+([A-E])", r"*\1", t, flags=re.IGNORECASE)
-
-    # Sual nömrələri: " 12)" və ya " 12." -> yeni blok kimi başlasın
-    # (Variant daxilində 1) 2) olsa belə parser artıq IN_OPT-də bunu sual saymır, problem olmur.)
-    t = re.sub(r"(?<!\n)\s+(\d{1,4})\s*([\)\.])", r"\n\n\1\2", t)
-
-    # Variantlar: " A)" / " *A)" / " B." və s -> yeni sətirdən başlasın
-    t = re.sub(r"(?<!\n)\s+(\*?[A-E])\s*([\)\.])", r"\n\1\2", t, flags=re.IGNORECASE)
-
-    # 3+ boş sətiri 2-yə sal
-    t = re.sub(r"\n{3,}", "\n\n", t)
-
-    return t.strip()
-
-
-
 def build_shuffled_options(attempt_id, question):
     opts = list(question.options.all())
     rnd = random.Random(f"{attempt_id}:{question.id}")
@@ -920,8 +888,7 @@ def add_exam_question(request, slug):
             )
         if form.is_valid():
             # Sualı yaradıq
-            last_q = exam.questions.order_by("-order").first()
-            next_order = (last_q.order + 1) if last_q else 1
+            next_order = ExamQuestion.next_order(exam=exam)
 
             question = form.save(commit=False)
             question.exam = exam
@@ -966,7 +933,8 @@ def create_question_bank(request, slug):
     for block in blocks:
         questions = block.questions.all().order_by('order')
         # Sualları "1. Sual mətni" formatında birləşdiririk
-        text_content = "\n".join([f"{q.order}. {q.text}" for q in questions])
+        # (order boşluqlu açardır, nömrə sıraya görə verilir)
+        text_content = "\n".join([f"{i}. {q.text}" for i, q in enumerate(questions, start=1)])
         
         blocks_data.append({
             'obj': block,
@@ -980,137 +948,239 @@ def create_question_bank(request, slug):
 
 
 
-def process_question_bank(request, slug):
-    exam = get_object_or_404(Exam, slug=slug)
-    
-    if request.method == "POST":
-        # 1. Silinməli olan blokları silirik
-        # Frontend-dən vergüllə ayrılmış ID-lər gələcək (məs: "5,8,12")
-        deleted_ids = request.POST.get('deleted_block_ids', '').split(',')
-        for d_id in deleted_ids:
-            if d_id.strip():
-                QuestionBlock.objects.filter(id=d_id, exam=exam).delete()
-
-        # 2. Ümumi sual sayını yenilə
-        random_count = request.POST.get('random_question_count')
-        if random_count:
-            exam.random_question_count = int(random_count)
-            exam.save()
+BANK_QUESTION_SPLIT_RE = re.compile(r'(?:\n|^)\s*\d+[\.\)]\s+')
 
-        # Adların təkrar olub-olmadığını yoxlamaq üçün set
-        used_names = set()
 
-        # 3. Blokları emal edirik
-        for key, value in request.POST.items():
-            if key.startswith('block_name_'):
-                ui_id = key.split('_')[-1]
-                block_name = value.strip()
-                
-                # Validation: Eyni sorğuda dublikat ad varmı?
-                if block_name.lower() in used_names:
-                    messages.error(request, f"Diqqət: '{block_name}' adlı blok artıq mövcuddur. Zəhmət olmasa fərqli adlardan istifadə edin.")
-                    return redirect('create_question_bank', slug=exam.slug)
-                used_names.add(block_name.lower())
-
-                content_key = f'block_content_{ui_id}'
-                content_text = request.POST.get(content_key, '')
-                time_key = f'block_time_{ui_id}'
-                time_val = request.POST.get(time_key)
-                db_id_key = f'block_db_id_{ui_id}'
-                db_id = request.POST.get(db_id_key)
-
-                # Validation: Bazada başqa blok eyni adda varmı? (özü xaric)
-                existing_check = QuestionBlock.objects.filter(exam=exam, name__iexact=block_name)
-                if db_id:
-                    existing_check = existing_check.exclude(id=db_id)
-                
-                if existing_check.exists():
-                    messages.error(request, f"'{block_name}' adlı blok artıq bazada mövcuddur.")
-                    return redirect('create_question_bank', slug=exam.slug)
-
-                if block_name:
-                    # Blok Yaradılması/Yenilənməsi
-                    if db_id:
-                        # Bazada yoxlayırıq ki, silinməyibsə (concurrency üçün)
-                        block_qs = QuestionBlock.objects.filter(id=db_id)
-                        if block_qs.exists():
-                            block = block_qs.first()
-                            block.name = block_name
-                            block.time_limit_minutes = int(time_val) if time_val else None
-                            block.save()
-                            # Sualları yeniləyirik
-                            block.questions.all().delete()
-                        else:
-                            continue # Blok tapılmadısa keçirik
-                    else:
-                        block = QuestionBlock.objects.create(
-                            exam=exam,
-                            name=block_name,
-                            time_limit_minutes=int(time_val) if time_val else None,
-                            order=ui_id
-                        )
-
-                    # Sualların Parse edilməsi
-                    if content_text.strip():
-                        pattern = r'(?:\n|^)\s*\d+[\.\)]\s+'
-                        questions = re.split(pattern, content_text)
-                        questions = [q.strip() for q in questions if q.strip()]
-                        
-                        for index, q_text in enumerate(questions, start=1):
-                            ExamQuestion.objects.create(
-                                exam=exam,
-                                block=block,
-                                text=q_text,
-                                order=index,
-                                answer_mode='single'
-                            )
-        
-        messages.success(request, "Sual bankı uğurla yadda saxlanıldı!")
-        return redirect('teacher_exam_detail', slug=exam.slug)
-    
-    return redirect('create_question_bank', slug=exam.slug)
+def _split_bank_questions(content_text: str) -> list:
+    """
+    "1. Sual\\n2. Sual" formatlı mətni sual mətnlərinə bölür.
+    """
+    if not (content_text or "").strip():
+        return []
+    parts = BANK_QUESTION_SPLIT_RE.split(content_text)
+    return [q.strip() for q in parts if q.strip()]
 
 
-def extract_text_from_upload(uploaded_file) -> str:
-    name = uploaded_file.name.lower()
-    ext = os.path.splitext(name)[1]
+def _diff_block_questions(exam, block, texts, existing, start=0):
+    """
+    Blokun mövcud suallarını yeni mətn siyahısı ilə müqayisə edir.
+    Qaytarır: (to_create, to_update, to_delete_ids)
+
+    Sıra açarları exam üzrədir (ExamQuestion.order_scope = ("exam",)):
+    blokun i-ci sualı start + i * ORDER_GAP alır.
+
+    Uyğunlaşdırma ardıcıllığı:
+    1) eyni fingerprint + eyni sıra -> dəyişmir
+    2) eyni fingerprint, fərqli sıra -> order yenilənir
+       (1-2: fingerprint hərf/boşluq fərqini saymır, ona görə mətn də
+       müqayisə olunur; fərqlidirsə text də yazılır)
+    3) qalanlar sıra ilə cütlənir -> mətn redaktəsi kimi yenilənir
+       (sual id-si qalır -> ExamAnswer-lər silinmir)
+    4) artıq qalan yenilər -> create, artıq qalan köhnələr -> delete
+    """
+    wanted = [(start + i * ORDER_GAP, text, question_fingerprint(text)) for i, text in enumerate(texts, start=1)]
+
+    # saxlanmış fingerprint köhnə ola bilər (text başqa yolla dəyişib) -> text-dən
+    for eq in existing:
+        fp = question_fingerprint(eq.text)
+        if eq.fingerprint != fp:
+            eq.fingerprint = fp
+            eq._fp_dirty = True
+
+    to_update = {}
+    free = list(existing)
+    pending = []
+
+    # 1) fingerprint + order
+    by_key = {(eq.fingerprint, eq.order): eq for eq in free}
+    for order, text, fp in wanted:
+        eq = by_key.pop((fp, order), None)
+        if eq is None:
+            pending.append((order, text, fp))
+            continue
+        free.remove(eq)
+        if eq.text != text:
+            eq.text = text
+            to_update[eq.id] = eq
+        elif getattr(eq, "_fp_dirty", False):
+            to_update[eq.id] = eq
+
+    # 2) fingerprint (sıra dəyişib)
+    by_fp = defaultdict(list)
+    for eq in free:
+        by_fp[eq.fingerprint].append(eq)
+    rest = []
+    for order, text, fp in pending:
+        if by_fp.get(fp):
+            eq = by_fp[fp].pop(0)
+            free.remove(eq)
+            eq.text = text
+            eq.order = order
+            to_update[eq.id] = eq
+        else:
+            rest.append((order, text, fp))
+
+    # 3) sıra ilə cütlə (mətn dəyişib)
+    free.sort(key=lambda q: (q.order, q.id))
+    to_create = []
+    for (order, text, fp), eq in zip(rest, free):
+        eq.text = text
+        eq.order = order
+        eq.fingerprint = fp
+        to_update[eq.id] = eq
+
+    # 4) artıq qalanlar
+    for order, text, fp in rest[len(free):]:
+        to_create.append(ExamQuestion(
+            exam=exam,
+            block=block,
+            text=text,
+            order=order,
+            answer_mode="single",
+            fingerprint=fp,
+        ))
+    to_delete_ids = [eq.id for eq in free[len(rest):]]
+
+    return to_create, list(to_update.values()), to_delete_ids
+
+
+def process_question_bank(request, slug):
+    exam = get_object_or_404(Exam, slug=slug)
+
+    if request.method != "POST":
+        return redirect('create_question_bank', slug=exam.slug)
 
-    # təhlükəsizlik: böyük fayl limiti (məs: 5MB)
-    if uploaded_file.size > 5 * 1024 * 1024:
-        raise ValueError("Fayl çox böyükdür (max 5MB).")
+    # Frontend-dən vergüllə ayrılmış ID-lər gələcək (məs: "5,8,12")
+    deleted_ids = {
+        int(d_id) for d_id in request.POST.get('deleted_block_ids', '').split(',')
+        if d_id.strip().isdigit()
+    }
 
-    if ext == ".txt":
-        return uploaded_file.read().decode("utf-8", errors="ignore")
+    # Mövcud bloklar bir dəfə oxunur (validation yaddaşda aparılır)
+    existing_blocks = {
+        b.id: b for b in QuestionBlock.objects.filter(exam=exam).exclude(id__in=deleted_ids)
+    }
 
-    if ext == ".docx":
-        # docx.Document file-like də qəbul edir
-        doc = Document(uploaded_file)
-        lines = []
-        for p in doc.paragraphs:
-            t = (p.text or "").strip()
-            if t:
-                lines.append(t)
-        return "\n".join(lines)
+    # 1. POST-dan blokları topla + validation (bazaya heç nə yazmadan)
+    entries = []
+    used_names = set()
+    for key, value in request.POST.items():
+        if not key.startswith('block_name_'):
+            continue
 
-    if ext == ".pdf":
-        if PdfReader is None:
-            raise ValueError("PDF oxuma üçün 'pypdf' quraşdırılmayıb. `pip install pypdf` edin.")
+        ui_id = key.split('_')[-1]
+        block_name = value.strip()
+        if not block_name:
+            continue
 
-        reader = PdfReader(uploaded_file)
-        parts = []
-        for page in reader.pages:
-            txt = page.extract_text() or ""
-            txt = txt.strip()
-            if txt:
-                parts.append(txt)
+        # Validation: Eyni sorğuda dublikat ad varmı?
+        if block_name.lower() in used_names:
+            messages.error(request, f"Diqqət: '{block_name}' adlı blok artıq mövcuddur. Zəhmət olmasa fərqli adlardan istifadə edin.")
+            return redirect('create_question_bank', slug=exam.slug)
+        used_names.add(block_name.lower())
+
+        time_val = request.POST.get(f'block_time_{ui_id}')
+        db_id = (request.POST.get(f'block_db_id_{ui_id}') or '').strip()
+
+        block = None
+        if db_id:
+            # Bazada yoxlayırıq ki, silinməyibsə (concurrency üçün)
+            block = existing_blocks.get(int(db_id)) if db_id.isdigit() else None
+            if block is None:
+                continue  # Blok tapılmadısa keçirik
+
+        entries.append({
+            "ui_id": ui_id,
+            "name": block_name,
+            "time_limit": int(time_val) if time_val else None,
+            "block": block,
+            "texts": _split_bank_questions(request.POST.get(f'block_content_{ui_id}', '')),
+        })
 
-        raw = "\n\n".join(parts)
+    # Validation: Bazada başqa blok eyni adda varmı? (formda olmayan bloklar)
+    in_form_ids = {e["block"].id for e in entries if e["block"] is not None}
+    for b in existing_blocks.values():
+        if b.id not in in_form_ids and b.name.lower() in used_names:
+            messages.error(request, f"'{b.name}' adlı blok artıq bazada mövcuddur.")
+            return redirect('create_question_bank', slug=exam.slug)
 
-        # ✅ əsas fix burada
-        return normalize_pdf_extracted_text(raw)
+    with transaction.atomic():
+        # 2. Silinməli olan blokları silirik
+        if deleted_ids:
+            QuestionBlock.objects.filter(id__in=deleted_ids, exam=exam).delete()
+
+        # 3. Ümumi sual sayını yenilə
+        random_count = request.POST.get('random_question_count')
+        if random_count:
+            exam.random_question_count = int(random_count)
+            exam.save(update_fields=["random_question_count"])
+
+        # 4. Bloklar: dəyişənləri yenilə, yeniləri bir dəfəyə yarat
+        changed_blocks = []
+        new_blocks = []
+        new_order = None
+        for e in entries:
+            block = e["block"]
+            if block is None:
+                new_order = QuestionBlock.next_order(exam=exam) if new_order is None else new_order + ORDER_GAP
+                block = QuestionBlock(
+                    exam=exam,
+                    name=e["name"],
+                    time_limit_minutes=e["time_limit"],
+                    order=new_order,
+                )
+                new_blocks.append(block)
+                e["block"] = block
+            elif block.name != e["name"] or block.time_limit_minutes != e["time_limit"]:
+                block.name = e["name"]
+                block.time_limit_minutes = e["time_limit"]
+                changed_blocks.append(block)
+
+        if changed_blocks:
+            QuestionBlock.objects.bulk_update(changed_blocks, ["name", "time_limit_minutes"])
+        if new_blocks:
+            QuestionBlock.objects.bulk_create(new_blocks)
+
+        # 5. Suallar: diff (bir query ilə oxu, bulk yaz)
+        questions_by_block = defaultdict(list)
+        if in_form_ids:
+            for eq in ExamQuestion.objects.filter(exam=exam, block_id__in=in_form_ids).order_by("order", "id"):
+                questions_by_block[eq.block_id].append(eq)
+
+        # Bloklar formdakı ardıcıllıqla exam üzrə bir-birinin ardınca düzülür,
+        # formda olmayan (bloksuz / ayrıca əlavə olunmuş) suallardan sonra
+        start = (
+            ExamQuestion.objects.filter(exam=exam)
+            .exclude(block_id__in=in_form_ids)
+            .aggregate(m=Max("order"))["m"]
+        ) or 0
+
+        to_create, to_update, to_delete_ids = [], [], []
+        for e in entries:
+            block = e["block"]
+            c, u, d = _diff_block_questions(exam, block, e["texts"], questions_by_block.get(block.id, []), start)
+            to_create.extend(c)
+            to_update.extend(u)
+            to_delete_ids.extend(d)
+            start += len(e["texts"]) * ORDER_GAP
+
+        if to_delete_ids:
+            ExamQuestion.objects.filter(id__in=to_delete_ids).delete()
+        if to_update:
+            ExamQuestion.objects.bulk_update(to_update, ["text", "order", "fingerprint"], batch_size=500)
+        if to_create:
+            ExamQuestion.objects.bulk_create(to_create, batch_size=500)
+
+    messages.success(request, "Sual bankı uğurla yadda saxlanıldı!")
+    return redirect('teacher_exam_detail', slug=exam.slug)
 
 
-    raise ValueError("Yalnız .docx, .pdf, .txt qəbul olunur.")
+def extract_text_from_upload(uploaded_file) -> str:
+    """
+    .docx / .pdf / .txt -> mətn.
+    Ağır iş blog/extractors.py-dadır (paralel PDF, stream DOCX, hash cache).
+    """
+    return extract_upload_text(uploaded_file)
 
 
 def parse_bulk_mcq(raw_text: str):
@@ -1303,6 +1373,26 @@ def parse_bulk_mcq(raw_text: str):
 
 
 
+# Preview -> Save arası parse nəticəsi server-də saxlanır (token formda gedib-gəlir)
+BANK_PREVIEW_CACHE_SECONDS = 30 * 60
+
+
+def _exam_bank_version(exam) -> str:
+    """
+    Exam-in sual bankının ucuz "versiyası": sual sayı + max id.
+    Sual əlavə/silinəndə dəyişir -> köhnə preview cache-i avtomatik keçərsiz olur.
+    """
+    agg = ExamQuestion.objects.filter(exam=exam).aggregate(n=Count("id"), m=Max("id"))
+    return f"{agg.get('n') or 0}.{agg.get('m') or 0}"
+
+
+def _bank_preview_token(exam, raw_text: str, version: str) -> str:
+    h = hashlib.sha256()
+    h.update(f"{exam.id}:{version}:".encode("utf-8"))
+    h.update((raw_text or "").encode("utf-8"))
+    return h.hexdigest()
+
+
 def test_question_bank(request, slug):
     exam = get_object_or_404(Exam, slug=slug)
 
@@ -1384,8 +1474,28 @@ def test_question_bank(request, slug):
             # burada fallback: textarea-dakı raw_text qalsın
             messages.error(request, f"Fayl oxunmadı: {e}")
 
-    # 3) preview/save üçün parse et
-    if action in ("preview", "save"):
+    preview_token = ""
+
+    # 3) SAVE: preview-də parse olunmuş nəticə cache-dədirsə, yenidən parse etmirik.
+    # Duplicate yoxlamaları yalnız göstərmək üçündür -> save-də lazım deyil.
+    if action == "save":
+        version = _exam_bank_version(exam)
+        token = _bank_preview_token(exam, raw_text, version)
+        cached = None
+        if (request.POST.get("preview_token") or "").strip() == token:
+            cached = cache.get(f"bank_preview:{exam.id}:{token}")
+        parsed = cached if cached is not None else (parse_bulk_mcq(raw_text) or [])
+
+        # ---- Seçilən suallar (yalnız mövcud index-lər) ----
+        selected_list = request.POST.getlist("selected")
+        if selected_list:
+            selected = set(int(x) for x in selected_list if x.isdigit())
+        else:
+            selected = set(range(1, len(parsed) + 1))
+        selected &= set(range(1, len(parsed) + 1))
+
+    # 3b) PREVIEW: parse + duplicate yoxlamaları
+    if action == "preview":
         parsed = parse_bulk_mcq(raw_text) or []
 
         # təhlükəsizlik: warnings açarı hər sualda olsun
@@ -1433,6 +1543,11 @@ def test_question_bank(request, slug):
             if w.get("type") in ("duplicate_in_import", "already_in_exam")
         )
 
+        # ---- parse nəticəsini save üçün saxla ----
+        version = _exam_bank_version(exam)
+        preview_token = _bank_preview_token(exam, raw_text, version)
+        cache.set(f"bank_preview:{exam.id}:{preview_token}", parsed, BANK_PREVIEW_CACHE_SECONDS)
+
     # 4) SAVE
     if action == "save":
         # ---- Exam settings: random_question_count + default_points(+ optional default_question_points) ----
@@ -1466,17 +1581,16 @@ def test_question_bank(request, slug):
         block_obj = None
 
         if new_block_name:
-            max_order = blocks.aggregate(m=Max("order")).get("m") or 0
             block_obj = QuestionBlock.objects.create(
                 exam=exam,
                 name=new_block_name,
-                order=max_order + 1
+                order=QuestionBlock.next_order(exam=exam)
             )
         elif block_id:
             block_obj = QuestionBlock.objects.filter(id=block_id, exam=exam).first()
 
         # ---- order başlanğıcı ----
-        start_order = (ExamQuestion.objects.filter(exam=exam).aggregate(m=Max("order")).get("m") or 0) + 1
+        start_order = ExamQuestion.next_order(exam=exam)
 
         created_count = 0
         skipped_count = 0
@@ -1502,7 +1616,7 @@ def test_question_bank(request, slug):
                 order=start_order,
                 points=points,
             )
-            start_order += 1
+            start_order += ORDER_GAP
 
             # options create (A–E varsa)
             for lab in "ABCDE":
@@ -1531,6 +1645,7 @@ def test_question_bank(request, slug):
         # >>> YENİ: Preview refresh olsa da input-lar dolu qalsın
         "rq_value": rq_value,
         "dp_value": dp_value,
+        "preview_token": preview_token,
     })
 
 
@@ -1554,6 +1669,141 @@ def toggle_exam_active(request, slug):
 
 
 
+@login_required
+@require_POST
+def duplicate_exam(request, slug):
+    """
+    İmtahanın surətini yaradır (bloklar, suallar, variantlar ilə birlikdə).
+    Surət deaktiv yaranır, müəllim yoxlayıb aktiv edir.
+    """
+    _ensure_teacher(request.user)
+    exam = get_object_or_404(Exam, slug=slug, author=request.user)
+
+    new_exam = clone_exam(exam, author=request.user)
+
+    messages.success(request, "İmtahanın surəti yaradıldı.")
+    return redirect("teacher_exam_detail", slug=new_exam.slug)
+
+
+@login_required
+def exam_bundle_export(request, slug):
+    """
+    İmtahanı bundle faylı kimi yükləyir (başqa instansiyaya köçürmək üçün).
+    ?attempts=1 -> cəhdlər və cavablar da daxil olur.
+    """
+    _ensure_teacher(request.user)
+    exam = get_object_or_404(Exam, slug=slug, author=request.user)
+
+    include_attempts = request.GET.get("attempts") == "1"
+
+    # yaddaşda yox, müvəqqəti faylda yığılır (böyük banklar üçün)
+    tmp = tempfile.TemporaryFile()
+    export_exam_bundle(exam, tmp, include_attempts=include_attempts)
+    tmp.seek(0)
+
+    return FileResponse(tmp, as_attachment=True, filename=f"{exam.slug}.emsbundle")
+
+
+@login_required
+@require_POST
+def exam_bundle_import(request):
+    """
+    Bundle faylından yeni imtahan yaradır (deaktiv).
+    """
+    _ensure_teacher(request.user)
+
+    uploaded = request.FILES.get("bundle_file")
+    if not uploaded:
+        messages.error(request, "Bundle faylı seçilməyib.")
+        return redirect("teacher_exam_list")
+
+    try:
+        exam = import_exam_bundle(uploaded, author=request.user)
+    except BundleError as e:
+        messages.error(request, f"Bundle oxunmadı: {e}")
+        return redirect("teacher_exam_list")
+
+    messages.success(request, "İmtahan bundle-dan uğurla import olundu.")
+    return redirect("teacher_exam_detail", slug=exam.slug)
+
+
+def _build_print_variants(exam, count: int, seed: str):
+    """
+    Çap variantları üçün payload-lar + cavab açarı.
+    Suallar bir dəfə oxunur; hər variant üçün seçim və variant qarışdırılması
+    attempt-dəki məntiqlə, amma `seed`-dən törənən sabit random ilə edilir.
+    """
+    all_qs = list(exam.questions.prefetch_related("options").order_by("order", "id"))
+    by_id = {q.id: q for q in all_qs}
+    blocks = list(exam.question_blocks.prefetch_related("questions"))
+    total_needed = _effective_needed_count(exam)
+
+    payloads, keys = [], []
+    for no in range(1, count + 1):
+        rnd = random.Random(f"{exam.id}:{seed}:{no}")
+        picked = _pick_random_questions(all_qs, list(blocks), total_needed, rnd=rnd)
+
+        questions, answers = [], []
+        for q in picked:
+            q = by_id[q.id]
+            correct = {o.id for o in q.options.all() if o.is_correct}
+            opts = build_shuffled_options(f"print-{seed}-{no}", q)
+
+            image_path = None
+            if q.image:
+                try:
+                    image_path = q.image.path
+                except NotImplementedError:
+                    image_path = None
+
+            questions.append({
+                "text": q.text,
+                "image_path": image_path,
+                "points": q.points,
+                "multi": q.answer_mode == "multiple",
+                "options": [{"label": o["label"], "text": o["text"]} for o in opts],
+            })
+            if opts:
+                answers.append(",".join(o["label"] for o in opts if o["id"] in correct) or "—")
+            else:
+                answers.append((q.correct_answer or "").strip() or "—")
+
+        payloads.append({"exam_title": exam.title, "variant_no": no, "questions": questions})
+        keys.append({"variant_no": no, "answers": answers})
+
+    return payloads, keys
+
+
+@login_required
+def exam_print_variants(request, slug):
+    """
+    Kağız imtahan üçün N random variant (DOCX) + cavab açarı, ZIP kimi.
+    ?count=N (1..VARIANTS_MAX), ?seed=... eyni seed -> eyni variantlar.
+    """
+    _ensure_teacher(request.user)
+    exam = get_object_or_404(Exam, slug=slug, author=request.user)
+
+    try:
+        count = int(request.GET.get("count") or 10)
+    except ValueError:
+        count = 10
+    count = max(1, min(count, VARIANTS_MAX))
+    seed = slugify(request.GET.get("seed") or "")[:32] or secrets.token_hex(4)
+
+    if not exam.questions.exists():
+        messages.error(request, "Bu imtahanda sual yoxdur.")
+        return redirect("teacher_exam_detail", slug=exam.slug)
+
+    payloads, keys = _build_print_variants(exam, count, seed)
+
+    response = StreamingHttpResponse(
+        stream_variants_zip(exam.title, payloads, keys),
+        content_type="application/zip",
+    )
+    response["Content-Disposition"] = f'attachment; filename="{exam.slug}-variantlar-{seed}.zip"'
+    return response
+
+
 @login_required
 def delete_exam(request, slug):
     """
@@ -1648,6 +1898,52 @@ def delete_exam_question(request, slug, question_id):
     })
 
 
+def _move_position_from_request(request):
+    """
+    Drag-and-drop üçün: POST position (0-based) -> int, səhvdirsə None.
+    """
+    raw = (request.POST.get("position") or "").strip()
+    return int(raw) if raw.isdigit() else None
+
+
+@login_required
+@require_POST
+def move_exam_question(request, slug, question_id):
+    """
+    Sualı imtahan daxilində yeni mövqeyə köçürür (drag-and-drop).
+    Boşluqlu sıralama sayəsində adətən yalnız bu sualın sətri yenilənir.
+    """
+    _ensure_teacher(request.user)
+    exam = get_object_or_404(Exam, slug=slug, author=request.user)
+    question = get_object_or_404(ExamQuestion, id=question_id, exam=exam)
+
+    position = _move_position_from_request(request)
+    if position is None:
+        return JsonResponse({"ok": False, "message": "Mövqe düzgün deyil."}, status=400)
+
+    question.order = ExamQuestion.move_to_position(question.id, position, exam=exam)
+    # order açarı daxilidir: client 1-based mövqe alır
+    return JsonResponse({"ok": True, "id": question.id, "order": question.order_position()})
+
+
+@login_required
+@require_POST
+def move_question_block(request, slug, block_id):
+    """
+    Sual blokunu imtahan daxilində yeni mövqeyə köçürür (drag-and-drop).
+    """
+    _ensure_teacher(request.user)
+    exam = get_object_or_404(Exam, slug=slug, author=request.user)
+    block = get_object_or_404(QuestionBlock, id=block_id, exam=exam)
+
+    position = _move_position_from_request(request)
+    if position is None:
+        return JsonResponse({"ok": False, "message": "Mövqe düzgün deyil."}, status=400)
+
+    block.order = QuestionBlock.move_to_position(block.id, position, exam=exam)
+    return JsonResponse({"ok": True, "id": block.id, "order": block.order_position()})
+
+
  
 
 
@@ -1963,47 +2259,24 @@ def exam_code_check(request):
 
 
 
-def generate_random_questions_for_attempt(attempt, *, force_rebuild: bool = False):
+def _pick_random_questions(all_qs, blocks, total_needed, rnd=random):
     """
-    Yeni attempt üçün sualları random seçir və ExamAnswer yaradır.
-    - default: 10 sual
-    - 0: hamısı (amma random order)
-    - blok varsa: bərabər pay + çatışmayanı digər suallardan doldurur
-    - refresh edəndə dəyişməsin deyə ExamAnswer-da sabitlənir
+    Attempt (və ya çap variantı) üçün sual seçimi.
+    - blok varsa: bloklardan paylanır, çatışmayan digər suallardan doldurulur
+    - `rnd` -> təkrarlana bilən seçim üçün random.Random(seed) verilə bilər
     """
-    exam = attempt.exam
-
-    # Əgər artıq suallar yaradılıbsa:
-    if attempt.answers.exists():
-        if not force_rebuild:
-            return
-        # force rebuild istənirsə, amma tələbə cavab yazıbsa toxunmuruq
-        if _attempt_has_any_answer(attempt):
-            return
-        attempt.answers.all().delete()
-
-    total_needed = _effective_needed_count(exam)
-
-    # bütün sualları al (DB hit az olsun)
-    all_qs = list(exam.questions.all())
-
-    if not all_qs:
-        return
-
     # Əgər tələb olunan say hamısından çoxdursa -> hamısını götür
     if total_needed >= len(all_qs):
         selected_qs = all_qs[:]
-        random.shuffle(selected_qs)  # “hamısı” olsa belə random sıra
+        rnd.shuffle(selected_qs)  # “hamısı” olsa belə random sıra
     else:
         selected_qs = []
-        blocks = list(exam.question_blocks.all())
-
         if blocks:
             blocks_count = len(blocks)
             base = total_needed // blocks_count
             rem = total_needed % blocks_count
 
-            random.shuffle(blocks)
+            rnd.shuffle(blocks)
 
             picked_ids = set()
 
@@ -2012,7 +2285,7 @@ def generate_random_questions_for_attempt(attempt, *, force_rebuild: bool = Fals
                 take = base + (1 if i < rem else 0)
 
                 block_qs = list(block.questions.all())
-                random.shuffle(block_qs)
+                rnd.shuffle(block_qs)
 
                 for q in block_qs:
                     if len(selected_qs) >= total_needed:
@@ -2031,16 +2304,49 @@ def generate_random_questions_for_attempt(attempt, *, force_rebuild: bool = Fals
             # çatmayanı digər suallardan doldur
             if len(selected_qs) < total_needed:
                 remaining = [q for q in all_qs if q.id not in picked_ids]
-                random.shuffle(remaining)
+                rnd.shuffle(remaining)
                 selected_qs.extend(remaining[: (total_needed - len(selected_qs))])
 
             # son dəfə də ümumi sıranı qarışdır (blok “izləri” qalmasın)
-            random.shuffle(selected_qs)
+            rnd.shuffle(selected_qs)
 
         else:
             # blok yoxdursa — ümumi pool-dan random seç
-            random.shuffle(all_qs)
-            selected_qs = all_qs[:total_needed]
+            pool = all_qs[:]
+            rnd.shuffle(pool)
+            selected_qs = pool[:total_needed]
+
+    return selected_qs
+
+
+def generate_random_questions_for_attempt(attempt, *, force_rebuild: bool = False):
+    """
+    Yeni attempt üçün sualları random seçir və ExamAnswer yaradır.
+    - default: 10 sual
+    - 0: hamısı (amma random order)
+    - blok varsa: bərabər pay + çatışmayanı digər suallardan doldurur
+    - refresh edəndə dəyişməsin deyə ExamAnswer-da sabitlənir
+    """
+    exam = attempt.exam
+
+    # Əgər artıq suallar yaradılıbsa:
+    if attempt.answers.exists():
+        if not force_rebuild:
+            return
+        # force rebuild istənirsə, amma tələbə cavab yazıbsa toxunmuruq
+        if _attempt_has_any_answer(attempt):
+            return
+        attempt.answers.all().delete()
+
+    total_needed = _effective_needed_count(exam)
+
+    # bütün sualları al (DB hit az olsun)
+    all_qs = list(exam.questions.all())
+
+    if not all_qs:
+        return
+
+    selected_qs = _pick_random_questions(all_qs, list(exam.question_blocks.all()), total_needed)
 
     # ExamAnswer-ları bulk yarat
     ExamAnswer.objects.bulk_create(
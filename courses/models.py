@@ -24,6 +24,8 @@ from django.utils.text import slugify
 from django.utils.crypto import get_random_string
 import itertools
 
+from blog.ordering import GapOrderedMixin
+
 
 # ════════════════════════════════════════════════════════════════════════════
 # 1. COURSE MODEL
@@ -243,7 +245,7 @@ class CourseMembership(models.Model):
 # 3. COURSE TOPIC MODEL (Mövzu/Həftə)
 # ════════════════════════════════════════════════════════════════════════════
 
-class CourseTopic(models.Model):
+class CourseTopic(GapOrderedMixin, models.Model):
     """
     Kurs Mövzusu (Həftə, Bölmə, Unit, və s.).
     
@@ -255,7 +257,7 @@ class CourseTopic(models.Model):
     - course: Hansı kursa aiddir
     - title: Mövzu adı (məs: "Həftə 1: Giriş")
     - description: Mövzu təsviri
-    - order: Sıra nömrəsi (1, 2, 3, ...)
+    - order: Sıra açarı (boşluqlu: 1024, 2048, ... -> bax blog/ordering.py)
     - created_at: Yaradılma tarixi
     
     Misal:
@@ -265,6 +267,8 @@ class CourseTopic(models.Model):
     Related:
     - resources: topic.resources.all() → Bu mövzuya aid resurslar
     """
+
+    order_scope = ('course',)
     
     course = models.ForeignKey(
         Course,
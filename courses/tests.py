@@ -1,3 +1,45 @@
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from blog.ordering import ORDER_GAP
+from .models import Course, CourseTopic
+
+
+class TopicOrderingTests(TestCase):
+    """CourseTopic: (course, order) unique-dir, sıralama boşluqlu açarlarla."""
+
+    def setUp(self):
+        self.owner = User.objects.create_user(username="teacher", password="p")
+        self.course = Course.objects.create(owner=self.owner, title="Python", slug="python")
+        self.topics = [
+            CourseTopic.objects.create(course=self.course, title=f"t{i}", order=CourseTopic.next_order(course=self.course))
+            for i in range(3)
+        ]
+
+    def titles(self):
+        return list(CourseTopic.ordered_in_scope(course=self.course).values_list("title", flat=True))
+
+    def test_rebalance_keeps_unique_constraint(self):
+        # sıx açarlar (köhnə 1, 2, 3 sırası kimi): boşluq yoxdur -> rebalance
+        for i, topic in enumerate(self.topics, start=1):
+            CourseTopic.objects.filter(id=topic.id).update(order=i)
+
+        CourseTopic.move_to_position(self.topics[2].id, 1, course=self.course)
+
+        self.assertEqual(self.titles(), ["t0", "t2", "t1"])
+        orders = list(CourseTopic.ordered_in_scope(course=self.course).values_list("order", flat=True))
+        self.assertEqual(orders[0], ORDER_GAP)
+        self.assertEqual(len(set(orders)), 3)
+
+    def test_move_topic_view(self):
+        self.client.force_login(self.owner)
+        url = reverse("courses:move_topic", args=[self.course.id, self.topics[0].id])
+
+        response = self.client.post(url, {"position": "2"})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["success"])
+        self.assertEqual(response.json()["order"], 3)  # açar yox, 1-based mövqe
+        self.assertEqual(self.titles(), ["t1", "t2", "t0"])
+
+        self.assertEqual(self.client.post(url, {"position": "-1"}).status_code, 400)
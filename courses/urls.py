@@ -67,6 +67,14 @@ urlpatterns = [
         name='add_topic'
     ),
     
+    # POST /courses/<id>/topic/<topic_id>/move/ (AJAX, drag-and-drop)
+    # Mövzunun sırasını dəyişmə
+    path(
+        '<int:course_id>/topic/<int:topic_id>/move/',
+        views.MoveTopicView.as_view(),
+        name='move_topic'
+    ),
+    
     # POST /courses/<id>/topic/<topic_id>/delete/ (AJAX)
     # Mövzu silmə
     path(
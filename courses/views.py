@@ -258,11 +258,7 @@ class AddTopicView(IsCourseOwnerMixin, CreateView):
         #     course=self.course
         # ).aggregate(models.Max('order'))['order__max'] or 0
         
-        max_order = CourseTopic.objects.filter(
-            course=self.course).aggregate(Max('order'))['order__max'] or 0
-
-        
-        form.instance.order = max_order + 1
+        form.instance.order = CourseTopic.next_order(course=self.course)
         
         response = super().form_valid(form)
         
@@ -274,7 +270,7 @@ class AddTopicView(IsCourseOwnerMixin, CreateView):
                 'topic': {
                     'id': form.instance.id,
                     'title': form.instance.title,
-                    'order': form.instance.order,
+                    'order': form.instance.order_position(),
                 },
             })
         
@@ -303,6 +299,34 @@ class AddTopicView(IsCourseOwnerMixin, CreateView):
         return reverse_lazy('courses:course_dashboard', args=[self.course.id])
 
 
+# ════════════════════════════════════════════════════════════════════════════
+# VIEW 3b: Mövzu Sırasını Dəyişmə (AJAX, drag-and-drop)
+# ════════════════════════════════════════════════════════════════════════════
+
+class MoveTopicView(IsCourseOwnerMixin, View):
+    """
+    Mövzunu kurs daxilində yeni mövqeyə köçürür.
+    
+    Flow:
+    1. POST /courses/<id>/topic/<topic_id>/move/  (position=0-based)
+    2. Boşluqlu sıralama: adətən yalnız bu mövzunun sətri yenilənir
+    3. JSON response
+    """
+    
+    def post(self, request, *args, **kwargs):
+        """POST: Mövzunu köçür."""
+        course = get_object_or_404(Course, id=kwargs.get('course_id'))
+        topic = get_object_or_404(CourseTopic, id=kwargs.get('topic_id'), course=course)
+        
+        raw = (request.POST.get('position') or '').strip()
+        if not raw.isdigit():
+            return JsonResponse({'success': False, 'message': 'Mövqe düzgün deyil.'}, status=400)
+        
+        topic.order = CourseTopic.move_to_position(topic.id, int(raw), course=course)
+        # order açarı daxilidir: client 1-based mövqe alır
+        return JsonResponse({'success': True, 'id': topic.id, 'order': topic.order_position()})
+
+
 # ════════════════════════════════════════════════════════════════════════════
 # VIEW 4: Mövzu Silmə (AJAX)
 # ════════════════════════════════════════════════════════════════════════════
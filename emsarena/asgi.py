@@ -11,17 +11,22 @@ from django.core.asgi import get_asgi_application
 from channels.routing import ProtocolTypeRouter, URLRouter
 from channels.auth import AuthMiddlewareStack
 
-import liveExam.routing
-
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "emsarena.settings")
 
 django_asgi_app = get_asgi_application()
 
-application = ProtocolTypeRouter(
-    {
-        "http": django_asgi_app,
-        "websocket": AuthMiddlewareStack(
-            URLRouter(liveExam.routing.websocket_urlpatterns)
-        ),
-    }
+# app modulları (models) yalnız django.setup()-dan sonra import oluna bilər
+import liveExam.routing  # noqa: E402
+from liveExam.sharding import ShardAffinityMiddleware  # noqa: E402
+
+# PIN sharding: başqa worker-in sessiyası bu prosesdə emal olunmur (bax liveExam/sharding.py)
+application = ShardAffinityMiddleware(
+    ProtocolTypeRouter(
+        {
+            "http": django_asgi_app,
+            "websocket": AuthMiddlewareStack(
+                URLRouter(liveExam.routing.websocket_urlpatterns)
+            ),
+        }
+    )
 )
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 import ssl
 import os
+import importlib.util
 from dotenv import load_dotenv
 import dj_database_url
 
@@ -94,14 +95,43 @@ WSGI_APPLICATION = "emsarena.wsgi.application"
 
 ASGI_APPLICATION = "emsarena.asgi.application"  # core = sənin project adı
 
-CHANNEL_LAYERS = {
-    "default": {
-        "BACKEND": "channels_redis.core.RedisChannelLayer",
-        "CONFIG": {
-            "hosts": [("127.0.0.1", 6379)],
+# Default: daxili Unix socket layer (tək maşın, bir neçə worker, Redis lazım deyil).
+# Bir neçə maşın üçün CHANNEL_REDIS_URL ver (channels_redis ayrıca qurulmalıdır).
+# Unix socket + fcntl olmayan platformada (Windows dev) InMemory: yalnız bir proses.
+CHANNEL_REDIS_URL = os.getenv("CHANNEL_REDIS_URL", "")
+
+if CHANNEL_REDIS_URL:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels_redis.core.RedisChannelLayer",
+            "CONFIG": {
+                "hosts": [CHANNEL_REDIS_URL],
+            },
         },
-    },
-}
+    }
+elif importlib.util.find_spec("fcntl") is not None:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "liveExam.channel_layer.UnixSocketChannelLayer",
+            "CONFIG": {
+                "path": os.getenv("CHANNEL_SOCKET_PATH", "") or None,
+            },
+        },
+    }
+else:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels.layers.InMemoryChannelLayer",
+        },
+    }
+
+
+# PIN sharding (liveExam/sharding.py): "w1=127.0.0.1:8001,w2=127.0.0.1:8002"
+# Hər worker öz adını LIVE_SHARD-da alır; front door: manage.py live_frontdoor
+LIVE_SHARDS = dict(
+    item.strip().split("=", 1) for item in os.getenv("LIVE_SHARDS", "").split(",") if "=" in item
+)
+LIVE_SHARD = os.getenv("LIVE_SHARD", "")
 
 
 # Database
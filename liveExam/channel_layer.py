@@ -0,0 +1,575 @@
+# liveExam/channel_layer.py
+"""
+Tək maşın, çox proses üçün daxili channel layer (Redis lazım deyil).
+
+Sinif serverlərində Redis yoxdur, InMemoryChannelLayer isə yalnız bir proses
+daxilində işləyir (2 daphne worker = 2 ayrı "dünya"). Bu layer proseslər
+arasında kiçik bir broker vasitəsilə işləyir: Unix domain socket üzərindən
+uzunluq-prefiksli msgpack frame-lər.
+
+Broker:
+- ilk qoşulmaq istəyən worker `<path>.lock` faylını (flock) tutub broker-i öz
+  içində arxa plan thread-ində işə salır; o proses ölsə lock azad olur və
+  növbəti reconnect edən worker broker-i öz üzərinə götürür
+- və ya ayrıca: `manage.py live_channel_broker` (eyni lock-u tutur)
+
+Group fan-out batching: group_send broker-ə BİR frame kimi gedir, broker
+üzvləri prosesə görə qruplaşdırır və hər prosesə (mesaj + kanal siyahısı)
+olan BİR frame göndərir - 300 oyunçulu qrup = worker başına 1 frame, 300 yox.
+
+Məhdudiyyətlər:
+- yalnız POSIX (Unix socket + fcntl); Windows-da settings.py avtomatik
+  InMemoryChannelLayer seçir (bir proses), bir neçə maşında Redis
+- uzaq kanala send() ChannelFull qaytara bilmir: dolu növbədə mesaj atılır
+  (group_send-də olduğu kimi)
+- bir layer instansiyasında receive() bir event loop-dan çağırılmalıdır
+  (channels server-lərində belədir)
+
+Ölçmə: `manage.py live_channel_bench`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import string
+import struct
+import tempfile
+import threading
+import time
+import uuid
+import weakref
+from collections import defaultdict, deque
+from typing import Any, Deque, Dict, List, Optional, Set
+
+import msgpack
+from channels.exceptions import ChannelFull
+from channels.layers import BaseChannelLayer
+
+try:
+    import fcntl
+except ImportError:  # Windows: settings.py bu halda InMemoryChannelLayer seçir
+    fcntl = None
+
+
+DEFAULT_PATH = os.path.join(tempfile.gettempdir(), "emsarena-channels.sock")
+
+_HEADER = struct.Struct("!I")
+
+# client -> broker
+OP_REGISTER = "r"        # (routing_key)      bu bağlantı prefiks / named kanal üçün mesaj alır
+OP_SEND = "s"            # (channel, message)
+OP_GROUP_ADD = "ga"      # (group, channel)
+OP_GROUP_DISCARD = "gd"  # (group, channel)
+OP_GROUP_SEND = "gs"     # (group, message)
+OP_FLUSH = "f"
+# broker -> client
+OP_DELIVER = "d"         # (message, [channel, ...])
+
+# broker: yavaş client-in yazılmamış buferi bundan böyükdürsə frame atılır
+MAX_PEER_BUFFER = 16 * 1024 * 1024
+# bağlantısı olmayan named kanal üçün broker-də gözləyən mesaj limiti
+MAX_PARKED = 1000
+
+
+# açıla bilməyən / formasız frame (bağlantının qalanı sağlamdır)
+_BAD_FRAME = (ValueError, TypeError, IndexError, msgpack.UnpackException)
+
+
+def _pack(obj) -> bytes:
+    return msgpack.packb(obj, use_bin_type=True)
+
+
+def _unpack(data: bytes):
+    # int açarlı dict-lər (consumer event-lərində ola bilər) InMemory layer-dəki kimi keçsin
+    return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+
+def _frame(*parts) -> bytes:
+    data = _pack(parts)
+    return _HEADER.pack(len(data)) + data
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> Optional[list]:
+    """
+    Növbəti frame: [op, *args]. Uzunluq prefiksi ilə oxunduğu üçün açıla
+    bilməyən frame yalnız özü atılır (None), stream sinxron qalır.
+    """
+    header = await reader.readexactly(_HEADER.size)
+    (size,) = _HEADER.unpack(header)
+    data = await reader.readexactly(size)
+    try:
+        frame = _unpack(data)
+    except _BAD_FRAME:
+        return None
+    if not isinstance(frame, list) or not frame:
+        return None
+    return frame
+
+
+def _routing_key(channel: str) -> str:
+    """specific.abc!xyz -> specific.abc!  (named kanal -> özü)"""
+    if "!" in channel:
+        return channel[: channel.find("!") + 1]
+    return channel
+
+
+# ------------------------
+# Broker
+# ------------------------
+
+class _Peer:
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.keys: Set[str] = set()
+
+    def write(self, frame: bytes) -> None:
+        transport = self.writer.transport
+        if transport.is_closing() or transport.get_write_buffer_size() > MAX_PEER_BUFFER:
+            return
+        self.writer.write(frame)
+
+
+class Broker:
+    """Bütün proseslərin group üzvlüyü və routing cədvəli (tək event loop-da)."""
+
+    def __init__(self, path: str = DEFAULT_PATH, group_expiry: int = 86400):
+        self.path = path
+        self.group_expiry = group_expiry
+        self.routes: Dict[str, List[_Peer]] = {}
+        self.groups: Dict[str, Dict[str, float]] = {}
+        self.parked: Dict[str, Deque[Any]] = defaultdict(lambda: deque(maxlen=MAX_PARKED))
+        self.server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        # köhnə (ölmüş broker-dən qalan) socket faylı - lock bizdədir, silmək təhlükəsizdir
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        self.server = await asyncio.start_unix_server(self._serve, path=self.path)
+        os.chmod(self.path, 0o600)
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        peer = _Peer(writer)
+        try:
+            while True:
+                frame = await _read_frame(reader)
+                if frame is None:
+                    continue
+                try:
+                    self._handle(peer, frame[0], frame[1:])
+                except _BAD_FRAME:
+                    # səhv arqumentli bir frame: yalnız o atılır, prosesin route/group-ları qalır
+                    continue
+        except (asyncio.IncompleteReadError, ConnectionError, OSError):
+            pass
+        finally:
+            self._drop_peer(peer)
+            writer.close()
+
+    def _handle(self, peer: _Peer, op: str, args: list) -> None:
+        if op == OP_GROUP_SEND:
+            self.group_send(*args)
+        elif op == OP_SEND:
+            self.deliver(args[0], args[1])
+        elif op == OP_GROUP_ADD:
+            self.groups.setdefault(args[0], {})[args[1]] = time.time()
+        elif op == OP_GROUP_DISCARD:
+            self._group_discard(*args)
+        elif op == OP_REGISTER:
+            self._register(peer, args[0])
+        elif op == OP_FLUSH:
+            self.groups.clear()
+            self.parked.clear()
+
+    def _register(self, peer: _Peer, key: str) -> None:
+        peer.keys.add(key)
+        peers = self.routes.setdefault(key, [])
+        if peer not in peers:
+            peers.append(peer)
+        parked = self.parked.pop(key, None)
+        if parked:
+            for message in parked:
+                peer.write(_frame(OP_DELIVER, message, [key]))
+
+    def _drop_peer(self, peer: _Peer) -> None:
+        for key in peer.keys:
+            peers = self.routes.get(key)
+            if peers and peer in peers:
+                peers.remove(peer)
+                if not peers:
+                    self.routes.pop(key, None)
+            # prosesin kanalları bütün qruplardan çıxır
+            if key.endswith("!"):
+                for group, members in list(self.groups.items()):
+                    for channel in [c for c in members if c.startswith(key)]:
+                        members.pop(channel, None)
+                    if not members:
+                        self.groups.pop(group, None)
+
+    def _group_discard(self, group: str, channel: str) -> None:
+        members = self.groups.get(group)
+        if members:
+            members.pop(channel, None)
+            if not members:
+                self.groups.pop(group, None)
+
+    def _peer_for(self, key: str) -> Optional[_Peer]:
+        peers = self.routes.get(key)
+        if not peers:
+            return None
+        if len(peers) > 1:
+            # named kanal bir neçə worker-də dinlənir -> round robin
+            peers.append(peers.pop(0))
+        return peers[-1]
+
+    def deliver(self, channel: str, message: Any) -> None:
+        key = _routing_key(channel)
+        peer = self._peer_for(key)
+        if peer is not None:
+            peer.write(_frame(OP_DELIVER, message, [channel]))
+        elif "!" not in channel:
+            self.parked[key].append(message)
+
+    def group_send(self, group: str, message: Any) -> None:
+        members = self.groups.get(group)
+        if not members:
+            return
+        expired_before = time.time() - self.group_expiry
+        batches: Dict[_Peer, List[str]] = {}
+        for channel, joined in list(members.items()):
+            if joined < expired_before:
+                members.pop(channel, None)
+                continue
+            peer = self._peer_for(_routing_key(channel))
+            if peer is not None:
+                batches.setdefault(peer, []).append(channel)
+        # mesaj hər proses üçün bir dəfə serialize olunur
+        for peer, channels in batches.items():
+            peer.write(_frame(OP_DELIVER, message, channels))
+
+
+_EMBEDDED: Dict[str, threading.Thread] = {}
+_EMBEDDED_LOCK = threading.Lock()
+
+
+def acquire_broker_lock(path: str) -> Optional[int]:
+    """Broker olmaq hüququ (prosesin ömrü boyu saxlanılır). Başqası tutubsa None."""
+    if fcntl is None:
+        raise RuntimeError("UnixSocketChannelLayer requires a POSIX platform (fcntl); use InMemory or Redis layer.")
+    fd = os.open(f"{path}.lock", os.O_CREAT | os.O_RDWR, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return None
+    return fd
+
+
+def start_embedded_broker(path: str, group_expiry: int = 86400) -> bool:
+    """
+    Bu prosesdə broker-i arxa plan thread-ində işə salır (lock alınarsa).
+    Broker artıq bu prosesdədirsə və ya indi başladısa True.
+    """
+    with _EMBEDDED_LOCK:
+        thread = _EMBEDDED.get(path)
+        if thread is not None and thread.is_alive():
+            return True
+        fd = acquire_broker_lock(path)
+        if fd is None:
+            return False
+
+        ready = threading.Event()
+
+        def run() -> None:
+            loop = asyncio.new_event_loop()
+            broker = Broker(path, group_expiry=group_expiry)
+            try:
+                loop.run_until_complete(broker.start())
+            finally:
+                ready.set()
+            loop.run_forever()
+
+        thread = threading.Thread(target=run, name="live-channel-broker", daemon=True)
+        thread.start()
+        ready.wait(5)
+        _EMBEDDED[path] = thread
+        return True
+
+
+# ------------------------
+# Client (channel layer)
+# ------------------------
+
+class _Connection:
+    """
+    Bir event loop-un broker bağlantısı.
+
+    Reader task yalnız receive loop-unda olur: async_to_sync hər çağırışda yeni
+    (qısaömürlü) loop yaradır, o bağlantılar yalnız yazır və loop bağlananda
+    yarımçıq task qalmamalıdır.
+    """
+
+    def __init__(self, layer: "UnixSocketChannelLayer", reader, writer):
+        self.layer = layer
+        self.reader = reader
+        self.writer = writer
+        self.closed = False
+        self.loop = asyncio.get_running_loop()
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def usable(self) -> bool:
+        return not self.closed and not self.loop.is_closed() and not self.writer.transport.is_closing()
+
+    def start_reader(self) -> None:
+        if self.task is None:
+            self.task = self.loop.create_task(self._read_loop())
+
+    def write(self, *parts) -> None:
+        self.writer.write(_frame(*parts))
+
+    async def drain(self) -> None:
+        await self.writer.drain()
+
+    async def _read_loop(self) -> None:
+        try:
+            while True:
+                frame = await _read_frame(self.reader)
+                if frame is None or frame[0] != OP_DELIVER or len(frame) != 3:
+                    continue
+                self.layer._deliver(frame[1], frame[2])
+        except (asyncio.IncompleteReadError, ConnectionError, OSError):
+            pass
+        finally:
+            self.closed = True
+            if not self.loop.is_closed():
+                self.writer.close()
+                self.layer._connection_lost(self)
+
+    def close(self) -> None:
+        self.closed = True
+        if self.task is not None:
+            self.task.cancel()
+        if not self.loop.is_closed():
+            self.writer.close()
+
+
+class UnixSocketChannelLayer(BaseChannelLayer):
+    """
+    settings.py:
+        CHANNEL_LAYERS = {"default": {
+            "BACKEND": "liveExam.channel_layer.UnixSocketChannelLayer",
+            "CONFIG": {"path": "/run/emsarena/channels.sock"},
+        }}
+    CONFIG: path, embedded_broker (default True), expiry, group_expiry, capacity, channel_capacity.
+    """
+
+    extensions = ["groups", "flush"]
+
+    def __init__(self, path: Optional[str] = None, embedded_broker: bool = True,
+                 expiry: int = 60, group_expiry: int = 86400, capacity: int = 100,
+                 channel_capacity=None, **kwargs):
+        super().__init__(expiry=expiry, capacity=capacity, channel_capacity=channel_capacity, **kwargs)
+        self.path = path or DEFAULT_PATH
+        self.embedded_broker = embedded_broker
+        self.group_expiry = group_expiry
+        self.client_prefix = f"{uuid.uuid4().hex[:12]}"
+
+        self._connections: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _Connection]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._connect_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = (
+            weakref.WeakKeyDictionary()
+        )
+        # receive() tərəfi (bir loop): lokal növbələr + broker-də qeydiyyat
+        self._receive_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._registered: Set[str] = set()
+        # öz kanallarımızın üzvlükləri - broker dəyişəndə (restart) təkrar göndərilir
+        self._memberships: Dict[str, Set[str]] = defaultdict(set)
+        self._closing = False
+
+    # -------------------- connection --------------------
+
+    async def _open(self):
+        delay = 0.02
+        for _ in range(40):
+            try:
+                return await asyncio.open_unix_connection(self.path)
+            except (FileNotFoundError, ConnectionRefusedError):
+                if self.embedded_broker and start_embedded_broker(self.path, self.group_expiry):
+                    continue
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.5)
+        raise ConnectionError(f"channel broker is unreachable at {self.path}")
+
+    async def _connection(self) -> _Connection:
+        loop = asyncio.get_running_loop()
+        conn = self._connections.get(loop)
+        if conn is not None and conn.usable:
+            return conn
+
+        lock = self._connect_locks.get(loop)
+        if lock is None:
+            lock = self._connect_locks[loop] = asyncio.Lock()
+        async with lock:
+            conn = self._connections.get(loop)
+            if conn is not None and conn.usable:
+                return conn
+            reader, writer = await self._open()
+            conn = _Connection(self, reader, writer)
+            self._connections[loop] = conn
+            if loop is self._receive_loop:
+                conn.start_reader()
+                # yeni broker bizi tanımır: routing + group üzvlükləri yenidən
+                for key in self._registered:
+                    conn.write(OP_REGISTER, key)
+                for group, channels in self._memberships.items():
+                    for channel in channels:
+                        conn.write(OP_GROUP_ADD, group, channel)
+            return conn
+
+    def _connection_lost(self, conn: _Connection) -> None:
+        # receive tərəfinin bağlantısı qopdu (broker prosesi öldü) -> yenidən qoşul
+        if self._closing or conn.loop is not self._receive_loop or conn.loop.is_closed():
+            return
+
+        async def reconnect() -> None:
+            delay = 0.05
+            while not self._closing:
+                try:
+                    await self._connection()
+                    return
+                except ConnectionError:
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, 2.0)
+
+        conn.loop.create_task(reconnect())
+
+    # -------------------- local delivery --------------------
+
+    def _queue(self, channel: str) -> asyncio.Queue:
+        queue = self._queues.get(channel)
+        if queue is None:
+            queue = self._queues[channel] = asyncio.Queue(maxsize=self.get_capacity(channel))
+        return queue
+
+    def _deliver(self, message: Any, channels: List[str]) -> None:
+        """Broker-dən gələn (receive loop-unda): hər kanalın lokal növbəsinə."""
+        expires = time.time() + self.expiry
+        for channel in channels:
+            try:
+                self._queue(channel).put_nowait((expires, message))
+            except asyncio.QueueFull:
+                pass
+
+    def _clean_expired(self) -> None:
+        now = time.time()
+        for channel, queue in list(self._queues.items()):
+            while not queue.empty() and queue._queue[0][0] < now:
+                queue.get_nowait()
+            if queue.empty() and not queue._getters:
+                self._queues.pop(channel, None)
+
+    # -------------------- channel layer API --------------------
+
+    async def new_channel(self, prefix: str = "specific.") -> str:
+        rand = "".join(random.choice(string.ascii_letters) for _ in range(12))
+        return f"{prefix}{self.client_prefix}!{rand}"
+
+    async def send(self, channel: str, message: dict) -> None:
+        assert isinstance(message, dict), "message is not a dict"
+        self.require_valid_channel_name(channel)
+        assert "__asgi_channel__" not in message
+
+        key = _routing_key(channel)
+        receive_loop = self._receive_loop
+        if key in self._registered and receive_loop is not None and not receive_loop.is_closed():
+            # öz prosesimizin kanalı: broker-ə getmədən
+            queue = self._queue(channel)
+            if queue.full():
+                raise ChannelFull(channel)
+            item = (time.time() + self.expiry, _unpack(_pack(message)))
+            if asyncio.get_running_loop() is receive_loop:
+                queue.put_nowait(item)
+            else:
+                receive_loop.call_soon_threadsafe(self._deliver, item[1], [channel])
+            return
+
+        conn = await self._connection()
+        conn.write(OP_SEND, channel, message)
+        await conn.drain()
+
+    async def receive(self, channel: str) -> dict:
+        self.require_valid_channel_name(channel)
+        loop = asyncio.get_running_loop()
+        if self._receive_loop is None or self._receive_loop.is_closed():
+            # köhnə loop-un növbələri yeni loop-da işləmir
+            self._receive_loop = loop
+            self._queues.clear()
+
+        key = _routing_key(channel)
+        conn = await self._connection()
+        conn.start_reader()
+        if key not in self._registered:
+            self._registered.add(key)
+            conn.write(OP_REGISTER, key)
+            await conn.drain()
+
+        self._clean_expired()
+        queue = self._queue(channel)
+        try:
+            _, message = await queue.get()
+        finally:
+            if queue.empty() and not queue._getters and self._queues.get(channel) is queue:
+                self._queues.pop(channel, None)
+        return message
+
+    async def group_add(self, group: str, channel: str) -> None:
+        self.require_valid_group_name(group)
+        self.require_valid_channel_name(channel)
+        if f"{self.client_prefix}!" in channel:
+            self._memberships[group].add(channel)
+        conn = await self._connection()
+        conn.write(OP_GROUP_ADD, group, channel)
+        await conn.drain()
+
+    async def group_discard(self, group: str, channel: str) -> None:
+        self.require_valid_channel_name(channel)
+        self.require_valid_group_name(group)
+        members = self._memberships.get(group)
+        if members is not None:
+            members.discard(channel)
+            if not members:
+                self._memberships.pop(group, None)
+        conn = await self._connection()
+        conn.write(OP_GROUP_DISCARD, group, channel)
+        await conn.drain()
+
+    async def group_send(self, group: str, message: dict) -> None:
+        assert isinstance(message, dict), "Message is not a dict"
+        self.require_valid_group_name(group)
+        conn = await self._connection()
+        conn.write(OP_GROUP_SEND, group, message)
+        await conn.drain()
+
+    async def flush(self) -> None:
+        conn = await self._connection()
+        conn.write(OP_FLUSH)
+        await conn.drain()
+        self._queues.clear()
+        self._memberships.clear()
+
+    async def close(self) -> None:
+        self._closing = True
+        for conn in list(self._connections.values()):
+            conn.close()
+        self._connections.clear()
@@ -0,0 +1,220 @@
+# liveExam/clock.py
+"""
+Server tərəfli oyun saatı (auto reveal / auto next).
+
+Əvvəl auto rejim host brauzerində idi (setTimeout -> POST reveal/next):
+arxa plana keçmiş tab və ya zəif noutbuk bütün otağı saxlayırdı. İndi hər
+sessiya üçün event loop-da bir asyncio task:
+- sual yayımlananda: question_ends_at-da reveal (hamı cavab veribsə dərhal)
+- reveal-dən sonra: AUTO_NEXT_SECONDS pauza, sonra next
+
+Saat prosesə bağlıdır: loop consumer connect-də qeyd olunur (attach_loop).
+Bu prosesdə loop yoxdursa (WSGI / management command) arm_* False/None qaytarır
+və host səhifəsi köhnə brauzer timer-lərinə qayıdır.
+
+Hərəkətlərin özü game.py-dadır; expected_* yoxlaması sayəsində host eyni anda
+düyməyə bassa belə sual iki dəfə keçilmir.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+
+SERVER_CLOCK = getattr(settings, "LIVE_SERVER_CLOCK", True)
+AUTO_NEXT_SECONDS = getattr(settings, "LIVE_AUTO_NEXT_SECONDS", 5)
+# vaxt bitəndən sonra gecikmiş cavablar üçün kiçik ehtiyat (brauzer timer-i də +500ms idi)
+REVEAL_GRACE_SECONDS = getattr(settings, "LIVE_AUTO_REVEAL_GRACE", 0.5)
+
+PHASE_QUESTION = "question"
+PHASE_REVEAL = "reveal"
+
+_LOOP: Optional[asyncio.AbstractEventLoop] = None
+
+
+def attach_loop(loop: asyncio.AbstractEventLoop) -> None:
+    """Consumer connect-də çağırılır: saat task-ları bu loop-da işləyəcək."""
+    global _LOOP
+    if SERVER_CLOCK:
+        _LOOP = loop
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    loop = _LOOP
+    if loop is None or loop.is_closed() or not loop.is_running():
+        return None
+    return loop
+
+
+def _call_in_loop(loop: asyncio.AbstractEventLoop, fn, *args) -> None:
+    """
+    Sync thread-dən loop-a ötürür. Boş context ilə: view thread-inin asgiref
+    context-i (thread_sensitive executor) task-a keçməsin, yoxsa task daxilində
+    database_sync_to_async "would deadlock" verir.
+    """
+    loop.call_soon_threadsafe(fn, *args, context=contextvars.Context())
+
+
+class GameClock:
+    """
+    Bir sessiyanın saatı. Sahələr yalnız loop thread-ində dəyişir
+    (sync koddan call_soon_threadsafe ilə).
+    """
+
+    def __init__(self, pin: str):
+        self.pin = pin
+        self.enabled = False
+        self.pause = AUTO_NEXT_SECONDS
+        self.phase: Optional[str] = None
+        self.question_id: Optional[int] = None
+        self.index: Optional[int] = None
+        self.deadline: Optional[datetime] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    # ---------------- loop thread ----------------
+
+    def _set(self, phase: Optional[str], question_id=None, index=None, deadline=None) -> None:
+        self.phase = phase
+        self.question_id = question_id
+        self.index = index
+        self.deadline = deadline
+
+        if self._wake is None:
+            self._wake = asyncio.Event()
+        self._wake.set()
+        if phase is not None and (self._task is None or self._task.done()):
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def poke(self) -> None:
+        """Yeni cavab gəldi: hamı cavab veribsə task erkən reveal etsin."""
+        if self.phase == PHASE_QUESTION and self._wake is not None:
+            self._wake.set()
+
+    def _everyone_answered(self) -> bool:
+        from liveExam.engine import peek_engine
+
+        engine = peek_engine(self.pin)
+        if engine is None or not engine.loaded:
+            return False
+        progress = engine.answer_progress()
+        return (
+            progress["question_id"] == self.question_id
+            and progress["total_players"] > 0
+            and progress["answered_count"] >= progress["total_players"]
+        )
+
+    async def _run(self) -> None:
+        while self.phase is not None:
+            self._wake.clear()
+
+            if self.phase == PHASE_QUESTION and self._everyone_answered():
+                await self._fire()
+                continue
+
+            timeout = (self.deadline - timezone.now()).total_seconds()
+            if timeout > 0:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                # oyanma səbəbi nə olursa olsun (yeni faza / cavab / vaxt) -> yenidən yoxla
+                continue
+
+            await self._fire()
+
+    async def _fire(self) -> None:
+        from liveExam import game
+
+        phase, question_id, index = self.phase, self.question_id, self.index
+        # hərəkət növbəti fazanı özü arm edir (_set call_soon_threadsafe ilə gəlir)
+        self.phase = None
+        try:
+            if phase == PHASE_QUESTION:
+                await game.run_action(self.pin, game.reveal_question, question_id)
+            elif phase == PHASE_REVEAL:
+                await game.run_action(self.pin, game.next_question, index)
+        except Exception:
+            # DB müvəqqəti əlçatmazdır -> host düymələri ilə davam edə bilər
+            pass
+
+
+# ------------------------
+# Registry + sync API (views / game.py)
+# ------------------------
+
+_CLOCKS: Dict[str, GameClock] = {}
+_CLOCKS_LOCK = threading.Lock()
+
+
+def _get_clock(pin: str) -> GameClock:
+    pin = str(pin)
+    with _CLOCKS_LOCK:
+        clock = _CLOCKS.get(pin)
+        if clock is None:
+            clock = _CLOCKS[pin] = GameClock(pin)
+        return clock
+
+
+def _peek_clock(pin: str) -> Optional[GameClock]:
+    with _CLOCKS_LOCK:
+        return _CLOCKS.get(str(pin))
+
+
+def set_auto(pin: str, enabled: bool, pause: Optional[int] = None) -> bool:
+    """
+    Host-un Auto rejimi. Server saatı bu prosesdə işləyə bilirsə True
+    (əks halda host səhifəsi öz timer-lərini istifadə edir).
+    """
+    loop = _running_loop()
+    clock = _get_clock(pin)
+    clock.enabled = bool(enabled) and loop is not None
+    if pause is not None:
+        clock.pause = pause
+    if not clock.enabled and loop is not None:
+        _call_in_loop(loop, clock._set, None)
+    return clock.enabled
+
+
+def arm_question(pin: str, question_id: int, index: int, ends_at: datetime) -> bool:
+    """Sual yayımlandı: ends_at-da (və ya hamı cavab verəndə) reveal. Saat işləyirsə True."""
+    clock = _peek_clock(pin)
+    loop = _running_loop()
+    if clock is None or not clock.enabled or loop is None:
+        return False
+    deadline = ends_at + timezone.timedelta(seconds=REVEAL_GRACE_SECONDS)
+    _call_in_loop(loop, clock._set, PHASE_QUESTION, question_id, index, deadline)
+    return True
+
+
+def arm_reveal(pin: str, index: int) -> Optional[datetime]:
+    """Reveal edildi: pauzadan sonra next. Next-in vaxtını qaytarır (saat yoxdursa None)."""
+    clock = _peek_clock(pin)
+    loop = _running_loop()
+    if clock is None or not clock.enabled or loop is None:
+        return None
+    at = timezone.now() + timezone.timedelta(seconds=clock.pause)
+    _call_in_loop(loop, clock._set, PHASE_REVEAL, None, index, at)
+    return at
+
+
+def disarm(pin: str) -> None:
+    with _CLOCKS_LOCK:
+        clock = _CLOCKS.pop(str(pin), None)
+    loop = _running_loop()
+    if clock is not None and loop is not None:
+        _call_in_loop(loop, clock._set, None)
+
+
+def poke(pin: str) -> None:
+    """Consumer-dən (loop thread-i) hər qəbul olunan cavabdan sonra."""
+    clock = _peek_clock(pin)
+    if clock is not None:
+        clock.poke()
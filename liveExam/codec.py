@@ -0,0 +1,136 @@
+# liveExam/codec.py
+"""
+Live websocket-ləri üçün kompakt binary kodlaşdırma (opt-in subprotocol).
+
+Client `new WebSocket(url, [COMPACT_SUBPROTOCOL])` ilə qoşulursa server
+mesajları msgpack binary frame kimi göndərir:
+- tez-tez təkrarlanan açarlar qısaldılır (question -> q, options -> o, ...)
+- "type" dəyərləri qısaldılır (question_published -> qp, ...)
+- *_at ISO tarixləri -> epoch millisaniyə (int)
+
+Subprotocol təklif etməyən köhnə client-lər əvvəlki kimi JSON alır.
+Cədvəllər static/js/live_codec.js ilə EYNİ olmalıdır (dəyişəndə versiyanı artır).
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any
+
+import msgpack
+
+
+COMPACT_SUBPROTOCOL = "emsarena.live.msgpack.1"
+
+KEYS = {
+    "type": "t",
+    "question": "q",
+    "options": "o",
+    "id": "i",
+    "text": "x",
+    "label": "l",
+    "time_limit": "tl",
+    "points": "p",
+    "multi": "m",
+    "max_select": "ms",
+    "started_at": "sa",
+    "ends_at": "ea",
+    "index": "ix",
+    "total": "tt",
+    "auto": "au",
+    "question_id": "qi",
+    "correct_option_ids": "co",
+    "results": "r",
+    "top": "tp",
+    "nickname": "nk",
+    "avatar_key": "ak",
+    "score": "s",
+    "rank": "rk",
+    "delta": "dl",
+    "is_correct": "ic",
+    "awarded_points": "ap",
+    "total_score": "ts",
+    "revealed_at": "ra",
+    "auto_next_at": "na",
+    "finished_at": "fa",
+    "answered_count": "ac",
+    "total_players": "tpl",
+    "player": "pl",
+    "player_id": "pi",
+    "players": "ps",
+    "count": "c",
+    "version": "v",
+    "message": "mg",
+}
+
+TYPES = {
+    "question_published": "qp",
+    "reveal": "rv",
+    "finished": "fn",
+    "answer_progress": "pg",
+    "answer_saved": "as",
+    "lobby_state": "ls",
+    "player_joined": "pj",
+    "player_left": "px",
+    "game_started": "gs",
+    "error": "er",
+    "ack": "ak",
+    "snapshot": "sn",
+}
+
+KEYS_BACK = {v: k for k, v in KEYS.items()}
+TYPES_BACK = {v: k for k, v in TYPES.items()}
+
+
+def _epoch_ms(value: Any) -> Any:
+    if isinstance(value, str):
+        try:
+            return int(datetime.fromisoformat(value).timestamp() * 1000)
+        except ValueError:
+            return value
+    if isinstance(value, datetime):
+        return int(value.timestamp() * 1000)
+    return value
+
+
+def compact(obj: Any) -> Any:
+    """Uzun açarlı payload -> qısa açarlı (rekursiv)."""
+    if isinstance(obj, dict):
+        out = {}
+        for key, value in obj.items():
+            if key == "type" and isinstance(value, str):
+                value = TYPES.get(value, value)
+            elif isinstance(key, str) and key.endswith("_at"):
+                value = _epoch_ms(value)
+            else:
+                value = compact(value)
+            out[KEYS.get(key, key)] = value
+        return out
+    if isinstance(obj, (list, tuple)):
+        return [compact(v) for v in obj]
+    return obj
+
+
+def expand(obj: Any) -> Any:
+    """compact-ın tərsi (client -> server binary mesajları üçün)."""
+    if isinstance(obj, dict):
+        out = {}
+        for key, value in obj.items():
+            key = KEYS_BACK.get(key, key)
+            if key == "type" and isinstance(value, str):
+                value = TYPES_BACK.get(value, value)
+            else:
+                value = expand(value)
+            out[key] = value
+        return out
+    if isinstance(obj, list):
+        return [expand(v) for v in obj]
+    return obj
+
+
+def pack(content: Any) -> bytes:
+    return msgpack.packb(compact(content), use_bin_type=True)
+
+
+def unpack(data: bytes) -> Any:
+    return expand(msgpack.unpackb(data, raw=False))
@@ -2,122 +2,303 @@
 
 from __future__ import annotations
 
-from typing import Any, Dict, List, Tuple
+import asyncio
+from urllib.parse import parse_qs
+from typing import Any, Dict, List, Optional, Tuple
 
 from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from channels.layers import get_channel_layer
 from django.core import signing
-from django.utils import timezone
 
-from liveExam.models import LiveSession, LivePlayer, LiveAnswer
-from blog.models import ExamQuestion, ExamQuestionOption  # import yolunu öz proyektinə uyğun saxla
+from liveExam import clock, game
+from liveExam.codec import COMPACT_SUBPROTOCOL, pack, unpack
+from liveExam.engine import get_engine, peek_engine, host_group, progress_group
+from liveExam.events import peek_log
+from liveExam.lobby import LEAVE_GRACE_SECONDS, get_roster, mark_left, rejoin_player
+from liveExam.models import LiveSession, LivePlayer
 
 # ⚠️ consumers içindən views import eləmə (circular risk).
 PLAYER_COOKIE_NAME = "live_player_token"
 PLAYER_TOKEN_SALT = "liveExam.player"
+PLAYER_TOKEN_MAX_AGE = 60 * 60 * 6
+
+
+def _read_player_token(token, pin: str):
+    """Cookie token-i -> (player_id, client_id); etibarsızdırsa / başqa pin-dirsə None."""
+    if not token:
+        return None
+    try:
+        payload = signing.loads(token, salt=PLAYER_TOKEN_SALT, max_age=PLAYER_TOKEN_MAX_AGE)
+        player_id = int(payload.get("player_id"))
+    except Exception:
+        return None
+    if str(payload.get("pin")) != str(pin):
+        return None
+    return player_id, payload.get("client_id")
 
 
 # -------------------------
-# Lobby consumer
+# Base: JSON və ya kompakt msgpack
 # -------------------------
 
-class LiveLobbyConsumer(AsyncJsonWebsocketConsumer):
+class LiveJsonConsumer(AsyncJsonWebsocketConsumer):
     """
-    Wait room / lobby websocket:
-    - connect olanda hazırkı players listini göndərir
-    - view tərəfdən group_send gələndə realtime update edir
-    Group: live_<pin>_lobby
+    Client COMPACT_SUBPROTOCOL təklif edibsə mesajlar msgpack binary frame
+    (qısa açarlar, int timestamp) kimi gedir; yoxsa köhnə JSON text.
     """
 
-    async def connect(self):
-        self.pin = self.scope["url_route"]["kwargs"]["pin"]
-        self.group_name = f"live_{self.pin}_lobby"
-
-        if not await self._session_exists(self.pin):
-            await self.close()
+    compact = False
+
+    async def accept(self, subprotocol=None, headers=None):
+        if subprotocol is None and COMPACT_SUBPROTOCOL in (self.scope.get("subprotocols") or ()):
+            subprotocol = COMPACT_SUBPROTOCOL
+            self.compact = True
+        await super().accept(subprotocol=subprotocol, headers=headers)
+
+    async def send_json(self, content, close=False):
+        if self.compact:
+            await self.send(bytes_data=pack(content), close=close)
+        else:
+            await super().send_json(content, close=close)
+
+    async def receive(self, text_data=None, bytes_data=None, **kwargs):
+        if bytes_data and self.compact:
+            try:
+                content = unpack(bytes_data)
+            except Exception:
+                return
+            await self.receive_json(content, **kwargs)
             return
+        await super().receive(text_data=text_data, bytes_data=bytes_data, **kwargs)
 
-        await self.channel_layer.group_add(self.group_name, self.channel_name)
-        await self.accept()
 
-        # ilk açılan kimi state göndər
-        state = await self._get_lobby_state(self.pin)
-        await self.send_json(state)
+# -------------------------
+# Multiplexed consumer: ws/live/<pin>/
+# -------------------------
 
-    async def disconnect(self, close_code):
-        await self.channel_layer.group_discard(self.group_name, self.channel_name)
+TOPIC_LOBBY = "lobby"
+TOPIC_PLAY = "play"
+TOPIC_PROGRESS = "progress"
+TOPIC_HOST = "host"
+TOPICS = (TOPIC_LOBBY, TOPIC_PLAY, TOPIC_PROGRESS, TOPIC_HOST)
 
-    async def lobby_event(self, event):
-        # view -> group_send(..., {"type":"lobby_event","data":{...}})
-        data = event.get("data") or {}
-        await self.send_json(data)
 
-    @database_sync_to_async
-    def _session_exists(self, pin: str) -> bool:
-        return LiveSession.objects.filter(pin=pin).exists()
+def _query_params(scope) -> Dict[str, List[str]]:
+    return parse_qs((scope.get("query_string") or b"").decode("latin-1"))
 
-    @database_sync_to_async
-    def _get_lobby_state(self, pin: str) -> dict:
-        session = LiveSession.objects.get(pin=pin)
-        players = list(
-            session.players.order_by("-created_at")
-            .values("id", "nickname", "avatar_key")[:50]
-        )
-        return {
-            "type": "lobby_state",
-            "count": session.players.count(),
-            "players": players,
-        }
 
+def _query_topics(scope) -> List[str]:
+    """?topics=lobby,play -> ["lobby", "play"] (naməlumlar atılır)."""
+    names = ",".join(_query_params(scope).get("topics", [])).split(",")
+    return [t for t in dict.fromkeys(n.strip() for n in names) if t in TOPICS]
 
-# -------------------------
-# Play consumer
-# -------------------------
 
-class LivePlayConsumer(AsyncJsonWebsocketConsumer):
+def _parse_seq(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class LiveConsumer(LiveJsonConsumer):
     """
-    Oyun websocket:
-    - client 'answer' göndərir
-    - cookie token ilə player-i tanıyır
-    - cavabı saxlayır və score artırır
-    - sonra answer_progress broadcast edir (hamı cavab veribsə host auto-reveal edə bilsin)
-    Group: live_<pin>_play
+    Bir client = bir socket. Lobby, play, progress və host kanalları eyni
+    bağlantıda topic kimi daşınır:
+    - connect: /ws/live/<pin>/?topics=lobby,play (handshake-də icazə yoxlanır)
+    - sonra: {"type": "subscribe", "topic(s)": ...} / {"type": "unsubscribe", ...}
+    - lobby    -> versiyalı snapshot + player_joined / player_left; {"type": "resync"}
+    - play     -> question_published / reveal / finished (hər biri seq ilə); {"type": "answer", ...}
+                  (etibarlı oyunçu və ya host). Reconnect: ?since=<son seq> və ya
+                  subscribe-da "since" -> yalnız buraxılmış event-lər; log-da yoxdursa snapshot
+    - progress -> answer_progress tick-i
+    - host     -> play + host qrupları; {"type": "command", ...} -> ack (yalnız host)
+    Oyunçu wait room-dan oyuna keçəndə socket dəyişmir: game_started gələndə
+    client "lobby"-dən çıxır, "play" artıq abunədir (game_started-də reconnect fırtınası yoxdur).
+
+    Kimlik (host / oyunçu token-i) bağlantıda BİR dəfə, lazım olanda yoxlanılır.
     """
 
+    # köhnə ayrıca endpoint-lər üçün (LiveLobbyConsumer və s.) sabit topic-lər
+    url_topics: Tuple[str, ...] = ()
+
+    _UNSET = object()
+
     async def connect(self):
         self.pin = self.scope["url_route"]["kwargs"]["pin"]
-        self.group_name = f"live_{self.pin}_play"
+        self.topics: set = set()
+        self.groups_joined: set = set()
+        self.roster = get_roster(self.pin)
+
+        self._host_user_id = self._UNSET
+        self._player_checked = False
+        self.player_id = None
+        self.client_id = None
+        # lobby üçün token yetərlidir (əvvəlki kimi DB yoxlaması yox)
+        self.token_ident = _read_player_token(
+            (self.scope.get("cookies") or {}).get(PLAYER_COOKIE_NAME), self.pin
+        )
 
-        if not await self._session_exists(self.pin):
+        topics = list(self.url_topics) or _query_topics(self.scope)
+        if not topics and await self._session_host_id() is None:
             await self.close()
             return
+        for topic in topics:
+            if not await self._authorize(topic):
+                await self.close()
+                return
 
-        await self.channel_layer.group_add(self.group_name, self.channel_name)
         await self.accept()
+        since = _parse_seq((_query_params(self.scope).get("since") or [None])[0])
+        for topic in topics:
+            await self._subscribe(topic, since=since)
 
     async def disconnect(self, close_code):
-        await self.channel_layer.group_discard(self.group_name, self.channel_name)
-
-    async def receive_json(self, data, **kwargs):
-        if (data or {}).get("type") != "answer":
+        for group in getattr(self, "groups_joined", ()):
+            await self.channel_layer.group_discard(group, self.channel_name)
+        if TOPIC_LOBBY in getattr(self, "topics", ()):
+            self._leave_lobby()
+
+    # -------------------- topics --------------------
+
+    async def _authorize(self, topic: str) -> bool:
+        if topic == TOPIC_LOBBY:
+            return await database_sync_to_async(self.roster.refresh)()
+        if topic in (TOPIC_PLAY, TOPIC_PROGRESS):
+            return await self._is_host() or await self._verified_player() is not None
+        if topic == TOPIC_HOST:
+            return await self._is_host()
+        return False
+
+    def _topic_groups(self, topic: str) -> List[str]:
+        if topic == TOPIC_LOBBY:
+            return [f"live_{self.pin}_lobby"]
+        if topic == TOPIC_PLAY:
+            # host ekranı play socket-i ilə də progress alırdı
+            groups = [f"live_{self.pin}_play"]
+            if self._host_user_id is not self._UNSET and self._is_host_cached():
+                groups.append(host_group(self.pin))
+            return groups
+        if topic == TOPIC_PROGRESS:
+            return [progress_group(self.pin)]
+        if topic == TOPIC_HOST:
+            return [f"live_{self.pin}_play", host_group(self.pin)]
+        return []
+
+    async def _sync_groups(self) -> None:
+        wanted = {g for t in self.topics for g in self._topic_groups(t)}
+        for group in wanted - self.groups_joined:
+            await self.channel_layer.group_add(group, self.channel_name)
+        for group in self.groups_joined - wanted:
+            await self.channel_layer.group_discard(group, self.channel_name)
+        self.groups_joined = wanted
+
+    async def _subscribe(self, topic: str, since: Optional[int] = None) -> None:
+        if topic in self.topics:
+            if topic == TOPIC_PLAY and since is not None:
+                await self._catch_up(since)
             return
+        self.topics.add(topic)
+        await self._sync_groups()
+
+        if topic in (TOPIC_PLAY, TOPIC_HOST):
+            # server saatı (auto reveal/next) bu prosesin loop-unda işləyir
+            clock.attach_loop(asyncio.get_running_loop())
+            # qrupa qoşulandan SONRA log oxunur: arada gələn event itmir
+            # (təkrar gələrsə client seq ilə atır)
+            if topic == TOPIC_PLAY and since is not None:
+                await self._catch_up(since)
+            if topic == TOPIC_HOST:
+                # qayıdan host növbəti tick-i gözləmədən cari histogramı görsün
+                engine = peek_engine(self.pin)
+                histogram = engine.answer_histogram() if engine is not None and engine.loaded else None
+                if histogram is not None:
+                    await self.send_json(histogram)
+        elif topic == TOPIC_PROGRESS:
+            engine = get_engine(self.pin)
+            await self.send_json({"type": "answer_progress", **engine.answer_progress()})
+        elif topic == TOPIC_LOBBY:
+            await self._enter_lobby()
+
+    async def _catch_up(self, since: int) -> None:
+        """since-dən sonra buraxılmış oyun event-ləri; log bilmirsə tam snapshot."""
+        log = peek_log(self.pin)
+        missed = log.since(since) if log is not None else None
+        if missed is None:
+            snapshot = await database_sync_to_async(self._state_snapshot)()
+            if snapshot is not None:
+                await self.send_json(self._with_standing(snapshot))
+            return
+        for event in missed:
+            await self.send_json(self._with_standing(event))
 
-        # 1) token
-        cookies = self.scope.get("cookies") or {}
-        token = cookies.get(PLAYER_COOKIE_NAME)
+    def _state_snapshot(self) -> Optional[Dict[str, Any]]:
+        session = game._load_session(self.pin)
+        return game.build_state_snapshot(session) if session is not None else None
 
-        if not token:
-            await self.send_json({"type": "error", "message": "No token"})
+    async def _unsubscribe(self, topic: str) -> None:
+        if topic not in self.topics:
+            return
+        self.topics.discard(topic)
+        await self._sync_groups()
+        if topic == TOPIC_LOBBY:
+            self._leave_lobby()
+
+    async def _enter_lobby(self) -> None:
+        player_id = self.token_ident[0] if self.token_ident else None
+        if player_id is not None:
+            self.roster.attach(player_id)
+            if player_id not in self.roster.players:
+                # grace-dən sonra "çıxmış" sayılmışdı -> geri qayıdır
+                event = await database_sync_to_async(rejoin_player)(self.pin, player_id)
+                if event is not None:
+                    self.roster.apply(event)
+                    await self.channel_layer.group_send(
+                        f"live_{self.pin}_lobby", {"type": "lobby_event", "data": event}
+                    )
+        # roster _authorize-da DB version-u ilə yoxlanılıb
+        await self.send_json(self.roster.snapshot())
+
+    def _leave_lobby(self) -> None:
+        if self.token_ident is None:
             return
+        player_id = self.token_ident[0]
+        self.roster.detach(player_id)
+        asyncio.get_running_loop().create_task(_leave_after_grace(self.pin, player_id))
 
-        try:
-            payload = signing.loads(token, salt=PLAYER_TOKEN_SALT, max_age=60 * 60 * 6)
-        except Exception:
-            await self.send_json({"type": "error", "message": "Bad token"})
+    # -------------------- client -> server --------------------
+
+    async def receive_json(self, data, **kwargs):
+        data = data or {}
+        msg_type = data.get("type")
+
+        if msg_type in ("subscribe", "unsubscribe"):
+            topics = data.get("topics")
+            if not isinstance(topics, list):
+                topics = [data.get("topic")]
+            for topic in topics:
+                if topic not in TOPICS:
+                    continue
+                if msg_type == "unsubscribe":
+                    await self._unsubscribe(topic)
+                elif await self._authorize(topic):
+                    await self._subscribe(topic, since=_parse_seq(data.get("since")))
+                else:
+                    await self.send_json({"type": "error", "message": "Forbidden topic", "topic": topic})
             return
 
-        if str(payload.get("pin")) != str(self.pin):
-            await self.send_json({"type": "error", "message": "Pin mismatch"})
+        if msg_type == "resync" and TOPIC_LOBBY in self.topics:
+            await database_sync_to_async(self.roster.refresh)()
+            await self.send_json(self.roster.snapshot())
+        elif msg_type == "answer" and TOPIC_PLAY in self.topics:
+            await self._handle_answer(data)
+        elif msg_type == "command" and TOPIC_HOST in self.topics:
+            await self._handle_command(data)
+
+    async def _handle_answer(self, data: Dict[str, Any]) -> None:
+        # 1) player (bağlantıda bir dəfə yoxlanılıb)
+        if self.player_id is None:
+            await self.send_json({"type": "error", "message": "Not a player"})
             return
 
         # 2) parse payload
@@ -126,33 +307,77 @@ class LivePlayConsumer(AsyncJsonWebsocketConsumer):
             await self.send_json({"type": "error", "message": parsed_or_msg})
             return
 
-        question_id, option_ids, answer_ms = parsed_or_msg
+        # answer_ms client-dən götürülmür: engine onu serverdə hesablayır
+        question_id, option_ids = parsed_or_msg
+        player_id, client_id = self.player_id, self.client_id
 
-        # 3) save + score
-        ok, result = await self._save_answer_and_score(
-            pin=self.pin,
-            player_id=payload.get("player_id"),
-            client_id=payload.get("client_id"),
-            question_id=question_id,
-            option_ids=option_ids,
-            answer_ms=answer_ms,
-        )
+        # 3) yaddaşda hesabla (state yalnız sual dəyişəndə DB-dən yüklənir)
+        engine = get_engine(self.pin)
+        if not await engine.ensure_loaded(question_id):
+            await self.send_json({"type": "error", "message": "Session not found"})
+            return
+
+        if not engine.has_player(player_id, client_id):
+            if not await database_sync_to_async(engine.load_player)(player_id, client_id):
+                await self.send_json({"type": "error", "message": "Player not found"})
+                return
+
+        ok, result = engine.submit(player_id, question_id, option_ids)
         if not ok:
             await self.send_json({"type": "error", "message": result})
             return
 
+        # DB yazısı arxa planda batch ilə, progress isə növbəti tick-də (coalesced)
+        engine.schedule_flush()
+        engine.ensure_ticker()
+        # hamı cavab veribsə saat reveal-i gözləmədən edir
+        clock.poke(self.pin)
+
         await self.send_json({"type": "answer_saved", **result})
 
-        # 4) progress -> group (host auto-reveal üçün)
-        prog = await self._get_answer_progress(self.pin, question_id)
-        await self.channel_layer.group_send(
-            self.group_name,
-            {"type": "play_event", "data": {"type": "answer_progress", **prog}},
-        )
+    async def _handle_command(self, data: Dict[str, Any]) -> None:
+        action = data.get("action")
+        if action == "start":
+            result = await game.run_action(
+                self.pin, game.start_game, data.get("question_count"), bool(data.get("auto")),
+            )
+        elif action == "reveal":
+            result = await game.run_action(self.pin, game.reveal_question)
+        elif action == "next":
+            result = await game.run_action(self.pin, game.next_question)
+        elif action == "finish":
+            result = await game.run_action(self.pin, game.finish_game)
+        elif action == "auto":
+            pause = data.get("pause")
+            pause = max(1, min(60, int(pause))) if str(pause or "").isdigit() else None
+            result = await game.run_action(self.pin, game.set_auto_mode, bool(data.get("enabled")), pause)
+        else:
+            result = {"ok": False, "message": "Unknown action"}
+
+        await self.send_json({**result, "type": "ack", "id": data.get("id"), "action": action})
+
+    # -------------------- group -> client --------------------
+
+    async def lobby_event(self, event):
+        # view -> group_send(..., {"type":"lobby_event","data":{...}})
+        data = event.get("data") or {}
+        # başqa prosesdə (HTTP join) qurulan delta bu prosesin roster cache-ini də irəlilədir
+        self.roster.apply(data)
+        await self.send_json(data)
 
     async def play_event(self, event):
         # view -> group_send(... {"type":"play_event","data":{...}})
-        await self.send_json(event.get("data") or {})
+        await self.send_json(self._with_standing(event.get("data") or {}))
+
+    def _with_standing(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        # reveal/finished: hər oyunçuya öz yeri ("sən #137-sən") - yaddaşdan, O(log N)
+        if data.get("type") in ("reveal", "finished", "snapshot"):
+            engine = peek_engine(self.pin)
+            if self.player_id is not None and engine is not None:
+                me = engine.player_standing(self.player_id)
+                if me is not None:
+                    data = {**data, "me": me}
+        return data
 
     # -------------------- parse helpers --------------------
 
@@ -162,7 +387,6 @@ class LivePlayConsumer(AsyncJsonWebsocketConsumer):
         """
         try:
             question_id = int(data.get("question_id"))
-            answer_ms = int(data.get("answer_ms") or 0)
 
             if isinstance(data.get("option_ids"), list):
                 option_ids = [int(x) for x in data.get("option_ids") if str(x).isdigit()]
@@ -174,132 +398,78 @@ class LivePlayConsumer(AsyncJsonWebsocketConsumer):
             if not option_ids:
                 return False, "No options selected"
 
-            return True, (question_id, option_ids, answer_ms)
+            return True, (question_id, option_ids)
         except Exception:
             return False, "Bad payload"
 
-    # -------------------- DB helpers --------------------
-
-    @database_sync_to_async
-    def _session_exists(self, pin: str) -> bool:
-        return LiveSession.objects.filter(pin=pin).exists()
-
-    @database_sync_to_async
-    def _get_answer_progress(self, pin: str, question_id: int) -> dict:
-        session = LiveSession.objects.get(pin=pin)
-        total_players = LivePlayer.objects.filter(session=session).count()
-
-        # distinct player count (daha doğru)
-        answered_count = (
-            LiveAnswer.objects
-            .filter(session=session, question_id=question_id)
-            .values("player_id")
-            .distinct()
-            .count()
+    # -------------------- identity (bağlantıda bir dəfə) --------------------
+
+    async def _session_host_id(self):
+        if self._host_user_id is self._UNSET:
+            self._host_user_id = await database_sync_to_async(
+                lambda: LiveSession.objects.filter(pin=self.pin).values_list("host_user_id", flat=True).first()
+            )()
+        return self._host_user_id
+
+    def _is_host_cached(self) -> bool:
+        user = self.scope.get("user")
+        return (
+            self._host_user_id is not None
+            and user is not None
+            and user.is_authenticated
+            and user.id == self._host_user_id
         )
 
-        return {
-            "question_id": question_id,
-            "answered_count": answered_count,
-            "total_players": total_players,
-        }
-
-    @database_sync_to_async
-    def _save_answer_and_score(self, pin, player_id, client_id, question_id, option_ids, answer_ms):
-        # session
-        try:
-            session = LiveSession.objects.get(pin=pin)
-        except LiveSession.DoesNotExist:
-            return False, "Session not found"
-
-        # player
-        try:
-            player = LivePlayer.objects.get(id=player_id, session=session, client_id=client_id)
-        except LivePlayer.DoesNotExist:
-            return False, "Player not found"
+    async def _is_host(self) -> bool:
+        await self._session_host_id()
+        return self._is_host_cached()
 
-        # idempotent (1 sual = 1 cavab)
-        if LiveAnswer.objects.filter(session=session, player=player, question_id=question_id).exists():
-            return True, {"message": "Already answered", "score": player.score}
+    async def _verified_player(self):
+        """Token + DB yoxlaması; uğurlu olsa player_id/client_id bağlantıya yazılır."""
+        if not self._player_checked:
+            self._player_checked = True
+            if self.token_ident is not None and await self._player_exists(*self.token_ident):
+                self.player_id, self.client_id = self.token_ident
+        return self.player_id
 
-        # question
-        try:
-            eq = ExamQuestion.objects.get(id=question_id)
-        except ExamQuestion.DoesNotExist:
-            return False, "Question not found"
-
-        # correct ids
-        correct_ids = list(
-            ExamQuestionOption.objects
-            .filter(question_id=question_id, is_correct=True)
-            .values_list("id", flat=True)
-        )
-        if not correct_ids:
-            return False, "No correct options marked for this question"
-
-        correct_set = set(int(x) for x in correct_ids)
-        selected_set = set(int(x) for x in option_ids)
+    @database_sync_to_async
+    def _player_exists(self, player_id: int, client_id) -> bool:
+        return LivePlayer.objects.filter(id=player_id, session__pin=self.pin, client_id=client_id).exists()
 
-        # perfect match
-        is_perfect = (selected_set == correct_set)
 
-        # partial scoring (penalty)
-        T = len(selected_set & correct_set)     # doğru seçilənlər
-        W = len(selected_set - correct_set)     # səhv seçilənlər
-        C = len(correct_set)                    # correct sayı
+async def _leave_after_grace(pin: str, player_id: int) -> None:
+    """Refresh / qısa qopma "çıxma" sayılmasın: grace ərzində qayıtmayıbsa player_left."""
+    await asyncio.sleep(LEAVE_GRACE_SECONDS)
+    roster = get_roster(pin)
+    if roster.is_attached(player_id):
+        return
+    event = await database_sync_to_async(mark_left)(pin, player_id)
+    if event is None:
+        return  # oyun artıq başlayıb (wait room -> oyun keçidi) və ya artıq çıxıb
+    roster.apply(event)
+    await get_channel_layer().group_send(f"live_{pin}_lobby", {"type": "lobby_event", "data": event})
 
-        # fraction = clamp((T - W) / C)
-        fraction = (T - W) / float(C)
-        if fraction < 0:
-            fraction = 0.0
-        if fraction > 1:
-            fraction = 1.0
 
-        base = int(getattr(eq, "points", 1000) or 1000)
+# -------------------------
+# Köhnə ayrıca endpoint-lər (cache-lənmiş səhifələr / köhnə client-lər)
+# -------------------------
 
-        # speed bonus
-        bonus = 0
-        if session.question_started_at and session.question_ends_at:
-            total_ms = int((session.question_ends_at - session.question_started_at).total_seconds() * 1000)
-            if total_ms > 0:
-                answer_ms = max(0, min(int(answer_ms), total_ms))
-                remaining = total_ms - answer_ms
-                bonus = int((remaining / total_ms) * 500)
+class LiveLobbyConsumer(LiveConsumer):
+    """ws/live/<pin>/lobby/ = LiveConsumer + ["lobby"]. Group: live_<pin>_lobby"""
 
-        awarded = int((base + bonus) * fraction)
+    url_topics = (TOPIC_LOBBY,)
 
-        # ⚠️ LiveAnswer modelində choice_ids JSONField olmalıdır
-        LiveAnswer.objects.create(
-            session=session,
-            player=player,
-            question_id=question_id,
 
-            # geri uyğunluq
-            choice_id=(option_ids[0] if option_ids else None),
+class LivePlayConsumer(LiveConsumer):
+    """
+    ws/live/<pin>/play/ = LiveConsumer + ["play"]: token-siz / etibarsız bağlantı
+    (host deyilsə) handshake-də rədd olunur. Group: live_<pin>_play (+ host üçün live_<pin>_host)
+    """
 
-            # ✅ multi üçün
-            choice_ids=option_ids,
+    url_topics = (TOPIC_PLAY,)
 
-            # perfect match flag
-            is_correct=is_perfect,
 
-            answer_ms=int(answer_ms),
-            awarded_points=int(awarded),
-        )
+class LiveHostConsumer(LiveConsumer):
+    """ws/live/<pin>/host/ = LiveConsumer + ["host"] (yalnız sessiyanın host-u)."""
 
-        # player update
-        player.score = int(player.score or 0) + int(awarded)
-        player.last_seen = timezone.now()
-        player.save(update_fields=["score", "last_seen"])
-
-        return True, {
-            "is_correct": is_perfect,
-            "fraction": round(float(fraction), 4),
-            "picked_correct": T,
-            "picked_wrong": W,
-            "correct_total": C,
-            "awarded_points": awarded,
-            "base": base,
-            "bonus": bonus,
-            "score": player.score,
-        }
+    url_topics = (TOPIC_HOST,)
@@ -0,0 +1,301 @@
+# liveExam/deck.py
+"""
+Live oyunun "kompilyasiya olunmuş" sual dəsti (deck).
+
+host_start_game bütün seçilmiş sualları BİR dəfə hazırlayır: mətn, qarışdırılmış
+variantlar, düzgün id-lər, vaxt limiti, bal, multi bayrağı. Sonrakı keçidlər
+(next / state_json / consumer-də cavab yoxlaması) sadəcə lookup edir.
+
+Deck dəyişməzdir (frozen) və iki yerdə saxlanılır:
+- proses yaddaşında (memo)
+- django cache-də (başqa proseslər üçün)
+Tapılmasa, eyni seçimdən yenidən kompilyasiya olunur: variant qarışdırması
+pin + sual id-dən deterministikdir, ona görə bütün proseslərdə eyni nəticə çıxır.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import random
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from django.core.cache import cache
+
+from blog.models import ExamQuestion
+
+
+DECK_CACHE_SECONDS = 60 * 60 * 6
+OPTION_LETTERS = ["A", "B", "C", "D", "E", "F"]
+
+
+# ------------------------
+# Small utils (views da istifadə edir)
+# ------------------------
+
+def _safe_int(v: Any, default: int = 0) -> int:
+    try:
+        return int(v)
+    except Exception:
+        return default
+
+
+def _question_time_limit(session, eq: ExamQuestion) -> int:
+    """
+    1) eq.effective_time_limit (səndə varsa)
+    2) eq.time_limit_seconds
+    3) exam.default_question_time_seconds
+    default: 15
+    """
+    if hasattr(eq, "effective_time_limit"):
+        v = _safe_int(getattr(eq, "effective_time_limit", 0), 0)
+        if v > 0:
+            return v
+
+    v = _safe_int(getattr(eq, "time_limit_seconds", 0), 0)
+    if v > 0:
+        return v
+
+    v = _safe_int(getattr(session.exam, "default_question_time_seconds", 0), 0)
+    if v > 0:
+        return v
+
+    return 15
+
+
+def _question_points(session, eq: ExamQuestion) -> int:
+    """
+    1) eq.points
+    2) exam.default_question_points
+    default: 1
+    """
+    v = _safe_int(getattr(eq, "points", 0), 0)
+    if v > 0:
+        return v
+
+    v = _safe_int(getattr(session.exam, "default_question_points", 0), 0)
+    if v > 0:
+        return v
+
+    return 1
+
+
+def _get_question_text(eq: ExamQuestion) -> str:
+    """
+    Səndə eq.text var deyə əsas onu götürür.
+    Alternativ field-lar varsa fallback.
+    """
+    for attr in ("text", "question_text", "title", "body"):
+        v = getattr(eq, attr, None)
+        if isinstance(v, str) and v.strip():
+            return v.strip()
+    return ""
+
+
+def _get_option_text(opt) -> str:
+    """
+    “null” problemini öldürmək üçün:
+    mövcud field-lardan birini tapıb qaytarır.
+    """
+    for attr in ("text", "title", "content", "answer", "option_text", "body"):
+        v = getattr(opt, attr, None)
+        if isinstance(v, str) and v.strip():
+            return v.strip()
+    return ""
+
+
+def _get_option_label(opt) -> str:
+    v = getattr(opt, "label", None)
+    if isinstance(v, str) and v.strip():
+        return v.strip()
+    return ""
+
+
+def _options_seed(pin: str, question_id: int) -> int:
+    seed_str = f"{pin}:{int(question_id)}"
+    h = hashlib.sha256(seed_str.encode("utf-8")).hexdigest()
+    return int(h[:8], 16)  # 32-bit seed
+
+
+# ------------------------
+# Deck
+# ------------------------
+
+@dataclass(frozen=True)
+class DeckQuestion:
+    id: int
+    text: str
+    time_limit: int
+    points: int          # UI-da göstərilən bal
+    score_base: int      # hesablamada baza (consumer-in köhnə qaydası: points or 1000)
+    multi: bool
+    max_select: int
+    options: Tuple[Tuple[int, str, str], ...]  # (id, label, text), qarışdırılmış
+    correct_ids: frozenset
+    option_ids: frozenset
+
+    def payload(self, index: int, total: int, started_at=None, ends_at=None) -> Dict[str, Any]:
+        """question_published / state_json üçün `question` obyekti."""
+        return {
+            "id": self.id,
+            "text": self.text,
+            "time_limit": self.time_limit,
+            "points": self.points,
+            "multi": self.multi,
+            "max_select": self.max_select,
+            "options": [{"id": oid, "label": label, "text": text} for oid, label, text in self.options],
+            "started_at": started_at.isoformat() if started_at else None,
+            "ends_at": ends_at.isoformat() if ends_at else None,
+            "index": _safe_int(index, 0) + 1,
+            "total": _safe_int(total, 0),
+        }
+
+
+@dataclass(frozen=True)
+class Deck:
+    session_id: int
+    selection: Tuple[int, ...]       # host-un seçdiyi id-lər (açar kimi)
+    questions: Tuple[DeckQuestion, ...]
+    _by_id: Dict[int, DeckQuestion] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "_by_id", {q.id: q for q in self.questions})
+
+    def __len__(self) -> int:
+        return len(self.questions)
+
+    def at(self, index: int) -> Optional[DeckQuestion]:
+        index = _safe_int(index, -1)
+        if 0 <= index < len(self.questions):
+            return self.questions[index]
+        return None
+
+    def get(self, question_id: int) -> Optional[DeckQuestion]:
+        return self._by_id.get(question_id)
+
+
+def _compile_question(session, eq: ExamQuestion) -> DeckQuestion:
+    opts = sorted(eq.options.all(), key=lambda o: o.id)  # baza stabil olsun
+    random.Random(_options_seed(session.pin, eq.id)).shuffle(opts)
+
+    options = []
+    for i, opt in enumerate(opts):
+        label = _get_option_label(opt) or (OPTION_LETTERS[i] if i < len(OPTION_LETTERS) else str(i + 1))
+        text = _get_option_text(opt) or f"Variant {label}"
+        options.append((opt.id, label, text))
+
+    correct_ids = frozenset(o.id for o in opts if o.is_correct)
+    correct_count = len(correct_ids)
+
+    # multi: model bayraqları və ya correct_count > 1
+    flags = [
+        bool(getattr(eq, "is_multiple", False)),
+        bool(getattr(eq, "multi_choice", False)),
+        bool(getattr(eq, "allow_multiple", False)),
+    ]
+    multi = any(flags) or (correct_count > 1)
+    if multi:
+        max_select = _safe_int(getattr(eq, "max_select", 0), 0)
+        if max_select <= 1:
+            max_select = max(2, correct_count)  # ən az 2
+    else:
+        max_select = 1
+
+    return DeckQuestion(
+        id=eq.id,
+        text=_get_question_text(eq),
+        time_limit=_question_time_limit(session, eq),
+        points=_question_points(session, eq),
+        score_base=int(getattr(eq, "points", 1000) or 1000),
+        multi=multi,
+        max_select=max_select,
+        options=tuple(options),
+        correct_ids=correct_ids,
+        option_ids=frozenset(o.id for o in opts),
+    )
+
+
+def compile_deck(session, question_ids: Sequence[int]) -> Deck:
+    """Seçilmiş suallar (sıra ilə) -> Deck. 2 sorğu (suallar + variantlar)."""
+    question_ids = tuple(int(x) for x in question_ids)
+    by_id = {
+        eq.id: eq
+        for eq in ExamQuestion.objects.filter(exam_id=session.exam_id, id__in=question_ids).prefetch_related("options")
+    }
+    questions = tuple(_compile_question(session, by_id[qid]) for qid in question_ids if qid in by_id)
+    return Deck(session_id=session.id, selection=question_ids, questions=questions)
+
+
+# ------------------------
+# Storage (memo + cache)
+# ------------------------
+
+_DECKS: Dict[str, Deck] = {}
+_DECKS_LOCK = threading.Lock()
+
+
+def _cache_key(pin: str) -> str:
+    return f"live_deck:{pin}"
+
+
+def store_deck(pin: str, deck: Deck) -> None:
+    with _DECKS_LOCK:
+        _DECKS[str(pin)] = deck
+    cache.set(_cache_key(pin), deck, DECK_CACHE_SECONDS)
+
+
+def get_deck(session, question_ids: Sequence[int]) -> Deck:
+    """
+    Sessiyanın hazırkı seçimi üçün deck: memo -> cache -> kompilyasiya.
+    Seçim dəyişibsə (oyun yenidən başladılıb) köhnə deck istifadə olunmur.
+    """
+    pin = str(session.pin)
+    wanted = tuple(int(x) for x in question_ids)
+
+    def fits(deck) -> bool:
+        return deck is not None and deck.session_id == session.id and deck.selection == wanted
+
+    with _DECKS_LOCK:
+        deck = _DECKS.get(pin)
+    if fits(deck):
+        return deck
+
+    deck = cache.get(_cache_key(pin))
+    if not fits(deck):
+        deck = compile_deck(session, wanted)
+        cache.set(_cache_key(pin), deck, DECK_CACHE_SECONDS)
+
+    with _DECKS_LOCK:
+        _DECKS[pin] = deck
+    return deck
+
+
+def drop_deck(pin: str) -> None:
+    with _DECKS_LOCK:
+        _DECKS.pop(str(pin), None)
+
+
+def session_question_ids(session) -> Tuple[int, ...]:
+    """
+    Oyunun sual sırası: selected_question_ids (JSON, int/str qarışıq ola bilər),
+    boşdursa (köhnə sessiyalar) exam order.
+    """
+    out = []
+    for x in (getattr(session, "selected_question_ids", None) or []):
+        try:
+            out.append(int(x))
+        except Exception:
+            pass
+    if out:
+        return tuple(out)
+    return tuple(
+        ExamQuestion.objects
+        .filter(exam_id=session.exam_id)
+        .order_by("order", "id")
+        .values_list("id", flat=True)
+    )
+
+
+def session_deck(session) -> Deck:
+    return get_deck(session, session_question_ids(session))
@@ -0,0 +1,772 @@
+# liveExam/engine.py
+"""
+Live sessiya üçün yaddaşdaxili state engine.
+
+Əvvəl hər cavab ~8 sync ORM sorğusu idi (session, player, exists, question,
+correct ids, insert, player.save, progress count). İndi:
+- sessiyanın aktiv sualı, cavab açarı, vaxtı, oyunçu balları və "cavab verənlər"
+  dəsti prosesin yaddaşında saxlanılır
+- cavab yaddaşda yoxlanılır və hesablanır (DB yoxdur)
+- LiveAnswer sətirləri write-behind ilə batch yazılır: reveal-də, ölçü/vaxt
+  həddində və proses dayananda; bal artımı F() ilə (itən increment olmur)
+- yazılmamış cavablar append-only journal-a düşür, çökmədən sonra replay olunur
+- answer_progress hər cavabdan sonra yox, qısa tick-lə (dəyişibsə) yalnız
+  host-a və progress-ə abunə olanlara göndərilir
+- leaderboard və sual nəticələri yaddaşda artımlı saxlanılır (reveal-də DB yoxdur)
+- aktiv sualın variant histogramı yaddaşdadır: host-a seyrək tick-lə
+  (answer_histogram) gedir, reveal-də bir dəfə LiveQuestionStat-a yazılır
+
+Engine prosesə bağlıdır (consumer hansı prosesdədirsə orada). Aktiv sual
+dəyişəndə views `invalidate()` edir, növbəti cavab gələndə state bir dəfə
+DB-dən yenidən yüklənir -> başqa prosesdən edilən keçidlər də görünür
+(deck-də cari sualdan sonra gələn id ilə cavab = keçid; köhnə sualın gecikmiş
+cavabları reload etmədən rədd olunur).
+
+Cavab pəncərəsi server tərəfindədir: sualın deadline-ı yaddaşdadır, reveal /
+finish sualı bağlayır (`close_question`), answer_ms client-dən yox, sualın
+başlama vaxtından hesablanır. Reveal başqa prosesdə edilibsə bu engine-i yalnız
+deadline bağlayır.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import atexit
+import heapq
+import itertools
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+
+from liveExam.deck import session_deck
+from liveExam.journal import AppendJournal
+from liveExam.leaderboard import Leaderboard
+from liveExam.models import LiveSession, LivePlayer, LiveAnswer, LiveQuestionStat
+
+
+# write-behind hədləri: bu qədər cavab yığılanda və ya bu qədər saniyə keçəndə flush
+FLUSH_MAX_PENDING = getattr(settings, "LIVE_FLUSH_MAX_PENDING", 200)
+FLUSH_INTERVAL = getattr(settings, "LIVE_FLUSH_INTERVAL", 2.0)
+JOURNAL_FSYNC = getattr(settings, "LIVE_JOURNAL_FSYNC", False)
+
+# sessiya tick-i (progress coalescing) və boş qalanda task-ın dayanma müddəti
+TICK_SECONDS = getattr(settings, "LIVE_TICK_SECONDS", 0.25)
+TICK_IDLE_STOP = 20  # bu qədər boş tick-dən sonra task dayanır, növbəti cavab yenidən başladır
+# host-a variant histogramı ən çox bu qədər saniyədə bir (dəyişibsə)
+HISTOGRAM_SECONDS = getattr(settings, "LIVE_HISTOGRAM_SECONDS", 1.0)
+# deadline-dan sonra şəbəkə gecikməsi üçün güzəşt
+ANSWER_GRACE_SECONDS = getattr(settings, "LIVE_ANSWER_GRACE_SECONDS", 0.5)
+# deck-də irəlidəki id ilə gələn, amma keçid tapılmayan cavablar üçün reload arası
+STALE_RELOAD_SECONDS = 1.0
+
+
+def host_group(pin: str) -> str:
+    return f"live_{pin}_host"
+
+
+def progress_group(pin: str) -> str:
+    """answer_progress-ə abunə olan (host olmayan) client-lər."""
+    return f"live_{pin}_progress"
+
+
+@dataclass(frozen=True)
+class QuestionKey:
+    """Aktiv sualın hesablama üçün lazım olan hissəsi."""
+    question_id: int
+    correct_ids: frozenset
+    option_ids: frozenset  # bu suala aid bütün variantlar (deck-dən)
+    base_points: int
+    total_ms: int
+    started_at: float = 0.0  # epoch saniyə; 0 -> vaxt yoxdur
+    ends_at: float = 0.0
+
+
+@dataclass
+class PlayerState:
+    client_id: str
+    score: int = 0
+    nickname: str = ""
+    avatar_key: str = ""
+    join_key: float = 0.0  # qoşulma vaxtı (leaderboard-da bərabər balda sıra)
+
+
+@dataclass
+class LiveEngine:
+    pin: str
+    session_id: Optional[int] = None
+    loaded: bool = False
+
+    question: Optional[QuestionKey] = None
+    # sual reveal / finish olunub -> cavab qəbul olunmur
+    closed: bool = False
+    # deck-də cari sualdan sonrakı id-lər (yalnız bunlar keçid sayılıb reload edir)
+    ahead: frozenset = frozenset()
+    players: Dict[int, PlayerState] = field(default_factory=dict)
+    answered: Set[int] = field(default_factory=set)
+    # aktiv sual üzrə: player_id -> (is_correct, awarded_points, seq)
+    results: Dict[int, Tuple[bool, int, int]] = field(default_factory=dict)
+    # aktiv sual üzrə: option_id -> seçən oyunçu sayı, cavab vaxtlarının cəmi
+    option_counts: Dict[int, int] = field(default_factory=dict)
+    answer_ms_total: int = 0
+    board: Leaderboard = field(default_factory=Leaderboard)
+
+    pending: List[Dict[str, Any]] = field(default_factory=list)
+
+    def __post_init__(self):
+        self.lock = threading.RLock()
+        self.flush_lock = threading.Lock()
+        self.journal = AppendJournal(f"live_{self.pin}", fsync=JOURNAL_FSYNC)
+        self._replayed = False
+        self._writer: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._ticker: Optional[asyncio.Task] = None
+        self._load_lock: Optional[asyncio.Lock] = None
+        self._loaded_at = 0.0
+        self._seq = itertools.count(1)
+        self._progress_dirty = False
+        self._histogram_dirty = False
+        self._histogram_sent = 0.0
+
+    # ---------------- load / invalidate ----------------
+
+    def invalidate(self) -> None:
+        """Aktiv sual dəyişdi -> növbəti cavabda state DB-dən yenilənsin."""
+        with self.lock:
+            self.loaded = False
+
+    def close_question(self) -> None:
+        """Reveal / finish: aktiv suala bundan sonra gələn cavablar rədd olunur."""
+        with self.lock:
+            self.closed = True
+
+    def is_ready_for(self, question_id: int) -> bool:
+        """
+        Yükləmə lazım deyil: engine bu sual üçün yüklənib, və ya id köhnədir
+        (cari sual və ya deck-də ondan əvvəlki) -> submit özü rədd edir.
+        Yalnız deck-də irəlidəki id (real keçid) reload edir; o da tapılmasa
+        STALE_RELOAD_SECONDS-da bir dəfədən çox yox.
+        """
+        with self.lock:
+            if not self.loaded or self.question is None:
+                return False
+            if self.question.question_id == question_id or question_id not in self.ahead:
+                return True
+            return time.monotonic() - self._loaded_at < STALE_RELOAD_SECONDS
+
+    async def ensure_loaded(self, question_id: int) -> bool:
+        """
+        Consumer üçün: state bu sual üçün hazır deyilsə yükləyir.
+        Eyni anda gələn cavablar bir load-u gözləyir (hər biri ayrıca yükləmir
+        və bir-birinin yaddaşdakı nəticəsini üstələmir).
+        Sessiya tapılmasa False.
+        """
+        if self.is_ready_for(question_id):
+            return True
+        if self._load_lock is None:
+            self._load_lock = asyncio.Lock()
+        async with self._load_lock:
+            if self.is_ready_for(question_id):
+                return True
+            return await database_sync_to_async(self.load)(question_id)
+
+    def load(self, question_id_hint: Optional[int] = None) -> bool:
+        """
+        Sessiya state-ini DB-dən yükləyir (sync, database_sync_to_async ilə çağır).
+        Yaddaşdakı yazılmamış cavablar əvvəlcə flush olunur ki, itməsin;
+        prosesdə ilk yükləmədə əvvəlki çökmədən qalan journal replay olunur.
+        """
+        if not self._replayed:
+            replay_journal(self.pin)
+            self._replayed = True
+        self.flush()
+
+        session = LiveSession.objects.select_related("exam").filter(pin=self.pin).first()
+        if not session:
+            return False
+
+        question = None
+        ahead = frozenset()
+        qid = session.current_question_id or question_id_hint
+        deck = session_deck(session)
+        dq = deck.get(int(qid)) if qid else None
+        if dq:
+            total_ms = 0
+            started_at = ends_at = 0.0
+            if session.question_started_at and session.question_ends_at:
+                total_ms = int((session.question_ends_at - session.question_started_at).total_seconds() * 1000)
+                started_at = session.question_started_at.timestamp()
+                ends_at = session.question_ends_at.timestamp()
+            question = QuestionKey(
+                question_id=dq.id,
+                correct_ids=dq.correct_ids,
+                option_ids=dq.option_ids,
+                base_points=dq.score_base,
+                total_ms=total_ms,
+                started_at=started_at,
+                ends_at=ends_at,
+            )
+            position = deck.questions.index(dq)
+            ahead = frozenset(q.id for q in deck.questions[position + 1:])
+
+        players = {
+            p["id"]: PlayerState(
+                client_id=p["client_id"],
+                score=int(p["score"] or 0),
+                nickname=p["nickname"],
+                avatar_key=p["avatar_key"],
+                join_key=p["created_at"].timestamp(),
+            )
+            for p in (
+                LivePlayer.objects
+                .filter(session_id=session.id, is_connected=True)  # lobby-dən çıxanlar sayılmır
+                .values("id", "client_id", "score", "nickname", "avatar_key", "created_at")
+            )
+        }
+        results = {}
+        option_counts: Dict[int, int] = {}
+        answer_ms_total = 0
+        if question:
+            rows = (
+                LiveAnswer.objects
+                .filter(session_id=session.id, question_id=question.question_id)
+                .order_by("created_at", "id")
+                .values_list("player_id", "is_correct", "awarded_points", "choice_ids", "choice_id", "answer_ms")
+            )
+            for pid, ok, pts, choice_ids, choice_id, answer_ms in rows:
+                results[pid] = (bool(ok), int(pts or 0), next(self._seq))
+                for oid in _answer_choices(choice_ids, choice_id):
+                    option_counts[oid] = option_counts.get(oid, 0) + 1
+                answer_ms_total += int(answer_ms or 0)
+
+        with self.lock:
+            self.session_id = session.id
+            self.question = question
+            self.closed = session.state != LiveSession.STATE_QUESTION
+            self.ahead = ahead
+            self.players = players
+            self.answered = set(results)
+            self.results = results
+            self.option_counts = option_counts
+            self.answer_ms_total = answer_ms_total
+            # əvvəlki raundların yer məlumatı (delta üçün) saxlanılır
+            self.board.clear_scores()
+            for pid, p in players.items():
+                self.board.set_score(pid, p.score, p.join_key)
+            self.loaded = True
+            self._loaded_at = time.monotonic()
+            self._progress_dirty = True
+            self._histogram_dirty = True
+        return True
+
+    # ---------------- players ----------------
+
+    def has_player(self, player_id: int, client_id: str) -> bool:
+        with self.lock:
+            p = self.players.get(player_id)
+            return p is not None and p.client_id == client_id
+
+    def add_player(self, player_id: int, client_id: str, score: int = 0, *,
+                   nickname: str = "", avatar_key: str = "", joined_at=None) -> None:
+        with self.lock:
+            if player_id not in self.players:
+                p = PlayerState(
+                    client_id=client_id,
+                    score=int(score or 0),
+                    nickname=nickname,
+                    avatar_key=avatar_key,
+                    join_key=(joined_at or timezone.now()).timestamp(),
+                )
+                self.players[player_id] = p
+                self.board.set_score(player_id, p.score, p.join_key)
+                self._progress_dirty = True
+
+    def load_player(self, player_id: int, client_id: str) -> bool:
+        """Yaddaşda olmayan oyunçu (sonradan qoşulub) -> bir dəfə DB-dən."""
+        row = (
+            LivePlayer.objects
+            .filter(id=player_id, session_id=self.session_id, client_id=client_id)
+            .values("score", "nickname", "avatar_key", "created_at")
+            .first()
+        )
+        if row is None:
+            return False
+        self.add_player(
+            player_id, client_id, row["score"],
+            nickname=row["nickname"], avatar_key=row["avatar_key"], joined_at=row["created_at"],
+        )
+        return True
+
+    # ---------------- answers ----------------
+
+    def submit(self, player_id: int, question_id: int, option_ids: List[int], *,
+               now: Optional[float] = None) -> Tuple[bool, Any]:
+        """
+        Cavabı yaddaşda hesablayır. Nəticə əvvəlki `_save_answer_and_score`
+        ilə eyni formadadır. DB-yə yazı `pending`-ə düşür.
+        answer_ms serverdə sualın başlama vaxtından hesablanır (client-ə etibar yoxdur).
+        """
+        now = time.time() if now is None else now
+        with self.lock:
+            q = self.question
+            if q is None or q.question_id != question_id:
+                return False, "Question not found"
+
+            if self.closed or (q.ends_at and now > q.ends_at + ANSWER_GRACE_SECONDS):
+                return False, "Question closed"
+
+            player = self.players.get(player_id)
+            if player is None:
+                return False, "Player not found"
+
+            # idempotent (1 sual = 1 cavab)
+            if player_id in self.answered:
+                return True, {"message": "Already answered", "score": player.score}
+
+            if not q.correct_ids:
+                return False, "No correct options marked for this question"
+
+            selected_set = set(int(x) for x in option_ids)
+            if not selected_set <= q.option_ids:
+                return False, "Invalid option"
+            is_perfect = (selected_set == q.correct_ids)
+
+            # partial scoring (penalty)
+            T = len(selected_set & q.correct_ids)
+            W = len(selected_set - q.correct_ids)
+            C = len(q.correct_ids)
+            fraction = min(1.0, max(0.0, (T - W) / float(C)))
+
+            base = q.base_points
+            bonus = 0
+            answer_ms = 0
+            if q.total_ms > 0:
+                answer_ms = max(0, min(int((now - q.started_at) * 1000), q.total_ms))
+                bonus = int(((q.total_ms - answer_ms) / q.total_ms) * 500)
+
+            awarded = int((base + bonus) * fraction)
+
+            player.score += awarded
+            self.answered.add(player_id)
+            self.results[player_id] = (is_perfect, awarded, next(self._seq))
+            self.board.set_score(player_id, player.score, player.join_key)
+            for oid in selected_set:
+                self.option_counts[oid] = self.option_counts.get(oid, 0) + 1
+            self.answer_ms_total += int(answer_ms)
+            self._progress_dirty = True
+            self._histogram_dirty = True
+            entry = {
+                "player_id": player_id,
+                "question_id": question_id,
+                "choice_ids": list(option_ids),
+                "is_correct": is_perfect,
+                "answer_ms": int(answer_ms),
+                "awarded_points": awarded,
+            }
+            self.pending.append(entry)
+            self.journal.append({"session_id": self.session_id, **entry})
+
+            return True, {
+                "is_correct": is_perfect,
+                "fraction": round(float(fraction), 4),
+                "picked_correct": T,
+                "picked_wrong": W,
+                "correct_total": C,
+                "awarded_points": awarded,
+                "base": base,
+                "bonus": bonus,
+                "score": player.score,
+            }
+
+    def answer_progress(self, question_id: Optional[int] = None) -> dict:
+        with self.lock:
+            current = self.question.question_id if self.question else None
+            if question_id is None:
+                question_id = current
+            answered = len(self.answered) if current is not None and current == question_id else 0
+            return {
+                "question_id": question_id,
+                "answered_count": answered,
+                "total_players": len(self.players),
+            }
+
+    def answer_histogram(self) -> Optional[Dict[str, Any]]:
+        """Aktiv sualın variant paylanması (yalnız host-a; reveal-dən əvvəl oyunçulara getmir)."""
+        with self.lock:
+            q = self.question
+            if q is None:
+                return None
+            return {
+                "type": "answer_histogram",
+                "question_id": q.question_id,
+                "answered_count": len(self.answered),
+                "total_players": len(self.players),
+                # str açar: channel layer (msgpack) int map açarını qəbul etmir
+                "option_counts": {str(oid): self.option_counts.get(oid, 0) for oid in sorted(q.option_ids)},
+            }
+
+    def question_summary(self, question_id: int) -> Optional[Dict[str, Any]]:
+        """LiveQuestionStat sətri üçün; sual aktiv deyilsə / yüklənməyibsə None -> DB fallback."""
+        with self.lock:
+            q = self.question
+            if not self.loaded or q is None or q.question_id != question_id:
+                return None
+            answered = len(self.answered)
+            return {
+                "total_players": len(self.players),
+                "answered_count": answered,
+                "correct_count": sum(1 for ok, _, _ in self.results.values() if ok),
+                "avg_answer_ms": self.answer_ms_total // answered if answered else 0,
+                "option_counts": {str(oid): self.option_counts.get(oid, 0) for oid in sorted(q.option_ids)},
+            }
+
+    # ---------------- leaderboard ----------------
+
+    def _round_key(self):
+        return self.question.question_id if self.question else None
+
+    def top_players(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """_serialize_top ilə eyni forma + rank/delta. O(K log N), DB yoxdur."""
+        with self.lock:
+            round_key = self._round_key()
+            out = []
+            for pid in self.board.top(limit):
+                p = self.players[pid]
+                rank, delta = self.board.standing(pid, round_key)
+                out.append({
+                    "nickname": p.nickname,
+                    "avatar_key": p.avatar_key,
+                    "score": p.score,
+                    "rank": rank,
+                    "delta": delta,
+                })
+            return out
+
+    def player_standing(self, player_id: int) -> Optional[Dict[str, Any]]:
+        """Bir oyunçunun yeri ("sən #137-sən"), O(log N)."""
+        with self.lock:
+            p = self.players.get(player_id)
+            if p is None:
+                return None
+            rank, delta = self.board.standing(player_id, self._round_key())
+            return {"rank": rank, "delta": delta, "score": p.score, "total": len(self.board)}
+
+    def question_results(self, question_id: int, limit: int = 50) -> Optional[List[Dict[str, Any]]]:
+        """
+        _serialize_question_results-in yaddaşdan versiyası.
+        Sual aktiv sual deyilsə (və ya engine yüklənməyib) None -> DB fallback.
+        """
+        with self.lock:
+            if not self.loaded or self.question is None or self.question.question_id != question_id:
+                return None
+            best = heapq.nlargest(limit, self.results.items(), key=lambda kv: (kv[1][1], kv[1][2]))
+            out = []
+            for pid, (ok, pts, _) in best:
+                p = self.players.get(pid)
+                if p is None:
+                    continue
+                out.append({
+                    "nickname": p.nickname,
+                    "avatar_key": p.avatar_key,
+                    "is_correct": ok,
+                    "awarded_points": pts,
+                    "total_score": p.score,
+                })
+            return out
+
+    # ---------------- tick ----------------
+
+    def ensure_ticker(self) -> None:
+        """Event loop-dan çağırılır: sessiya tick task-ı işləmirsə başladır."""
+        if self._ticker is None or self._ticker.done():
+            self._ticker = asyncio.get_running_loop().create_task(self._tick_loop())
+
+    async def _tick_loop(self) -> None:
+        idle = 0
+        while idle < TICK_IDLE_STOP:
+            await asyncio.sleep(TICK_SECONDS)
+            if await self._on_tick():
+                idle = 0
+            else:
+                idle += 1
+
+    async def _on_tick(self) -> bool:
+        """
+        Bir tick: dəyişiklik varsa göndərir. Nəsə göndəribsə True.
+        N cavab -> N*N mesaj yox, tick başına host-a 1 mesaj.
+        """
+        now = time.monotonic()
+        with self.lock:
+            dirty, self._progress_dirty = self._progress_dirty, False
+            # histogram progress-dən seyrək: yığılır, HISTOGRAM_SECONDS-da bir dəfə gedir
+            histogram_due = self._histogram_dirty and now - self._histogram_sent >= HISTOGRAM_SECONDS
+            if histogram_due:
+                self._histogram_dirty = False
+                self._histogram_sent = now
+            waiting = self._histogram_dirty
+        if not dirty and not histogram_due:
+            return waiting
+
+        layer = get_channel_layer()
+        if dirty:
+            event = {"type": "play_event", "data": {"type": "answer_progress", **self.answer_progress()}}
+            await layer.group_send(host_group(self.pin), event)
+            await layer.group_send(progress_group(self.pin), event)
+        if histogram_due:
+            histogram = self.answer_histogram()
+            if histogram is not None:
+                await layer.group_send(host_group(self.pin), {"type": "play_event", "data": histogram})
+        return True
+
+    # ---------------- persistence ----------------
+
+    def flush(self) -> int:
+        """
+        Yığılmış cavabları DB-yə yazır (sync). Journal seqmenti yalnız yazı
+        commit olunandan sonra silinir. Yazılan cavab sayını qaytarır.
+        """
+        with self.flush_lock:
+            with self.lock:
+                batch, self.pending = self.pending, []
+                session_id = self.session_id
+                sealed = self.journal.seal()
+            if not batch:
+                AppendJournal.discard(sealed)
+                return 0
+
+            try:
+                written = persist_answers(session_id, batch)
+            except Exception:
+                # növbəti flush-da yenidən cəhd (persist idempotentdir)
+                with self.lock:
+                    self.pending[:0] = batch
+                raise
+
+            AppendJournal.discard(sealed)
+            return written
+
+    def schedule_flush(self) -> None:
+        """
+        Event loop-dan çağırılır: write-behind task yoxdursa işə salır,
+        ölçü həddi keçilibsə onu dərhal oyadır.
+        """
+        if self._writer is None or self._writer.done():
+            self._wake = asyncio.Event()
+            self._writer = asyncio.get_running_loop().create_task(self._write_behind())
+        with self.lock:
+            full = len(self.pending) >= FLUSH_MAX_PENDING
+        if full:
+            self._wake.set()
+
+    async def _write_behind(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+            try:
+                await database_sync_to_async(self.flush)()
+            except Exception:
+                # DB müvəqqəti əlçatmazdır -> cavablar pending/journal-da qalır
+                pass
+
+            with self.lock:
+                if not self.pending:
+                    return
+
+
+def persist_answers(session_id: int, batch: List[Dict[str, Any]]) -> int:
+    """
+    Cavab batch-ini bir tranzaksiyada yazır:
+    - artıq DB-də olan (player, question) cütləri atılır (replay/təkrar flush idempotent)
+    - bir bulk_create
+    - bir UPDATE: score = F("score") + delta (paralel consumer-lər increment itirmir)
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        existing = set(
+            LiveAnswer.objects
+            .filter(
+                session_id=session_id,
+                player_id__in={a["player_id"] for a in batch},
+                question_id__in={a["question_id"] for a in batch},
+            )
+            .values_list("player_id", "question_id")
+        )
+
+        fresh = []
+        for a in batch:
+            key = (a["player_id"], a["question_id"])
+            if key in existing:
+                continue
+            existing.add(key)
+            fresh.append(a)
+
+        if not fresh:
+            return 0
+
+        LiveAnswer.objects.bulk_create(
+            [
+                LiveAnswer(
+                    session_id=session_id,
+                    player_id=a["player_id"],
+                    question_id=a["question_id"],
+                    choice_id=(a["choice_ids"][0] if a["choice_ids"] else None),
+                    choice_ids=a["choice_ids"],
+                    is_correct=a["is_correct"],
+                    answer_ms=a["answer_ms"],
+                    awarded_points=a["awarded_points"],
+                )
+                for a in fresh
+            ],
+            batch_size=500,
+        )
+
+        deltas: Dict[int, int] = defaultdict(int)
+        for a in fresh:
+            deltas[a["player_id"]] += int(a["awarded_points"])
+
+        LivePlayer.objects.filter(id__in=deltas).update(
+            score=F("score") + Case(
+                *[When(id=pid, then=Value(d)) for pid, d in deltas.items()],
+                default=Value(0),
+                output_field=IntegerField(),
+            ),
+            last_seen=now,
+        )
+    return len(fresh)
+
+
+def _answer_choices(choice_ids, choice_id) -> List[int]:
+    """LiveAnswer-in seçimləri (multi: choice_ids; köhnə single sətirlər: choice_id)."""
+    if choice_ids:
+        return list(dict.fromkeys(int(x) for x in choice_ids))
+    return [int(choice_id)] if choice_id else []
+
+
+def summarize_answers(session_id: int, question_id: int, option_ids) -> Dict[str, Any]:
+    """question_summary-nin DB versiyası (engine bu sualı saxlamırsa): bir sorğu."""
+    counts = {int(oid): 0 for oid in option_ids}
+    answered = correct = ms_total = 0
+    rows = (
+        LiveAnswer.objects
+        .filter(session_id=session_id, question_id=question_id)
+        .values_list("choice_ids", "choice_id", "is_correct", "answer_ms")
+    )
+    for choice_ids, choice_id, ok, answer_ms in rows:
+        answered += 1
+        correct += 1 if ok else 0
+        ms_total += int(answer_ms or 0)
+        for oid in _answer_choices(choice_ids, choice_id):
+            counts[oid] = counts.get(oid, 0) + 1
+    return {
+        "total_players": LivePlayer.objects.filter(session_id=session_id, is_connected=True).count(),
+        "answered_count": answered,
+        "correct_count": correct,
+        "avg_answer_ms": ms_total // answered if answered else 0,
+        "option_counts": {str(oid): n for oid, n in sorted(counts.items())},
+    }
+
+
+def persist_question_stat(session: LiveSession, question_id: int, option_ids) -> Dict[str, Any]:
+    """
+    Reveal-də: sualın xülasəsini bir dəfə yazır (təkrar reveal mövcud sətri
+    dəyişmir) və onu qaytarır. Cavablar əvvəlcə flush olunmalıdır.
+    """
+    engine = peek_engine(session.pin)
+    summary = engine.question_summary(question_id) if engine is not None else None
+    if summary is None:
+        summary = summarize_answers(session.id, question_id, option_ids)
+    LiveQuestionStat.objects.bulk_create(
+        [LiveQuestionStat(session_id=session.id, question_id=question_id, **summary)],
+        ignore_conflicts=True,
+    )
+    return summary
+
+
+def replay_journal(pin: str) -> int:
+    """
+    Əvvəlki prosesdən qalan journal seqmentlərini DB-yə yazır və silir.
+    persist_answers idempotent olduğu üçün artıq yazılmış cavablar ikiqat sayılmır.
+    """
+    journal = AppendJournal(f"live_{pin}")
+    written = 0
+    for path in journal.segments():
+        by_session: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        for rec in journal.read(path):
+            sid = rec.pop("session_id", None)
+            if sid:
+                by_session[sid].append(rec)
+        for sid, batch in by_session.items():
+            written += persist_answers(sid, batch)
+        AppendJournal.discard(path)
+    return written
+
+
+# -------------------------
+# Registry (proses daxilində pin -> engine)
+# -------------------------
+
+_ENGINES: Dict[str, LiveEngine] = {}
+_ENGINES_LOCK = threading.Lock()
+
+
+def get_engine(pin: str) -> LiveEngine:
+    pin = str(pin)
+    with _ENGINES_LOCK:
+        engine = _ENGINES.get(pin)
+        if engine is None:
+            engine = _ENGINES[pin] = LiveEngine(pin=pin)
+        return engine
+
+
+def peek_engine(pin: str) -> Optional[LiveEngine]:
+    """Engine yaradılmayıbsa None (views üçün: boş yerə yaratmasın)."""
+    with _ENGINES_LOCK:
+        return _ENGINES.get(str(pin))
+
+
+def flush_session(pin: str) -> int:
+    """
+    Reveal/finish üçün: bu prosesdə engine varsa onu flush edir,
+    yoxdursa (məs. restartdan sonra) journal-da qalanları replay edir.
+    """
+    engine = peek_engine(pin)
+    if engine is not None:
+        return engine.flush()
+    return replay_journal(pin)
+
+
+def drop_engine(pin: str) -> None:
+    with _ENGINES_LOCK:
+        engine = _ENGINES.pop(str(pin), None)
+    if engine is not None:
+        # köhnə istinadla gələn cavab artıq bal almasın
+        engine.close_question()
+        engine.flush()
+        engine.journal.close()
+    else:
+        replay_journal(pin)
+
+
+@atexit.register
+def _flush_all_engines() -> None:
+    """Proses dayananda yaddaşdakı cavablar itməsin."""
+    with _ENGINES_LOCK:
+        engines = list(_ENGINES.values())
+    for engine in engines:
+        try:
+            engine.flush()
+        except Exception:
+            # yazıla bilmədi -> journal-da qalır, növbəti startda replay olunacaq
+            pass
@@ -0,0 +1,125 @@
+# liveExam/events.py
+"""
+Sessiya event-lərinin yaddaşdaxili ring buffer-i (reconnect catch-up).
+
+Play qrupuna gedən hər oyun event-i (question_published / reveal / finished)
+ardıcıl `seq` nömrəsi ilə buraya yazılır və payload-a `seq` əlavə olunur.
+Qopub qayıdan client son gördüyü seq-i göndərir və yalnız qaçırdıqlarını alır:
+- since(seq) -> buraxılmış event-lər (siyahı, boş ola bilər)
+- buffer dolub köhnə event-lər atılıbsa / seq tanınmırsa -> None (client-ə snapshot)
+
+answer_progress (tick) və lobby delta-ları bura düşmür: birincisi keçicidir,
+ikincisinin öz version/resync mexanizmi var.
+
+LIVE_EVENT_JOURNAL=True olanda event-lər AppendJournal-a da yazılır; proses
+restartından sonra buffer və seq oradan bərpa olunur (client-lər snapshot-a
+düşmür).
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from django.conf import settings
+
+from liveExam.journal import AppendJournal
+
+
+EVENT_LOG_SIZE = getattr(settings, "LIVE_EVENT_LOG_SIZE", 256)
+EVENT_JOURNAL = getattr(settings, "LIVE_EVENT_JOURNAL", False)
+
+LOGGED_TYPES = ("question_published", "reveal", "finished")
+
+
+class EventLog:
+    def __init__(self, pin: str, size: int = EVENT_LOG_SIZE):
+        self.pin = pin
+        # yeni log seq-i saatdan başlayır: restartdan sonra köhnə client-in seq-i
+        # yeni log-da təsadüfən "keçərli" görünməsin (since -> None -> snapshot)
+        self.seq = int(time.time() * 1000)
+        self.lock = threading.Lock()
+        self.events: Deque[Dict[str, Any]] = deque(maxlen=size)
+        self.journal = AppendJournal(f"events_{pin}") if EVENT_JOURNAL else None
+        if self.journal is not None:
+            self._restore()
+
+    def _restore(self) -> None:
+        for path in self.journal.segments():
+            for rec in AppendJournal.read(path):
+                if isinstance(rec.get("seq"), int):
+                    self.events.append(rec)
+        if self.events:
+            self.seq = self.events[-1]["seq"]
+
+    def append(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """payload-u seq ilə qeyd edir və seq-li nüsxəni qaytarır (onu göndər)."""
+        with self.lock:
+            self.seq += 1
+            event = {**payload, "seq": self.seq}
+            self.events.append(event)
+            if self.journal is not None:
+                self.journal.append(event)
+            return event
+
+    def since(self, seq: int) -> Optional[List[Dict[str, Any]]]:
+        """seq-dən sonrakı event-lər; aradakılar artıq buffer-də deyilsə None."""
+        with self.lock:
+            if seq > self.seq:
+                return None  # başqa (restart olmuş) log-un seq-i
+            if seq == self.seq:
+                return []
+            oldest = self.events[0]["seq"] if self.events else self.seq + 1
+            if seq + 1 < oldest:
+                return None  # rollover
+            return [e for e in self.events if e["seq"] > seq]
+
+    def close(self) -> None:
+        if self.journal is not None:
+            self.journal.close()
+            for path in self.journal.segments():
+                AppendJournal.discard(path)
+
+
+_LOGS: Dict[str, EventLog] = {}
+_LOGS_LOCK = threading.Lock()
+
+
+def get_log(pin: str) -> EventLog:
+    pin = str(pin)
+    with _LOGS_LOCK:
+        log = _LOGS.get(pin)
+        if log is None:
+            log = _LOGS[pin] = EventLog(pin)
+        return log
+
+
+def peek_log(pin: str) -> Optional[EventLog]:
+    """Yalnız mövcud log (yaddaşda və ya journal-da); yenisini yaratmır."""
+    pin = str(pin)
+    with _LOGS_LOCK:
+        log = _LOGS.get(pin)
+    if log is None and EVENT_JOURNAL and AppendJournal(f"events_{pin}").segments():
+        log = get_log(pin)
+    return log
+
+
+def drop_log(pin: str) -> None:
+    with _LOGS_LOCK:
+        log = _LOGS.pop(str(pin), None)
+    if log is not None:
+        log.close()
+
+
+def record(pin: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Oyun event-idirsə log-a yazıb seq-li payload qaytarır, deyilsə olduğu kimi."""
+    if payload.get("type") not in LOGGED_TYPES:
+        return payload
+    return get_log(pin).append(payload)
+
+
+def current_seq(pin: str) -> int:
+    """Snapshot-un seq-i: client bundan sonrakı event-ləri since ilə ala bilər."""
+    return get_log(pin).seq
@@ -0,0 +1,501 @@
+# liveExam/game.py
+"""
+Live oyunun axını (Kahoot flow): sual yayımla -> reveal -> next -> finish.
+
+Bu funksiyalar request-dən asılı deyil: host view-ları (HTTP), host websocket-i
+və server saatı (clock.py) eyni yolu çağırır.
+
+Hərəkətlər sync-dir (DB). `out` verilməyibsə event-lər dərhal async_to_sync ilə
+göndərilir (view-lar); verilibsə siyahıya yığılır və run_action onları DB
+hissəsi bitəndən sonra event loop-da native `await group_send` ilə göndərir
+(worker thread group_send-də bloklanmır).
+
+⚠️ views bunu import edir, bu isə views-u import etmir (consumers də istifadə edir).
+"""
+
+from __future__ import annotations
+
+import json
+import random
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.urls import reverse
+from django.utils import timezone
+
+from liveExam import clock
+from liveExam.deck import Deck, DeckQuestion, _safe_int, compile_deck, drop_deck, session_deck, store_deck
+from liveExam.engine import get_engine, peek_engine, drop_engine, flush_session, persist_question_stat
+from liveExam.events import current_seq, drop_log, record
+from liveExam.lobby import drop_roster
+from liveExam.models import LiveSession, LiveAnswer
+from liveExam.report import store_report
+from blog.models import ExamQuestion
+
+# (group_suffix, payload) - hərəkətin göndərəcəyi event-lər
+Outbox = List[Tuple[str, Dict[str, Any]]]
+
+
+# ------------------------
+# Broadcast (Channels group_send)
+# ------------------------
+
+def _group_message(pin: str, payload: dict, group_suffix: str) -> Tuple[str, dict]:
+    """
+    group_suffix: 'lobby' | 'play'
+    Consumer-lər:
+      - LiveLobbyConsumer -> lobby_event
+      - LivePlayConsumer / LiveHostConsumer -> play_event
+    """
+    event_type = "play_event" if group_suffix == "play" else "lobby_event"
+    return f"live_{pin}_{group_suffix}", {"type": event_type, "data": payload}
+
+
+def broadcast(pin: str, payload: dict, group_suffix: str) -> None:
+    group, message = _group_message(pin, payload, group_suffix)
+    async_to_sync(get_channel_layer().group_send)(group, message)
+
+
+def _emit(out: Optional[Outbox], pin: str, payload: dict, group_suffix: str) -> None:
+    # oyun event-ləri seq alır (reconnect catch-up üçün event log-a yazılır)
+    if group_suffix == "play":
+        payload = record(pin, payload)
+    if out is None:
+        broadcast(pin, payload, group_suffix)
+    else:
+        out.append((group_suffix, payload))
+
+
+# ------------------------
+# Serializers
+# ------------------------
+
+def serialize_top(session: LiveSession, limit: int = 10) -> List[Dict[str, Any]]:
+    return list(
+        session.players.order_by("-score", "created_at")
+        .values("nickname", "avatar_key", "score")[:limit]
+    )
+
+
+def serialize_question_results(session: LiveSession, question_id: int, limit: int = 50) -> List[Dict[str, Any]]:
+    """
+    Reveal zamanı: bu sual üzrə kim nə qədər bal aldı, total score nədir.
+    """
+    answers = (
+        LiveAnswer.objects
+        .filter(session=session, question_id=question_id)
+        .select_related("player")
+        .order_by("-awarded_points", "-created_at")
+    )[:limit]
+
+    out: List[Dict[str, Any]] = []
+    for a in answers:
+        out.append({
+            "nickname": a.player.nickname,
+            "avatar_key": a.player.avatar_key,
+            "is_correct": bool(a.is_correct),
+            "awarded_points": _safe_int(a.awarded_points, 0),
+            "total_score": _safe_int(a.player.score, 0),
+        })
+    return out
+
+
+def live_top(session: LiveSession, limit: int = 10) -> List[Dict[str, Any]]:
+    """
+    Yaddaşdakı leaderboard (engine bu prosesdədirsə) - DB sorğusu yoxdur.
+    Əks halda serialize_top.
+    """
+    engine = peek_engine(session.pin)
+    if engine is not None and engine.loaded:
+        return engine.top_players(limit)
+    return serialize_top(session, limit=limit)
+
+
+def live_question_results(session: LiveSession, question_id: int, limit: int = 50) -> List[Dict[str, Any]]:
+    engine = peek_engine(session.pin)
+    results = engine.question_results(question_id, limit) if engine is not None else None
+    if results is None:
+        results = serialize_question_results(session, question_id, limit=limit)
+    return results
+
+
+# ------------------------
+# Payload builders
+# ------------------------
+
+def build_question_payload(session: LiveSession, dq: DeckQuestion, idx: int, total: int):
+    now = timezone.now()
+    ends = now + timezone.timedelta(seconds=dq.time_limit)
+
+    payload = {
+        "type": "question_published",
+        "question": dq.payload(idx, total, now, ends),
+    }
+    return payload, now, ends
+
+
+def build_reveal_payload(session: LiveSession, question_id: int) -> Dict[str, Any]:
+    """
+    reveal event-i üçün yığcam payload (düzgün id-lər deck-dən, nəticələr engine-dən).
+    """
+    dq = session_deck(session).get(question_id)
+    if not dq:
+        return {"type": "error", "message": "Question not found"}
+
+    return {
+        "type": "reveal",
+        "question_id": question_id,
+        "correct_option_ids": sorted(dq.correct_ids),
+        "results": live_question_results(session, question_id, limit=50),
+        "top": live_top(session, limit=10),
+    }
+
+
+def build_state_snapshot(session: LiveSession) -> Dict[str, Any]:
+    """
+    Cari state (late join / reconnect-də event log kifayət etməyəndə).
+    seq: snapshot-un daxil etdiyi son event - client sonrakıları since ilə alır.
+    """
+    deck = session_deck(session)
+    total = len(deck)
+    finished = session.state == LiveSession.STATE_FINISHED
+
+    data = {
+        "ok": True,
+        "type": "snapshot",
+        "seq": 0 if finished else current_seq(session.pin),
+        "pin": session.pin,
+        "state": session.state,
+        "current_index": int(session.current_index or 0),
+        "total_questions": total,
+        "question_started_at": session.question_started_at.isoformat() if session.question_started_at else None,
+        "question_ends_at": session.question_ends_at.isoformat() if session.question_ends_at else None,
+    }
+
+    if finished:
+        data["top"] = live_top(session, limit=50)
+        return data
+
+    idx = int(session.current_index or 0)
+    dq = deck.at(idx)
+    if not dq:
+        return data
+
+    # ✅ started/ends session-dan gəlməlidir (refresh-də dəyişməsin)
+    started = session.question_started_at
+    ends = session.question_ends_at
+
+    # fallback: əgər started var, ends yoxdursa -> time_limit ilə hesabla
+    if started and not ends:
+        ends = started + timezone.timedelta(seconds=dq.time_limit)
+
+    # variant sırası deck-də sabitdir (refresh-də eyni)
+    data["question"] = dq.payload(idx, total, started, ends)
+
+    # reveal-də correct ids lazımdır
+    data["correct_option_ids"] = sorted(dq.correct_ids) if session.state == LiveSession.STATE_REVEAL else []
+    return data
+
+
+# ------------------------
+# State version + hazır (serialize olunmuş) snapshot
+# ------------------------
+# Reconnect dalğasında hər client live_state_json-u çağırır. Version hər state
+# keçidində artır və hər sorğuda DB-dən oxunur (bir sütunluq bir sorğu): keçidi
+# başqa worker edibsə də köhnə version / ETag verilmir (CACHES prosesə bağlı
+# LocMem ola bilər). Body (pin, version) açarı ilə cache-də bir dəfə serialize
+# olunur - version dəyişəndə açar da dəyişir, köhnə body heç vaxt qaytarılmır.
+
+STATE_CACHE_SECONDS = 60 * 60 * 6
+
+
+def _state_body_key(pin: str, version: int) -> str:
+    return f"live_state:{pin}:{version}"
+
+
+def _save_state(session: LiveSession, fields: List[str]) -> None:
+    """State sahələrini yazır, state_version-u artırır (köhnə ETag / body etibarsız olur)."""
+    session.state_version = int(session.state_version or 0) + 1
+    session.save(update_fields=[*fields, "state_version"])
+
+
+def state_version(pin: str) -> Optional[int]:
+    """Cari version (DB, bir sütun). Sessiya yoxdursa None."""
+    return LiveSession.objects.filter(pin=pin).values_list("state_version", flat=True).first()
+
+
+def state_snapshot_body(pin: str, version: int) -> Optional[Tuple[int, bytes]]:
+    """
+    (pin, version) üçün hazır JSON body; cache-də yoxdursa bir dəfə qurulur.
+    (version, body) qaytarır - arada keçid olubsa version yenisidir.
+    """
+    body = cache.get(_state_body_key(pin, version))
+    if body is None:
+        session = _load_session(pin)
+        if session is None:
+            return None
+        version = session.state_version
+        data = build_state_snapshot(session)
+        data["version"] = version
+        body = json.dumps(data, cls=DjangoJSONEncoder).encode()
+        cache.set(_state_body_key(pin, version), body, STATE_CACHE_SECONDS)
+    return version, body
+
+
+# ------------------------
+# Game actions
+# ------------------------
+
+def publish_question(session: LiveSession, deck: Deck, idx: int, *, out: Optional[Outbox] = None) -> Dict[str, Any]:
+    """deck-dəki idx-ci sualı aktiv edir və play qrupuna yayımlayır."""
+    pin = session.pin
+    dq = deck.at(idx)
+    payload, now, ends = build_question_payload(session=session, dq=dq, idx=idx, total=len(deck))
+
+    session.state = LiveSession.STATE_QUESTION
+    session.current_index = idx
+    session.current_question_id = dq.id
+    session.question_started_at = now
+    session.question_ends_at = ends
+
+    _save_state(session, [
+        "state", "current_index", "current_question_id",
+        "question_started_at", "question_ends_at",
+    ])
+
+    # engine növbəti cavabda yeni sualın açarını yükləsin
+    get_engine(pin).invalidate()
+
+    # auto: reveal-i server saatı edəcək (host brauzerinin timer-i lazım deyil)
+    payload["auto"] = clock.arm_question(pin, dq.id, idx, ends)
+
+    _emit(out, pin, payload, "play")
+    return {"ok": True, "index": idx + 1, "total": len(deck)}
+
+
+def reveal_question(session: LiveSession, expected_question_id: Optional[int] = None, *,
+                    out: Optional[Outbox] = None) -> Dict[str, Any]:
+    """
+    Aktiv sualı bağlayıb nəticələri göstərir.
+    expected_question_id (server saatı üçün): sual artıq dəyişibsə / reveal olunubsa heç nə etmir.
+    """
+    pin = session.pin
+    idx = int(session.current_index or 0)
+    dq = session_deck(session).at(idx)
+    if not dq:
+        return {"ok": False, "message": "Aktiv sual tapılmadı."}
+
+    if expected_question_id is not None:
+        if session.state != LiveSession.STATE_QUESTION or dq.id != expected_question_id:
+            return {"ok": True, "skipped": True}
+
+    session.state = LiveSession.STATE_REVEAL
+    _save_state(session, ["state"])
+
+    # bu andan cavab qəbul olunmur: correct_option_ids yayımlanandan sonra bal yoxdur
+    engine = peek_engine(pin)
+    if engine is not None:
+        engine.close_question()
+
+    # yaddaşda / journal-da gözləyən cavablar nəticələrə düşsün
+    flush_session(pin)
+    summary = persist_question_stat(session, dq.id, dq.option_ids)
+
+    payload = build_reveal_payload(session, dq.id)
+    payload["option_counts"] = summary["option_counts"]
+    payload["revealed_at"] = timezone.now().isoformat()
+
+    next_at = clock.arm_reveal(pin, idx)
+    payload["auto_next_at"] = next_at.isoformat() if next_at else None
+
+    _emit(out, pin, payload, "play")
+    return {"ok": True, "question_id": dq.id}
+
+
+def next_question(session: LiveSession, expected_index: Optional[int] = None, *,
+                  out: Optional[Outbox] = None) -> Dict[str, Any]:
+    """
+    Reveal-dən sonra növbəti sual; suallar qurtarıbsa finish.
+    expected_index (server saatı üçün): host artıq keçibsə heç nə etmir.
+    """
+    if expected_index is not None:
+        if session.state != LiveSession.STATE_REVEAL or int(session.current_index or 0) != expected_index:
+            return {"ok": True, "skipped": True}
+
+    # Kahoot axını:
+    # Reveal mərhələsindən sonra növbəti sual üçün index++ edirik
+    if session.state == LiveSession.STATE_REVEAL:
+        session.current_index = int(session.current_index or 0) + 1
+
+    idx = int(session.current_index or 0)
+    deck = session_deck(session)
+
+    if deck.at(idx) is None:
+        # sual qurtardı -> finished
+        return finish_game(session, out=out)
+
+    return publish_question(session, deck, idx, out=out)
+
+
+def start_game(session: LiveSession, question_count=None, auto=False, *,
+               out: Optional[Outbox] = None) -> Dict[str, Any]:
+    """
+    Oyunu başladır: sualları seçir (question_count boşdursa hamısı), deck-i
+    kompilyasiya edir, lobby-yə game_started göndərir, 1-ci sualı yayımlayır.
+    """
+    pin = session.pin
+
+    # 1) Host neçə sual istəyir? (form input name="question_count")
+    raw = str(question_count or "").strip()
+
+    all_ids = list(
+        ExamQuestion.objects
+        .filter(exam_id=session.exam_id)
+        .order_by("order", "id")
+        .values_list("id", flat=True)
+    )
+    total_in_exam = len(all_ids)
+
+    if total_in_exam <= 0:
+        return {"ok": False, "message": "Bu imtahanda sual yoxdur."}
+
+    desired = None
+    if raw:
+        try:
+            desired = int(raw)
+        except Exception:
+            return {"ok": False, "message": "Sual sayı düzgün deyil."}
+
+        if desired <= 0:
+            return {"ok": False, "message": "Sual sayı 1-dən böyük olmalıdır."}
+
+        if desired > total_in_exam:
+            return {"ok": False, "message": f"Bu imtahanda cəmi {total_in_exam} sual var. {desired} seçilə bilməz."}
+
+    # 2) Random seçimi session-a yaz (desired boşdursa hamısı, exam order ilə)
+    if desired is None:
+        selected = list(all_ids)
+    else:
+        selected = random.sample(all_ids, k=desired)
+    session.selected_question_ids = selected
+    session.question_limit = len(selected)
+
+    # bütün suallar bir dəfə hazırlanır; next / state / cavab yoxlaması sadəcə lookup edir
+    deck = compile_deck(session, selected)
+    if not len(deck):
+        return {"ok": False, "message": "Sual tapılmadı."}
+    store_deck(pin, deck)
+
+    # 3) Oyun reset
+    session.current_index = 0
+    session.state = LiveSession.STATE_QUESTION
+    session.question_started_at = None
+    session.question_ends_at = None
+
+    _save_state(session, [
+        "selected_question_ids", "question_limit",
+        "current_index", "state",
+        "question_started_at", "question_ends_at",
+    ])
+
+    # 4) Lobby-dəki oyunçular: player səhifəsi eyni socket-də lobby panelini bağlayır,
+    #    redirect yalnız köhnə (ayrı) wait room səhifələri üçündür
+    _emit(out, pin, {
+        "type": "game_started",
+        "redirect": reverse("liveExam:player_screen", kwargs={"pin": pin}),
+    }, "lobby")
+
+    # Auto rejim: reveal/next-i server saatı edir (host brauzeri yox)
+    auto = clock.set_auto(pin, auto)
+
+    # 5) Start basan kimi 1-ci sualı publish et
+    publish_question(session, deck, 0, out=out)
+
+    return {
+        "ok": True,
+        "published": True,
+        "auto": auto,
+        "question_count": len(deck),
+        "total_in_exam": total_in_exam,
+    }
+
+
+def set_auto_mode(session: LiveSession, enabled: bool, pause: Optional[int] = None, *,
+                  out: Optional[Outbox] = None) -> Dict[str, Any]:
+    """
+    Host Auto checkbox-u dəyişəndə. Server saatı işləyirsə cari fazanı da arm edir;
+    auto=false cavabı -> host səhifəsi öz timer-lərini istifadə edir.
+    """
+    pin = session.pin
+    auto = clock.set_auto(pin, enabled, pause)
+    idx = int(session.current_index or 0)
+
+    next_at = None
+    if auto and session.state == LiveSession.STATE_QUESTION and session.question_ends_at and session.current_question_id:
+        clock.arm_question(pin, session.current_question_id, idx, session.question_ends_at)
+    elif auto and session.state == LiveSession.STATE_REVEAL:
+        next_at = clock.arm_reveal(pin, idx)
+
+    return {
+        "ok": True,
+        "auto": auto,
+        "auto_next_at": next_at.isoformat() if next_at else None,
+    }
+
+
+def finish_game(session: LiveSession, *, out: Optional[Outbox] = None) -> Dict[str, Any]:
+    pin = session.pin
+
+    session.state = LiveSession.STATE_FINISHED
+    _save_state(session, ["state"])
+
+    engine = peek_engine(pin)
+    if engine is not None:
+        engine.close_question()
+    clock.disarm(pin)
+    flush_session(pin)
+    top = live_top(session, limit=50)
+    # deck hələ yaddaşdadır: hesabat üçün suallar yenidən compile olunmur
+    store_report(session, session_deck(session))
+    drop_engine(pin)
+    drop_deck(pin)
+    drop_roster(pin)
+
+    payload = {
+        "type": "finished",
+        "top": top,
+        "finished_at": timezone.now().isoformat(),
+    }
+    _emit(out, pin, payload, "play")
+    # bundan sonra qayıdan client snapshot alır (state=finished + top)
+    drop_log(pin)
+    return {"ok": True, "finished": True}
+
+
+def _load_session(pin: str) -> Optional[LiveSession]:
+    return LiveSession.objects.select_related("exam").filter(pin=pin).first()
+
+
+def _run_collected(pin: str, action: Callable, args: tuple, kwargs: dict) -> Tuple[Dict[str, Any], Outbox]:
+    session = _load_session(pin)
+    if session is None:
+        return {"ok": False, "message": "Sessiya tapılmadı."}, []
+    out: Outbox = []
+    return action(session, *args, out=out, **kwargs), out
+
+
+async def run_action(pin: str, action: Callable, *args, **kwargs) -> Dict[str, Any]:
+    """
+    Async tərəfdən (host websocket / server saatı) hərəkət: DB hissəsi
+    database_sync_to_async-da, event-lər isə loop-da native group_send ilə.
+    """
+    result, out = await database_sync_to_async(_run_collected)(pin, action, args, kwargs)
+    layer = get_channel_layer()
+    for group_suffix, payload in out:
+        group, message = _group_message(pin, payload, group_suffix)
+        await layer.group_send(group, message)
+    return result
@@ -0,0 +1,129 @@
+# liveExam/journal.py
+"""
+Kiçik append-only journal (JSON lines).
+
+Yaddaşda saxlanılıb hələ DB-yə yazılmamış məlumat (məs. live cavablar)
+əvvəlcə buraya əlavə olunur. Proses çöküb yenidən qalxanda journal oxunur
+və itən yazılar bərpa edilir.
+
+Seqmentlər:
+    <dir>/<name>.jsonl              -> aktiv (hazırda yazılan)
+    <dir>/<name>.<n>.sealed.jsonl   -> flush üçün götürülmüş, DB-yə yazılanda silinir
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from typing import Any, Dict, Iterator, List, Optional
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+def journal_dir() -> Optional[str]:
+    """
+    LIVE_JOURNAL_DIR setting-i; təyin olunmayıbsa temp qovluğu.
+    Boş string ("") -> journal söndürülüb.
+    """
+    value = getattr(settings, "LIVE_JOURNAL_DIR", None)
+    if value is None:
+        import tempfile
+        value = os.path.join(tempfile.gettempdir(), "emsarena_live_journal")
+    return str(value) or None
+
+
+class AppendJournal:
+    def __init__(self, name: str, directory: Optional[str] = None, *, fsync: bool = False):
+        self.name = name
+        self.directory = directory if directory is not None else journal_dir()
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._fh = None
+        self._seq = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.directory)
+
+    def _active_path(self) -> str:
+        return os.path.join(self.directory, f"{self.name}.jsonl")
+
+    # ---------------- write ----------------
+
+    def append(self, record: Dict[str, Any]) -> None:
+        if not self.enabled:
+            return
+        line = json.dumps(record, cls=DjangoJSONEncoder, separators=(",", ":")) + "\n"
+        with self._lock:
+            if self._fh is None:
+                os.makedirs(self.directory, exist_ok=True)
+                self._fh = open(self._active_path(), "a", encoding="utf-8")
+            self._fh.write(line)
+            self._fh.flush()
+            if self.fsync:
+                os.fsync(self._fh.fileno())
+
+    def seal(self) -> Optional[str]:
+        """
+        Aktiv seqmenti bağlayıb adını dəyişir; yeni yazılar təzə fayla gedir.
+        Seal olunmuş faylın yolunu qaytarır (yoxdursa None).
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+            active = self._active_path()
+            if not os.path.exists(active):
+                return None
+            self._seq += 1
+            sealed = os.path.join(self.directory, f"{self.name}.{os.getpid()}-{self._seq}.sealed.jsonl")
+            os.replace(active, sealed)
+            return sealed
+
+    @staticmethod
+    def discard(path: Optional[str]) -> None:
+        if path:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+
+    # ---------------- replay ----------------
+
+    def segments(self) -> List[str]:
+        """Bu ad üçün bütün seqmentlər (köhnə sealed-lər + aktiv)."""
+        if not self.enabled or not os.path.isdir(self.directory):
+            return []
+        prefix = f"{self.name}."
+        out = [
+            os.path.join(self.directory, f)
+            for f in sorted(os.listdir(self.directory))
+            if f.startswith(prefix) and f.endswith(".sealed.jsonl")
+        ]
+        active = self._active_path()
+        if os.path.exists(active):
+            out.append(active)
+        return out
+
+    @staticmethod
+    def read(path: str) -> Iterator[Dict[str, Any]]:
+        with open(path, "r", encoding="utf-8") as fh:
+            for line in fh:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # çökmə zamanı yarımçıq qalmış son sətir
+                    continue
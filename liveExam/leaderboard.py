@@ -0,0 +1,177 @@
+# liveExam/leaderboard.py
+"""
+Live sessiya üçün yaddaşdaxili, artımlı (incremental) leaderboard.
+
+Açar: (-score, join_key, player_id) -> indekslənən skip list-də saxlanılır
+(hər keçid neçə element üstündən atladığını bilir):
+- bal dəyişəndə: köhnə açar silinir, yenisi qoyulur - O(log N) (gözlənilən)
+- top-K: ən aşağı səviyyə ilə ilk K element - O(K)
+- oyunçunun yeri: açara qədər keçilən enlərin cəmi + 1 - O(log N)
+- rank delta: hər "raund" (sual) üçün oyunçunun əvvəlki yeri yadda saxlanılır,
+  yalnız soruşulan oyunçular üçün hesablanır (hamı üçün O(N) keçid yoxdur)
+
+Sıralı Python siyahısı + insort burada yaramır: axtarış log N olsa da,
+yerləşdirmə / silmə elementləri sürüşdürür (O(N)) - 500 oyunçu eyni anda
+cavab verəndə hər cavab siyahının yarısını köçürürdü.
+
+_serialize_top ilə eyni sıra: -score, sonra qoşulma vaxtı.
+"""
+
+from __future__ import annotations
+
+import itertools
+import random
+from typing import Dict, Hashable, Iterator, List, Optional, Tuple
+
+
+Key = Tuple[int, float, int]
+_END: tuple = (float("inf"),)  # hər açardan böyük (-score int-dir)
+
+
+class _Node:
+    __slots__ = ("key", "next", "width")
+
+    def __init__(self, key, levels: int):
+        self.key = key
+        self.next: List[_Node] = [None] * levels
+        # width[i]: next[i]-yə qədər ən aşağı səviyyədə neçə addım
+        self.width: List[int] = [1] * levels
+
+
+class _RankedSkipList:
+    """Sıralı, təkrarsız açarlar: insert / remove / index O(log N) (gözlənilən)."""
+
+    MAX_LEVELS = 20  # ~1M element üçün kifayətdir
+
+    def __init__(self):
+        self._tail = _Node(_END, 0)
+        self._head = _Node(None, self.MAX_LEVELS)
+        self._head.next = [self._tail] * self.MAX_LEVELS
+        self._size = 0
+        self._random = random.Random()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _level(self) -> int:
+        level = 1
+        while level < self.MAX_LEVELS and self._random.random() < 0.5:
+            level += 1
+        return level
+
+    def insert(self, key: Key) -> None:
+        chain = [None] * self.MAX_LEVELS
+        steps = [0] * self.MAX_LEVELS
+        node = self._head
+        for i in reversed(range(self.MAX_LEVELS)):
+            while node.next[i].key < key:
+                steps[i] += node.width[i]
+                node = node.next[i]
+            chain[i] = node
+
+        levels = self._level()
+        new = _Node(key, levels)
+        offset = 0  # chain[i]-dən yeni node-a qədər addım
+        for i in range(levels):
+            prev = chain[i]
+            new.next[i] = prev.next[i]
+            prev.next[i] = new
+            new.width[i] = prev.width[i] - offset
+            prev.width[i] = offset + 1
+            offset += steps[i]
+        for i in range(levels, self.MAX_LEVELS):
+            chain[i].width[i] += 1
+        self._size += 1
+
+    def remove(self, key: Key) -> bool:
+        chain = [None] * self.MAX_LEVELS
+        node = self._head
+        for i in reversed(range(self.MAX_LEVELS)):
+            while node.next[i].key < key:
+                node = node.next[i]
+            chain[i] = node
+
+        target = chain[0].next[0]
+        if target.key != key:
+            return False
+        for i in range(len(target.next)):
+            prev = chain[i]
+            prev.width[i] += target.width[i] - 1
+            prev.next[i] = target.next[i]
+        for i in range(len(target.next), self.MAX_LEVELS):
+            chain[i].width[i] -= 1
+        self._size -= 1
+        return True
+
+    def index(self, key: Key) -> int:
+        """key-dən kiçik açarların sayı (key varsa onun 0-based yeri)."""
+        position = 0
+        node = self._head
+        for i in reversed(range(self.MAX_LEVELS)):
+            while node.next[i].key < key:
+                position += node.width[i]
+                node = node.next[i]
+        return position
+
+    def __iter__(self) -> Iterator[Key]:
+        node = self._head.next[0]
+        while node is not self._tail:
+            yield node.key
+            node = node.next[0]
+
+
+class Leaderboard:
+    def __init__(self):
+        self._keys = _RankedSkipList()
+        self._key_of: Dict[int, Key] = {}
+        # player_id -> (round_key, rank, delta)
+        self._standing: Dict[int, Tuple[Hashable, int, Optional[int]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, player_id: int) -> bool:
+        return player_id in self._key_of
+
+    def clear_scores(self) -> None:
+        """Ballar yenidən yüklənəndə: sıralama sıfırlanır, raund yerləri (delta üçün) qalır."""
+        self._keys = _RankedSkipList()
+        self._key_of.clear()
+
+    def set_score(self, player_id: int, score: int, join_key: float) -> None:
+        key = (-int(score), join_key, player_id)
+        old = self._key_of.get(player_id)
+        if old == key:
+            return
+        if old is not None:
+            self._keys.remove(old)
+        self._keys.insert(key)
+        self._key_of[player_id] = key
+
+    def rank(self, player_id: int) -> Optional[int]:
+        """1-based yer; oyunçu yoxdursa None."""
+        key = self._key_of.get(player_id)
+        if key is None:
+            return None
+        return self._keys.index(key) + 1
+
+    def top(self, k: int) -> List[int]:
+        return [pid for _, _, pid in itertools.islice(self._keys, max(k, 0))]
+
+    def standing(self, player_id: int, round_key: Hashable) -> Optional[Tuple[int, Optional[int]]]:
+        """
+        (rank, delta) - delta: əvvəlki raunddakı yerdən neçə pillə qalxıb (+) / düşüb (-).
+        Eyni raund üçün təkrar çağırış eyni nəticəni qaytarır.
+        """
+        rank = self.rank(player_id)
+        if rank is None:
+            return None
+
+        prev = self._standing.get(player_id)
+        if prev is not None and prev[0] == round_key:
+            # eyni raund: ilk hesablanan delta saxlanılır, rank təzələnir
+            delta = prev[2]
+        else:
+            delta = (prev[1] - rank) if prev is not None else None
+        self._standing[player_id] = (round_key, rank, delta)
+        return rank, delta
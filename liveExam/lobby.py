@@ -0,0 +1,232 @@
+# liveExam/lobby.py
+"""
+Lobby (wait room / host lobby) üçün oyunçu siyahısı.
+
+Əvvəl hər join `players.count()` + 50 sətirlik siyahı ilə bütün lobby
+qrupuna tam `lobby_state` göndərirdi, hər qoşulan lobby socket-i də eyni iki
+sorğunu edirdi (300 join -> kvadratik trafik). İndi:
+- join / leave -> yalnız delta: player_joined / player_left + count + version
+- tam siyahı (versiyalı snapshot) yalnız connect-də və client resync istəyəndə
+
+Həqiqət mənbəyi DB-dir: LivePlayer.is_connected + LiveSession.lobby_version.
+Join (HTTP worker) və leave / rejoin (WS worker) oyunçu sətrini dəyişir və
+version-u eyni tranzaksiyada F() ilə artırır (sətir kilidi join-ləri
+ardıcıllaşdırır), count həmin tranzaksiyada sayılır -> delta hansı prosesdə
+qurulursa qurulsun version ardıcıl, count düzgündür.
+
+LobbyRoster prosesdə bu state-in cache-idir: connect / resync-də bir sütunluq
+version sorğusu ilə yoxlanılır (fərqlidirsə siyahı yenidən oxunur), arada
+qrupdan gələn delta-larla irəliləyir (`apply`, version ilə idempotent).
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from liveExam.models import LiveSession, LivePlayer
+
+
+SNAPSHOT_LIMIT = 50
+# lobby socket-i qırılandan bu qədər saniyə sonra oyunçu "çıxdı" sayılır (refresh / şəbəkə)
+LEAVE_GRACE_SECONDS = getattr(settings, "LIVE_LOBBY_LEAVE_GRACE", 5)
+
+
+class LobbyRoster:
+    def __init__(self, pin: str):
+        self.pin = pin
+        self.session_id: Optional[int] = None
+        self.loaded = False
+        self.version = 0
+        self.lock = threading.Lock()
+        # player_id -> {"id", "nickname", "avatar_key"}; qoşulma sırası ilə
+        self.players: Dict[int, Dict[str, Any]] = {}
+        # player_id -> açıq lobby socket sayı (bir neçə tab)
+        self.connections: Dict[int, int] = {}
+
+    def attach(self, player_id: int) -> None:
+        with self.lock:
+            self.connections[player_id] = self.connections.get(player_id, 0) + 1
+
+    def detach(self, player_id: int) -> None:
+        with self.lock:
+            left = self.connections.get(player_id, 0) - 1
+            if left > 0:
+                self.connections[player_id] = left
+            else:
+                self.connections.pop(player_id, None)
+
+    def is_attached(self, player_id: int) -> bool:
+        with self.lock:
+            return player_id in self.connections
+
+    def refresh(self) -> bool:
+        """
+        Sync (database_sync_to_async ilə çağır): cache DB version-u ilə eynidirsə
+        bir sorğu, deyilsə siyahı yenidən oxunur. Sessiya yoxdursa False.
+        """
+        row = LiveSession.objects.filter(pin=self.pin).values_list("id", "lobby_version").first()
+        if row is None:
+            return False
+        session_id, version = row
+        with self.lock:
+            if self.loaded and self.version == version:
+                return True
+        rows = list(
+            LivePlayer.objects
+            .filter(session_id=session_id, is_connected=True)
+            .order_by("created_at", "id")
+            .values("id", "nickname", "avatar_key")
+        )
+        with self.lock:
+            # arada delta-lar tətbiq olunubsa (version irəlidədir) onları üstələmə
+            if not self.loaded or self.version <= version:
+                self.session_id = session_id
+                self.players = {r["id"]: r for r in rows}
+                self.version = version
+                self.loaded = True
+        return True
+
+    def apply(self, event: Dict[str, Any]) -> None:
+        """
+        Qrupdan gələn delta-nı cache-ə tətbiq edir. Prosesdəki hər consumer eyni
+        event-i alır -> version ilə bir dəfə; boşluq varsa cache köhnəlib,
+        növbəti refresh yenidən oxuyur.
+        """
+        if event.get("type") not in ("player_joined", "player_left"):
+            return
+        version = int(event.get("version") or 0)
+        with self.lock:
+            if not self.loaded or version <= self.version:
+                return
+            if version != self.version + 1:
+                self.loaded = False
+                return
+            if event["type"] == "player_joined":
+                player = event["player"]
+                self.players[player["id"]] = player
+            else:
+                self.players.pop(event["player_id"], None)
+            self.version = version
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Versiyalı tam state (son qoşulanlar əvvəldə, SNAPSHOT_LIMIT qədər)."""
+        with self.lock:
+            players = list(self.players.values())[-SNAPSHOT_LIMIT:]
+            players.reverse()
+            return {
+                "type": "lobby_state",
+                "count": len(self.players),
+                "players": players,
+                "version": self.version,
+            }
+
+
+_ROSTERS: Dict[str, LobbyRoster] = {}
+_ROSTERS_LOCK = threading.Lock()
+
+
+def get_roster(pin: str) -> LobbyRoster:
+    pin = str(pin)
+    with _ROSTERS_LOCK:
+        roster = _ROSTERS.get(pin)
+        if roster is None:
+            roster = _ROSTERS[pin] = LobbyRoster(pin)
+        return roster
+
+
+def drop_roster(pin: str) -> None:
+    with _ROSTERS_LOCK:
+        _ROSTERS.pop(str(pin), None)
+
+
+def _lock_lobby(**session_filter) -> Optional[int]:
+    """
+    Tranzaksiyanın İLK yazısı: lobby_version += 1. Sətir kilidi join / leave-ləri
+    ardıcıllaşdırır; sqlite-də yazı kilidi əvvəldən alınır (SELECT -> yazı
+    upgrade-i paralel join-lərdə "database is locked" verir). Sessiya id-si və ya None.
+    """
+    if not LiveSession.objects.filter(**session_filter).update(lobby_version=F("lobby_version") + 1):
+        return None
+    return LiveSession.objects.filter(**session_filter).values_list("id", flat=True).first()
+
+
+def _lobby_state(session_id: int) -> Tuple[int, int]:
+    """(version, connected oyunçu sayı) - eyni tranzaksiyada, kilid altında."""
+    version = LiveSession.objects.filter(id=session_id).values_list("lobby_version", flat=True).get()
+    count = LivePlayer.objects.filter(session_id=session_id, is_connected=True).count()
+    return version, count
+
+
+def join_player(session: LiveSession, client_id: str, nickname: str, avatar_key: str) -> Tuple[LivePlayer, Dict[str, Any]]:
+    """
+    Sync: oyunçunu yaradır / yeniləyir (eyni client_id = eyni oyunçu, nickname /
+    avatar dəyişə bilər) -> (player, player_joined).
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        _lock_lobby(id=session.id)
+        player = LivePlayer.objects.filter(session=session, client_id=client_id).first()
+        if player:
+            player.nickname = nickname
+            player.avatar_key = avatar_key
+            player.is_connected = True
+            player.last_seen = now
+            player.save(update_fields=["nickname", "avatar_key", "is_connected", "last_seen"])
+        else:
+            player = LivePlayer.objects.create(
+                session=session,
+                client_id=client_id,
+                nickname=nickname,
+                avatar_key=avatar_key,
+                is_connected=True,
+                last_seen=now,
+            )
+        version, count = _lobby_state(session.id)
+    return player, {
+        "type": "player_joined",
+        "player": {"id": player.id, "nickname": player.nickname, "avatar_key": player.avatar_key},
+        "count": count,
+        "version": version,
+    }
+
+
+def mark_left(pin: str, player_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Sync: oyunçu lobby-dən çıxdı (grace bitdi) -> player_left. Yalnız oyun hələ
+    lobby-dədirsə (oyun başlayanda client lobby topic-indən çıxır, o "çıxma"
+    deyil) və oyunçu hələ connected-dirsə; əks halda None.
+    """
+    with transaction.atomic():
+        session_id = _lock_lobby(pin=pin, state=LiveSession.STATE_LOBBY)
+        if session_id is None:
+            return None
+        updated = (
+            LivePlayer.objects
+            .filter(id=player_id, session_id=session_id, is_connected=True)
+            .update(is_connected=False)
+        )
+        if not updated:
+            transaction.set_rollback(True)  # dəyişiklik yoxdur -> version da artmasın
+            return None
+        version, count = _lobby_state(session_id)
+    return {"type": "player_left", "player_id": player_id, "count": count, "version": version}
+
+
+def rejoin_player(pin: str, player_id: int) -> Optional[Dict[str, Any]]:
+    """Sync: "çıxmış" oyunçu lobby socket-i ilə qayıdıb -> yenidən connected, player_joined."""
+    with transaction.atomic():
+        session_id = _lock_lobby(pin=pin)
+        if session_id is None:
+            return None
+        if not LivePlayer.objects.filter(id=player_id, session_id=session_id, is_connected=False).update(is_connected=True):
+            transaction.set_rollback(True)
+            return None
+        player = LivePlayer.objects.filter(id=player_id).values("id", "nickname", "avatar_key").get()
+        version, count = _lobby_state(session_id)
+    return {"type": "player_joined", "player": player, "count": count, "version": version}
@@ -0,0 +1,106 @@
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+from channels.layers import InMemoryChannelLayer
+
+from liveExam.channel_layer import UnixSocketChannelLayer
+
+
+async def _bench_layer(layer, sender, channels: int, messages: int) -> dict:
+    """layer kanalları dinləyir, sender göndərir (unix üçün ayrı instansiya = başqa worker)."""
+    names = [await layer.new_channel() for _ in range(channels)]
+    for name in names:
+        await layer.group_add("bench", name)
+
+    received = 0
+    done = asyncio.Event()
+    total = channels * messages
+
+    async def reader(name):
+        nonlocal received
+        while True:
+            await layer.receive(name)
+            received += 1
+            if received >= total:
+                done.set()
+
+    readers = [asyncio.create_task(reader(n)) for n in names]
+    await asyncio.sleep(0.05)  # receive() qeydiyyatı
+
+    # group_send: oyunun əsas yükü (hər event bütün oyunçulara)
+    started = time.perf_counter()
+    for i in range(messages):
+        await sender.group_send("bench", {"type": "bench", "i": i, "payload": "x" * 200})
+    await asyncio.wait_for(done.wait(), timeout=120)
+    group_elapsed = time.perf_counter() - started
+
+    # send: nöqtədən-nöqtəyə (hər kanala ayrıca)
+    received = 0
+    done.clear()
+    total = channels * messages
+    started = time.perf_counter()
+    for i in range(messages):
+        for name in names:
+            await sender.send(name, {"type": "bench", "i": i})
+    await asyncio.wait_for(done.wait(), timeout=120)
+    send_elapsed = time.perf_counter() - started
+
+    for task in readers:
+        task.cancel()
+    for name in names:
+        await layer.group_discard("bench", name)
+    await layer.close()
+    if sender is not layer:
+        await sender.close()
+
+    return {
+        "group_send_calls_per_s": round(messages / group_elapsed, 1),
+        "group_deliveries_per_s": round(channels * messages / group_elapsed, 1),
+        "send_per_s": round(channels * messages / send_elapsed, 1),
+    }
+
+
+class Command(BaseCommand):
+    help = "Channel layer ötürmə sürəti: InMemory vs daxili Unix socket layer (mesaj/san)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--channels", type=int, default=200, help="qrupdakı kanal (oyunçu) sayı")
+        parser.add_argument("--messages", type=int, default=50, help="group_send sayı")
+        parser.add_argument("--path", default=None, help="mövcud broker socket-i (default: müvəqqəti embedded)")
+        parser.add_argument("--json", action="store_true", help="maşın oxuyan çıxış")
+
+    def handle(self, *args, **options):
+        channels, messages = options["channels"], options["messages"]
+        path = options["path"] or os.path.join(tempfile.mkdtemp(), "bench.sock")
+
+        # capacity: bütün mesajlar oxunmadan növbəyə sığsın
+        capacity = messages + 10
+        inmemory = InMemoryChannelLayer(capacity=capacity)
+        layers = {
+            "inmemory": (inmemory, inmemory),
+            "unix_socket": (
+                UnixSocketChannelLayer(path=path, capacity=capacity),
+                UnixSocketChannelLayer(path=path, capacity=capacity),
+            ),
+        }
+
+        results = {}
+        for name, (layer, sender) in layers.items():
+            results[name] = asyncio.run(_bench_layer(layer, sender, channels, messages))
+
+        report = {"channels": channels, "messages": messages, "results": results}
+        if options["json"]:
+            self.stdout.write(json.dumps(report))
+            return
+
+        self.stdout.write(f"{channels} kanal, {messages} mesaj")
+        for name, r in results.items():
+            self.stdout.write(
+                f"{name:12} group_send {r['group_send_calls_per_s']:>10}/s "
+                f"(çatdırılma {r['group_deliveries_per_s']:>10}/s)  send {r['send_per_s']:>10}/s"
+            )
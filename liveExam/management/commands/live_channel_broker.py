@@ -0,0 +1,28 @@
+import asyncio
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from liveExam.channel_layer import DEFAULT_PATH, Broker, acquire_broker_lock
+
+
+class Command(BaseCommand):
+    help = "Daxili channel layer broker-ini ayrıca proses kimi işə salır (embedded broker əvəzinə)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default=None, help="Unix socket yolu (default: CHANNEL_LAYERS config)")
+
+    def handle(self, *args, **options):
+        config = settings.CHANNEL_LAYERS.get("default", {}).get("CONFIG", {})
+        path = options["path"] or config.get("path") or DEFAULT_PATH
+
+        # worker-lərdəki embedded broker ilə eyni lock: eyni anda yalnız biri
+        if acquire_broker_lock(path) is None:
+            raise CommandError(f"Broker artıq işləyir: {path}")
+
+        broker = Broker(path, group_expiry=config.get("group_expiry", 86400))
+        self.stdout.write(f"Channel broker: {path}")
+        try:
+            asyncio.run(broker.serve_forever())
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,126 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.core.management.base import BaseCommand, CommandError
+
+from liveExam import sharding
+
+
+MAX_HEAD = 64 * 1024
+HOP_HEADERS = (b"connection", b"keep-alive", b"proxy-connection")
+
+
+def _rewrite_head(head: bytes, client_ip: str, upgrade: bool) -> bytes:
+    """
+    X-Forwarded-For əlavə edir; adi HTTP-də Connection: close - keep-alive
+    bağlantısında növbəti request başqa PIN-ə ola bilər, hər request öz
+    bağlantısında route olunur.
+    """
+    lines = head[:-4].split(b"\r\n")
+    out = [lines[0]]
+    forwarded = None
+    for line in lines[1:]:
+        name = line.split(b":", 1)[0].strip().lower()
+        if name == b"x-forwarded-for":
+            forwarded = line.split(b":", 1)[1].strip()
+            continue
+        if not upgrade and name in HOP_HEADERS:
+            continue
+        out.append(line)
+    ip = client_ip.encode()
+    out.append(b"X-Forwarded-For: " + (forwarded + b", " + ip if forwarded else ip))
+    if not upgrade:
+        out.append(b"Connection: close")
+    return b"\r\n".join(out) + b"\r\n\r\n"
+
+
+async def _pipe(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                break
+            writer.write(data)
+            await writer.drain()
+    except (ConnectionError, OSError):
+        pass
+
+
+async def _open(address: str):
+    kind, target = sharding.parse_address(address)
+    if kind == "unix":
+        return await asyncio.open_unix_connection(target)
+    return await asyncio.open_connection(*target)
+
+
+class FrontDoor:
+    def __init__(self):
+        self.shard_for = sync_to_async(sharding.shard_for)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        upstream_writer = None
+        try:
+            try:
+                head = await reader.readuntil(b"\r\n\r\n")
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                return
+
+            parts = head.split(b"\r\n", 1)[0].split(b" ")
+            path = parts[1].decode("latin-1") if len(parts) >= 2 else "/"
+            client_ip = (writer.get_extra_info("peername") or ("unix",))[0] or "unix"
+
+            pin = sharding.pin_from_path(path)
+            shard = await self.shard_for(pin) if pin else None
+            if shard is None:
+                # PIN-siz (və ya tanınmayan PIN) trafik: client-ə görə sabit worker
+                shard = sharding.pick(client_ip)
+
+            upgrade = b"\r\nupgrade: websocket" in head.lower()
+            try:
+                upstream_reader, upstream_writer = await _open(sharding.SHARDS[shard])
+            except (OSError, KeyError):
+                writer.write(b"HTTP/1.1 502 Bad Gateway\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                await writer.drain()
+                return
+
+            upstream_writer.write(_rewrite_head(head, client_ip, upgrade))
+            to_upstream = asyncio.create_task(_pipe(reader, upstream_writer))
+            to_client = asyncio.create_task(_pipe(upstream_reader, writer))
+            # hər hansı tərəf bağlayanda (HTTP: worker cavabdan sonra) bağlantı bitir
+            done, pending = await asyncio.wait({to_upstream, to_client}, return_when=asyncio.FIRST_COMPLETED)
+            if to_upstream in done and not upgrade:
+                await to_client  # client yazmağı bitirib, cavab hələ gəlir
+            for task in pending:
+                task.cancel()
+        finally:
+            if upstream_writer is not None:
+                upstream_writer.close()
+            writer.close()
+
+
+class Command(BaseCommand):
+    help = "PIN sharding front door: HTTP/WebSocket bağlantısını sessiyanın worker-inə ötürür."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--bind", default="0.0.0.0:8000", help="host:port və ya unix:/path")
+
+    def handle(self, *args, **options):
+        if not sharding.enabled():
+            raise CommandError("LIVE_SHARDS boşdur (məs. LIVE_SHARDS=w1=127.0.0.1:8001,w2=127.0.0.1:8002).")
+
+        front_door = FrontDoor()
+        kind, target = sharding.parse_address(options["bind"])
+
+        async def serve():
+            if kind == "unix":
+                server = await asyncio.start_unix_server(front_door.handle, path=target, limit=MAX_HEAD)
+            else:
+                server = await asyncio.start_server(front_door.handle, *target, limit=MAX_HEAD)
+            self.stdout.write(f"Front door {options['bind']} -> {', '.join(sorted(sharding.SHARDS))}")
+            async with server:
+                await server.serve_forever()
+
+        try:
+            asyncio.run(serve())
+        except KeyboardInterrupt:
+            pass
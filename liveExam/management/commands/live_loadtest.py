@@ -0,0 +1,696 @@
+"""
+Live arena yük testi: N simulyasiya oyunçu + skriptli host.
+
+İki rejim:
+- in-process (default): emsarena.asgi.application eyni prosesdə işə düşür
+  (HTTP -> HttpCommunicator, WS -> WebsocketCommunicator); --exam ilə yeni
+  sessiya yaradılır (sonda silinir, --keep olmasa) və ya --pin ilə mövcud lobby
+- --url http://host:8000: işləyən serverə qarşı (websockets paketi lazımdır),
+  --pin və --host-cookie (host-un sessionid-si) tələb olunur
+
+Oyunçu axını real client kimidir: join səhifəsi (GET) -> live_join_enter (POST)
+-> ws/live/<pin>/?topics=lobby,play -> hər sualda log-normal "düşünmə" vaxtı
+sonra answer.
+
+Ölçülür:
+- broadcast latency: client-in qəbul anı - server-in event vaxtı
+  (question.started_at / revealed_at / finished_at; URL rejimində saatlar eyni
+  maşında olmalıdır)
+- answer ack latency: answer göndərildi -> answer_saved
+- mərhələ üzrə (join / publish / answer / reveal / finish) wall, CPU
+  (process_time; in-process-də server + client birlikdə) və SQL sorğu sayı
+  (yalnız in-process)
+
+Nəticə --json / --output ilə maşın oxuyan formatdadır; --baseline köhnə
+nəticə ilə p95-ləri müqayisə edir və --max-regression-dan çox pisləşmədə
+command xəta ilə bitir (CI üçün).
+"""
+
+import asyncio
+import itertools
+import json
+import math
+import random
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from datetime import datetime
+from http.cookies import SimpleCookie
+from importlib import import_module
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.urls import reverse
+from django.utils.crypto import get_random_string
+
+from blog.models import Exam
+from liveExam import codec
+from liveExam.models import LiveSession
+
+
+STAGES = ("join", "publish", "answer", "reveal", "finish")
+BROADCAST_TYPES = ("question_published", "reveal", "finished")
+
+
+def _percentiles(samples: List[float]) -> Dict[str, Any]:
+    if not samples:
+        return {"count": 0, "p50": None, "p95": None, "p99": None, "max": None}
+    ordered = sorted(samples)
+
+    def rank(p):
+        return round(ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)], 2)
+
+    return {"count": len(ordered), "p50": rank(50), "p95": rank(95), "p99": rank(99), "max": round(ordered[-1], 2)}
+
+
+def _server_time(value) -> Optional[float]:
+    """ISO tarix (JSON) və ya epoch ms (msgpack) -> epoch saniyə."""
+    if isinstance(value, (int, float)):
+        return value / 1000
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value).timestamp()
+        except ValueError:
+            return None
+    return None
+
+
+def _event_time(msg: Dict[str, Any]) -> Optional[float]:
+    if msg.get("type") == "question_published":
+        return _server_time((msg.get("question") or {}).get("started_at"))
+    if msg.get("type") == "reveal":
+        return _server_time(msg.get("revealed_at"))
+    if msg.get("type") == "finished":
+        return _server_time(msg.get("finished_at"))
+    return None
+
+
+def _cookie_header(cookies: Dict[str, str]) -> str:
+    return "; ".join(f"{k}={v}" for k, v in cookies.items())
+
+
+def _store_cookies(cookies: Dict[str, str], set_cookie_values: List[str]) -> None:
+    for raw in set_cookie_values:
+        parsed = SimpleCookie()
+        parsed.load(raw)
+        for key, morsel in parsed.items():
+            cookies[key] = morsel.value
+
+
+# ------------------------
+# Ölçmə
+# ------------------------
+
+class Recorder:
+    """Mərhələ üzrə wall / CPU / SQL sorğu + latency nümunələri."""
+
+    def __init__(self, count_queries: bool):
+        self.stage = "join"
+        self.count_queries = count_queries
+        self.queries: Dict[str, int] = defaultdict(int)
+        self.wall: Dict[str, float] = defaultdict(float)
+        self.cpu: Dict[str, float] = defaultdict(float)
+        self.latency: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.timeouts: List[str] = []
+        self._stage_wall = time.perf_counter()
+        self._stage_cpu = time.process_time()
+
+    # execute_wrapper: bütün thread-lərin DB bağlantılarına taxılır
+    def __call__(self, execute, sql, params, many, context):
+        self.queries[self.stage] += 1
+        return execute(sql, params, many, context)
+
+    def _attach(self, connection, **kwargs):
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+
+    def start(self) -> None:
+        if self.count_queries:
+            connection_created.connect(self._attach, weak=False)
+            for connection in connections.all(initialized_only=True):
+                self._attach(connection)
+
+    def stop(self) -> None:
+        self.enter(None)
+        if self.count_queries:
+            connection_created.disconnect(self._attach)
+            for connection in connections.all(initialized_only=True):
+                if self in connection.execute_wrappers:
+                    connection.execute_wrappers.remove(self)
+
+    def enter(self, stage: Optional[str]) -> None:
+        now_wall, now_cpu = time.perf_counter(), time.process_time()
+        self.wall[self.stage] += now_wall - self._stage_wall
+        self.cpu[self.stage] += now_cpu - self._stage_cpu
+        self._stage_wall, self._stage_cpu = now_wall, now_cpu
+        if stage is not None:
+            self.stage = stage
+
+    def sample(self, name: str, ms: float) -> None:
+        self.latency[name].append(ms)
+
+    def stages(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            stage: {
+                "wall_s": round(self.wall[stage], 3),
+                "cpu_s": round(self.cpu[stage], 3),
+                "queries": self.queries[stage] if self.count_queries else None,
+            }
+            for stage in STAGES
+        }
+
+
+# ------------------------
+# Transport: in-process ASGI / real URL
+# ------------------------
+
+class _CommunicatorSocket:
+    def __init__(self, communicator, compact: bool):
+        self.communicator = communicator
+        self.compact = compact
+
+    async def send(self, data: Dict[str, Any]) -> None:
+        if self.compact:
+            await self.communicator.send_to(bytes_data=codec.pack(data))
+        else:
+            await self.communicator.send_to(text_data=json.dumps(data))
+
+    async def recv(self) -> Optional[Dict[str, Any]]:
+        # timeout-la receive_output app-i cancel edir: burada gözləmə limitsizdir,
+        # task-ı çağıran tərəf cancel edir
+        message = await self.communicator.receive_output(timeout=86400)
+        if message["type"] == "websocket.close":
+            return None
+        if message.get("bytes") is not None:
+            return codec.unpack(message["bytes"])
+        return json.loads(message["text"])
+
+    async def close(self) -> None:
+        await self.communicator.disconnect()
+
+
+def _allowed_host() -> bytes:
+    """In-process müraciətlərin Host header-i: ALLOWED_HOSTS-dan (DisallowedHost olmasın)."""
+    for host in settings.ALLOWED_HOSTS:
+        host = host.strip().lstrip(".")
+        if host and host != "*":
+            return host.encode()
+    # "*" və ya boş siyahı (DEBUG-da localhost icazəlidir)
+    return b"localhost"
+
+
+class InProcessTransport:
+    def __init__(self, compact: bool):
+        from emsarena.asgi import application
+
+        self.application = application
+        self.compact = compact
+        self.host = _allowed_host()
+
+    async def http(self, method: str, path: str, headers: Dict[str, str], body: bytes = b""):
+        from channels.testing import HttpCommunicator
+
+        header_list = [(b"host", self.host)] + [(k.lower().encode(), v.encode()) for k, v in headers.items()]
+        communicator = HttpCommunicator(self.application, method, path, body=body, headers=header_list)
+        response = await communicator.get_response(timeout=60)
+        await communicator.send_input({"type": "http.disconnect"})
+        await communicator.wait(timeout=60)
+        set_cookies = [v.decode() for k, v in response["headers"] if k.lower() == b"set-cookie"]
+        return response["status"], set_cookies, response["body"]
+
+    async def websocket(self, path: str, headers: Dict[str, str]):
+        from channels.testing import WebsocketCommunicator
+
+        header_list = [(b"host", self.host)] + [(k.lower().encode(), v.encode()) for k, v in headers.items()]
+        communicator = WebsocketCommunicator(
+            self.application, path, headers=header_list,
+            subprotocols=[codec.COMPACT_SUBPROTOCOL] if self.compact else None,
+        )
+        connected, _ = await communicator.connect(timeout=60)
+        if not connected:
+            raise ConnectionError(f"WebSocket rejected: {path}")
+        return _CommunicatorSocket(communicator, self.compact)
+
+
+class _WebsocketsSocket:
+    def __init__(self, connection, compact: bool):
+        self.connection = connection
+        self.compact = compact
+
+    async def send(self, data: Dict[str, Any]) -> None:
+        await self.connection.send(codec.pack(data) if self.compact else json.dumps(data))
+
+    async def recv(self) -> Optional[Dict[str, Any]]:
+        try:
+            raw = await self.connection.recv()
+        except Exception:
+            return None
+        return codec.unpack(raw) if isinstance(raw, bytes) else json.loads(raw)
+
+    async def close(self) -> None:
+        await self.connection.close()
+
+
+class UrlTransport:
+    def __init__(self, base_url: str, compact: bool):
+        try:
+            import websockets  # noqa: F401
+        except ImportError:
+            raise CommandError("--url rejimi üçün websockets paketi lazımdır (pip install websockets).")
+        self.base_url = base_url.rstrip("/")
+        self.ws_url = "ws" + self.base_url[len("http"):]
+        self.compact = compact
+
+    async def http(self, method: str, path: str, headers: Dict[str, str], body: bytes = b""):
+        def call():
+            request = urllib.request.Request(
+                self.base_url + path, data=body or None, method=method,
+                headers={"Referer": self.base_url + path, **headers},
+            )
+            try:
+                with urllib.request.urlopen(request, timeout=60) as response:
+                    return response.status, response.headers.get_all("Set-Cookie") or [], response.read()
+            except urllib.error.HTTPError as exc:
+                return exc.code, exc.headers.get_all("Set-Cookie") or [], exc.read()
+
+        return await asyncio.to_thread(call)
+
+    async def websocket(self, path: str, headers: Dict[str, str]):
+        import websockets
+
+        connection = await websockets.connect(
+            self.ws_url + path, additional_headers=headers,
+            subprotocols=[codec.COMPACT_SUBPROTOCOL] if self.compact else None,
+            max_size=None,
+        )
+        return _WebsocketsSocket(connection, self.compact)
+
+
+# ------------------------
+# Oyun
+# ------------------------
+
+class LoadTest:
+    def __init__(self, transport, recorder: Recorder, pin: str, host_cookie: str, options: Dict[str, Any]):
+        self.transport = transport
+        self.recorder = recorder
+        self.pin = pin
+        self.host_cookie = host_cookie
+        self.players = options["players"]
+        self.questions = options["questions"]
+        self.auto = options["auto"]
+        self.think_ms = options["think_ms"]
+        self.think_sigma = options["think_sigma"]
+        self.ramp = options["ramp"]
+        self.timeout = options["timeout"]
+        self.random = random.Random(options["seed"])
+
+        self.joined = 0
+        self.finished = 0
+        self.received: Dict[Any, int] = defaultdict(int)   # (type, question_id) -> oyunçu sayı
+        self.acked: Dict[int, int] = defaultdict(int)
+        self.changed = asyncio.Condition()
+        self.host_acks: Dict[int, asyncio.Future] = {}
+        self.host_seen: Dict[Any, Dict[str, Any]] = {}
+        self.command_ids = itertools.count(1)
+        self.done_questions = set()
+        self.tasks: List[asyncio.Task] = []
+
+    async def _bump(self, counter: Dict[Any, int], key) -> None:
+        async with self.changed:
+            counter[key] += 1
+            self.changed.notify_all()
+
+    async def _wait_for(self, label: str, predicate) -> bool:
+        try:
+            async with self.changed:
+                await asyncio.wait_for(self.changed.wait_for(predicate), self.timeout)
+            return True
+        except asyncio.TimeoutError:
+            self.recorder.timeouts.append(label)
+            return False
+
+    # -------------------- player --------------------
+
+    async def _join(self, index: int) -> Optional[Dict[str, str]]:
+        cookies: Dict[str, str] = {}
+        join_page = reverse("liveExam:join_page", kwargs={"pin": self.pin})
+        status, set_cookies, _ = await self.transport.http("GET", join_page, {})
+        if status != 200:
+            self.recorder.errors[f"join_page_{status}"] += 1
+            return None
+        _store_cookies(cookies, set_cookies)
+
+        csrf = cookies.setdefault(settings.CSRF_COOKIE_NAME, get_random_string(32))
+        body = urllib.parse.urlencode({
+            "nickname": f"bot{index}",
+            "avatar_key": f"avatar_{index % 12 + 1}",
+        }).encode()
+        started = time.perf_counter()
+        status, set_cookies, _ = await self.transport.http(
+            "POST", reverse("liveExam:join_enter", kwargs={"pin": self.pin}),
+            {
+                "Cookie": _cookie_header(cookies),
+                "Content-Type": "application/x-www-form-urlencoded",
+                "X-CSRFToken": csrf,
+            },
+            body,
+        )
+        if status != 200:
+            self.recorder.errors[f"join_{status}"] += 1
+            return None
+        self.recorder.sample("join", (time.perf_counter() - started) * 1000)
+        _store_cookies(cookies, set_cookies)
+        return cookies
+
+    async def _player(self, index: int) -> None:
+        await asyncio.sleep(self.ramp * index / max(1, self.players))
+        cookies = await self._join(index)
+        if cookies is None:
+            return
+        socket = await self.transport.websocket(
+            f"/ws/live/{self.pin}/?topics=lobby,play", {"Cookie": _cookie_header(cookies)},
+        )
+        async with self.changed:
+            self.joined += 1
+            self.changed.notify_all()
+
+        sent_at: Dict[int, float] = {}
+        answer_tasks: List[asyncio.Task] = []
+        try:
+            while True:
+                msg = await socket.recv()
+                if msg is None:
+                    break
+                msg_type = msg.get("type")
+                received = time.time()
+
+                if msg_type in BROADCAST_TYPES:
+                    server_at = _event_time(msg)
+                    if server_at is not None:
+                        self.recorder.sample(msg_type, (received - server_at) * 1000)
+
+                if msg_type == "question_published":
+                    question = msg.get("question") or {}
+                    answer_tasks.append(asyncio.create_task(self._answer(socket, question, sent_at)))
+                    await self._bump(self.received, ("question_published", question.get("id")))
+                elif msg_type == "answer_saved":
+                    # answer_saved-də question_id yoxdur: oyunçunun eyni anda bir cavabı olur
+                    question_id = msg.get("question_id") or next(iter(sent_at), None)
+                    if question_id in sent_at:
+                        self.recorder.sample("answer_ack", (time.perf_counter() - sent_at.pop(question_id)) * 1000)
+                    await self._bump(self.acked, question_id)
+                elif msg_type == "reveal":
+                    await self._bump(self.received, ("reveal", msg.get("question_id")))
+                elif msg_type == "finished":
+                    self.finished += 1
+                    await self._bump(self.received, ("finished", None))
+                    break
+                elif msg_type == "error":
+                    self.recorder.errors[str(msg.get("message"))] += 1
+        finally:
+            for task in answer_tasks:
+                task.cancel()
+            await socket.close()
+
+    async def _answer(self, socket, question: Dict[str, Any], sent_at: Dict[int, float]) -> None:
+        options = question.get("options") or []
+        if not options:
+            return
+        think = self.random.lognormvariate(math.log(self.think_ms), self.think_sigma)
+        started, ends = _server_time(question.get("started_at")), _server_time(question.get("ends_at"))
+        if started and ends:
+            think = min(think, (ends - started) * 1000 * 0.9)
+        await asyncio.sleep(think / 1000)
+
+        sent_at[question["id"]] = time.perf_counter()
+        await socket.send({
+            "type": "answer",
+            "question_id": question["id"],
+            "option_id": self.random.choice(options)["id"],
+            "answer_ms": int(think),
+        })
+
+    # -------------------- host --------------------
+
+    async def _host_reader(self, socket) -> None:
+        while True:
+            msg = await socket.recv()
+            if msg is None:
+                return
+            if msg.get("type") == "ack":
+                future = self.host_acks.pop(msg.get("id"), None)
+                if future is not None and not future.done():
+                    future.set_result(msg)
+            elif msg.get("type") in BROADCAST_TYPES:
+                key = (msg["type"], msg.get("question_id") or (msg.get("question") or {}).get("id"))
+                async with self.changed:
+                    self.host_seen[key] = msg
+                    self.changed.notify_all()
+
+    async def _command(self, socket, action: str, **extra) -> Dict[str, Any]:
+        command_id = next(self.command_ids)
+        future = asyncio.get_running_loop().create_future()
+        self.host_acks[command_id] = future
+        await socket.send({"type": "command", "action": action, "id": command_id, **extra})
+        try:
+            return await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            self.recorder.timeouts.append(f"ack:{action}")
+            return {"ok": False}
+
+    def _new_question(self) -> Optional[Dict[str, Any]]:
+        for (msg_type, qid), msg in self.host_seen.items():
+            if msg_type == "question_published" and qid not in self.done_questions:
+                return msg["question"]
+        return None
+
+    async def _host(self) -> None:
+        socket = await self.transport.websocket(
+            f"/ws/live/{self.pin}/?topics=host", {"Cookie": f"{settings.SESSION_COOKIE_NAME}={self.host_cookie}"},
+        )
+        reader = asyncio.create_task(self._host_reader(socket))
+        try:
+            await self._run_game(socket)
+        finally:
+            reader.cancel()
+            await socket.close()
+
+    async def _run_game(self, socket) -> None:
+        """
+        Manual: host hamı cavab verən kimi reveal, hamı reveal-i alan kimi next basır.
+        --auto: server saatı özü reveal/next edir, host yalnız izləyir.
+        """
+        recorder = self.recorder
+        players = self.joined
+
+        recorder.enter("publish")
+        ack = await self._command(socket, "start", question_count=str(self.questions), auto=self.auto)
+        if not ack.get("ok"):
+            raise CommandError(f"start alınmadı: {ack.get('message') or ack}")
+
+        while True:
+            await self._wait_for("host:question", lambda: self._new_question() is not None)
+            question = self._new_question()
+            if question is None:
+                return
+            qid = question["id"]
+            self.done_questions.add(qid)
+            await self._wait_for(f"publish:{qid}", lambda: self.received[("question_published", qid)] >= players)
+
+            recorder.enter("answer")
+            await self._wait_for(f"answer:{qid}", lambda: self.acked[qid] >= players)
+
+            recorder.enter("reveal")
+            if not self.auto:
+                await self._command(socket, "reveal")
+            await self._wait_for(f"reveal:{qid}", lambda: self.received[("reveal", qid)] >= players)
+
+            last = int(question.get("index") or 0) >= int(question.get("total") or 0)
+            recorder.enter("finish" if last else "publish")
+            if not self.auto:
+                await self._command(socket, "next")
+            if last:
+                await self._wait_for("finished", lambda: self.received[("finished", None)] >= players)
+                return
+
+    async def run(self) -> None:
+        self.recorder.start()
+        self.recorder.enter("join")
+        try:
+            self.tasks = [asyncio.create_task(self._player(i)) for i in range(self.players)]
+            await self._wait_for("join", lambda: self.joined >= self.players or all(t.done() for t in self.tasks))
+            await self._host()
+            await asyncio.wait(self.tasks, timeout=self.timeout)
+        finally:
+            for task in self.tasks:
+                task.cancel()
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+            for task in self.tasks:
+                if task.cancelled():
+                    continue
+                exc = task.exception()
+                if exc is not None:
+                    self.recorder.errors[type(exc).__name__] += 1
+            self.recorder.stop()
+
+    def report(self) -> Dict[str, Any]:
+        latency = self.recorder.latency
+        return {
+            "players": self.players,
+            "questions": self.questions,
+            "joined": self.joined,
+            "finished": self.finished,
+            "latency_ms": {
+                "broadcast": {t: _percentiles(latency[t]) for t in BROADCAST_TYPES},
+                "answer_ack": _percentiles(latency["answer_ack"]),
+                "join": _percentiles(latency["join"]),
+            },
+            "stages": self.recorder.stages(),
+            "errors": dict(self.recorder.errors),
+            "timeouts": self.recorder.timeouts,
+        }
+
+
+def _regressions(report: Dict[str, Any], baseline: Dict[str, Any], limit: float) -> List[str]:
+    """p95-lər baseline-dan limit (nisbət) qədər pisdirsə siyahı."""
+    out = []
+    pairs = [("answer_ack", report["latency_ms"]["answer_ack"], baseline["latency_ms"]["answer_ack"])]
+    for t in BROADCAST_TYPES:
+        pairs.append((t, report["latency_ms"]["broadcast"][t], baseline["latency_ms"]["broadcast"][t]))
+    for name, now, before in pairs:
+        if now["p95"] is not None and before.get("p95"):
+            if now["p95"] > before["p95"] * (1 + limit):
+                out.append(f"{name} p95 {before['p95']} -> {now['p95']} ms")
+    if (report["players"], report["questions"]) != (baseline.get("players"), baseline.get("questions")):
+        return out  # sorğu sayı oyunçu / sual sayı ilə böyüyür: yalnız eyni ssenari müqayisə olunur
+    for stage, now in report["stages"].items():
+        before = baseline.get("stages", {}).get(stage, {})
+        if now["queries"] is not None and before.get("queries") is not None:
+            if now["queries"] > before["queries"] * (1 + limit) + 5:
+                out.append(f"{stage} queries {before['queries']} -> {now['queries']}")
+    return out
+
+
+class Command(BaseCommand):
+    help = "Live arena yük testi: N simulyasiya oyunçu + skriptli host, latency / CPU / SQL hesabatı."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--players", type=int, default=50)
+        parser.add_argument("--questions", type=int, default=3)
+        parser.add_argument("--exam", type=int, default=None, help="in-process: bu exam-dan yeni sessiya yarat")
+        parser.add_argument("--pin", default=None, help="mövcud lobby sessiyası")
+        parser.add_argument("--url", default=None, help="işləyən server (məs. http://127.0.0.1:8000)")
+        parser.add_argument("--host-cookie", default=None, help="--url rejimində host-un sessionid-si")
+        parser.add_argument("--compact", action="store_true", help="msgpack subprotocol")
+        parser.add_argument("--auto", action="store_true", help="server saatı reveal/next edir (host yalnız izləyir)")
+        parser.add_argument("--think-ms", type=float, default=1500, help="cavab vaxtının medianı (log-normal)")
+        parser.add_argument("--think-sigma", type=float, default=0.5)
+        parser.add_argument("--ramp", type=float, default=0.0, help="oyunçuların qoşulmasını bu qədər saniyəyə yay")
+        parser.add_argument("--timeout", type=float, default=60.0, help="hər mərhələ üçün gözləmə limiti")
+        parser.add_argument("--seed", type=int, default=None)
+        parser.add_argument("--keep", action="store_true", help="yaradılan sessiyanı silmə")
+        parser.add_argument("--json", action="store_true", help="yalnız JSON çıxış")
+        parser.add_argument("--output", default=None, help="JSON hesabatı fayla yaz")
+        parser.add_argument("--baseline", default=None, help="əvvəlki JSON hesabat (regressiya yoxlaması)")
+        parser.add_argument("--max-regression", type=float, default=0.25)
+
+    def handle(self, *args, **options):
+        created = None
+        if options["url"]:
+            if not options["pin"] or not options["host_cookie"]:
+                raise CommandError("--url rejimində --pin və --host-cookie lazımdır.")
+            transport = UrlTransport(options["url"], options["compact"])
+            pin, host_cookie = options["pin"], options["host_cookie"]
+        else:
+            session = self._session(options)
+            if options["pin"] is None:
+                created = session
+            pin, host_cookie = session.pin, self._host_cookie(session)
+            transport = InProcessTransport(options["compact"])
+
+        recorder = Recorder(count_queries=options["url"] is None)
+        test = LoadTest(transport, recorder, pin, host_cookie, options)
+        try:
+            asyncio.run(test.run())
+        finally:
+            if created is not None and not options["keep"]:
+                created.delete()
+
+        report = {
+            "mode": "url" if options["url"] else "inprocess",
+            "pin": pin,
+            "compact": options["compact"],
+            "channel_layer": settings.CHANNEL_LAYERS.get("default", {}).get("BACKEND"),
+            **test.report(),
+        }
+
+        regressions = []
+        if options["baseline"]:
+            with open(options["baseline"], encoding="utf-8") as fh:
+                regressions = _regressions(report, json.load(fh), options["max_regression"])
+            report["regressions"] = regressions
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as fh:
+                json.dump(report, fh, indent=2)
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report))
+        else:
+            self._print(report)
+
+        if regressions:
+            raise CommandError("Regressiya: " + "; ".join(regressions))
+
+    def _session(self, options) -> LiveSession:
+        if options["pin"]:
+            session = LiveSession.objects.filter(pin=options["pin"]).first()
+            if session is None:
+                raise CommandError(f"Sessiya tapılmadı: {options['pin']}")
+            if session.state != LiveSession.STATE_LOBBY:
+                raise CommandError("Sessiya lobby-də deyil.")
+            return session
+        if options["exam"] is None:
+            raise CommandError("--exam və ya --pin lazımdır.")
+
+        exam = Exam.objects.filter(pk=options["exam"]).first()
+        if exam is None:
+            raise CommandError(f"Exam tapılmadı: {options['exam']}")
+        return LiveSession.objects.create(exam=exam, host_user=exam.author)
+
+    def _host_cookie(self, session: LiveSession) -> str:
+        """Host üçün login olunmuş sessiya (WS AuthMiddleware sessionid-dən oxuyur)."""
+        user = session.host_user
+        store = import_module(settings.SESSION_ENGINE).SessionStore()
+        store[SESSION_KEY] = str(user.pk)
+        store[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        store[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        store.create()
+        return store.session_key
+
+    def _print(self, report: Dict[str, Any]) -> None:
+        w = self.stdout.write
+        w(f"{report['mode']} | pin {report['pin']} | {report['joined']}/{report['players']} oyunçu, "
+          f"{report['finished']} finished | layer {report['channel_layer']}")
+        w("latency (ms)            count      p50      p95      p99      max")
+        rows = [(f"broadcast {t}", v) for t, v in report["latency_ms"]["broadcast"].items()]
+        rows += [("answer_ack", report["latency_ms"]["answer_ack"]), ("join", report["latency_ms"]["join"])]
+        for name, p in rows:
+            w(f"{name:22} {p['count']:>6} " + " ".join(f"{str(p[k]):>8}" for k in ("p50", "p95", "p99", "max")))
+        w("stage        wall_s    cpu_s  queries")
+        for stage, s in report["stages"].items():
+            w(f"{stage:10} {s['wall_s']:>8} {s['cpu_s']:>8} {str(s['queries']):>8}")
+        if report["errors"]:
+            w(f"errors: {report['errors']}")
+        if report["timeouts"]:
+            w(f"timeouts: {report['timeouts']}")
+        for line in report.get("regressions", []):
+            w(f"REGRESSION {line}")
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 01:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("liveExam", "0005_liveanswer_choice_ids_alter_liveanswer_choice_id"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="livesession",
+            name="state_version",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
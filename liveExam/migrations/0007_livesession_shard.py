@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 04:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("liveExam", "0006_livesession_state_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="livesession",
+            name="shard",
+            field=models.CharField(blank=True, default="", max_length=64),
+        ),
+    ]
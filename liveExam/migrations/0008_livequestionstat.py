@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-19 01:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("liveExam", "0007_livesession_shard"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LiveQuestionStat",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("question_id", models.IntegerField()),
+                ("total_players", models.PositiveIntegerField(default=0)),
+                ("answered_count", models.PositiveIntegerField(default=0)),
+                ("correct_count", models.PositiveIntegerField(default=0)),
+                ("avg_answer_ms", models.PositiveIntegerField(default=0)),
+                ("option_counts", models.JSONField(blank=True, default=dict)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("session", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="question_stats", to="liveExam.livesession")),
+            ],
+            options={
+                "constraints": [models.UniqueConstraint(fields=("session", "question_id"), name="uniq_stat_per_session_question")],
+            },
+        ),
+    ]
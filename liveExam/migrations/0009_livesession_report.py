@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 01:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("liveExam", "0008_livequestionstat"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="livesession",
+            name="report",
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 06:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("liveExam", "0009_livesession_report"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="livesession",
+            name="lobby_version",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -53,9 +53,21 @@ class LiveSession(models.Model):
     # ✅ Random seçilən sualların ID-ləri (order burada saxlanır)
     selected_question_ids = models.JSONField(default=list, blank=True)
 
+    # Hər state keçidində (sual / reveal / finish) artır: live_state_json ETag-i və cache açarı
+    state_version = models.PositiveIntegerField(default=0)
+
+    # PIN sharding routing cədvəli: sessiyanın hot state-i olan worker (bax sharding.py)
+    shard = models.CharField(max_length=64, blank=True, default="")
+
+    # Oyun bitəndə bir dəfə hesablanan analitika hesabatı (bax report.py)
+    report = models.JSONField(null=True, blank=True)
+
+    # Hər lobby join / leave-də artır: proseslərdəki roster cache-lərinin versiyası (bax lobby.py)
+    lobby_version = models.PositiveIntegerField(default=0)
+
     def _ensure_unique_pin(self):
         tries = 0
-        while LiveSession.objects.filter(pin=self.pin).exists():
+        while LiveSession.objects.filter(pin=self.pin).exclude(pk=self.pk).exists():
             self.pin = generate_pin()
             tries += 1
             if tries > 10:
@@ -127,3 +139,29 @@ class LiveAnswer(models.Model):
 
     class Meta:
         unique_together = [("session", "player", "question_id")]
+
+
+class LiveQuestionStat(models.Model):
+    """
+    Reveal-də bir dəfə yazılan sual xülasəsi (yaddaşdakı histogramdan):
+    host bar chart-ı və hesabatlar LiveAnswer üzərində GROUP BY etmir.
+    """
+    session = models.ForeignKey(LiveSession, on_delete=models.CASCADE, related_name="question_stats")
+    question_id = models.IntegerField()
+
+    total_players = models.PositiveIntegerField(default=0)
+    answered_count = models.PositiveIntegerField(default=0)
+    correct_count = models.PositiveIntegerField(default=0)
+    avg_answer_ms = models.PositiveIntegerField(default=0)
+    # {"<option_id>": seçən oyunçu sayı} (multi-select-də bir cavab bir neçə variantı sayır)
+    option_counts = models.JSONField(default=dict, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["session", "question_id"], name="uniq_stat_per_session_question")
+        ]
+
+    def __str__(self):
+        return f"{self.session.pin} q{self.question_id}"
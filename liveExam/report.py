@@ -0,0 +1,193 @@
+# liveExam/report.py
+"""
+Oyun bitəndən sonra host üçün analitika hesabatı.
+
+finish_game-də bir dəfə hesablanır (cavablar flush olunandan sonra, deck hələ
+yaddaşda ikən) və LiveSession.report-a JSON kimi yazılır; hesabat səhifəsi
+onu olduğu kimi qaytarır, xam LiveAnswer-ə yenidən getmir.
+
+Hesablama: LiveAnswer üzrə bir keçid (values_list, iterator) + oyunçular
+üçün bir sorğu. Sual mətni / variantlar / doğru cavablar deck-dən gəlir.
+
+- questions: hər sual üçün dəqiqlik, orta answer_ms, variant paylanması
+- hardest: ən aşağı dəqiqlikli suallar (bərabərdirsə, daha uzun düşünülən)
+- players: yer, bal, doğru / cavab sayı, orta answer_ms, sual-sual bal
+- score_buckets: final balların paylanması (histogram)
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+from liveExam.deck import Deck, session_deck
+from liveExam.engine import _answer_choices
+from liveExam.models import LiveAnswer, LivePlayer, LiveSession
+
+
+REPORT_VERSION = 1
+HARDEST_LIMIT = getattr(settings, "LIVE_REPORT_HARDEST", 3)
+SCORE_BUCKETS = getattr(settings, "LIVE_REPORT_SCORE_BUCKETS", 10)
+
+
+def _ratio(part: int, whole: int) -> float:
+    return round(part / whole, 4) if whole else 0.0
+
+
+def _score_buckets(scores: List[int]) -> List[Dict[str, int]]:
+    """[0, max] aralığı SCORE_BUCKETS bərabər hissəyə: {"from", "to", "count"}."""
+    if not scores:
+        return []
+    top = max(max(scores), 0)
+    width = max(1, -(-(top + 1) // SCORE_BUCKETS))  # ceil
+    buckets = [
+        {"from": i * width, "to": (i + 1) * width - 1, "count": 0}
+        for i in range(-(-(top + 1) // width))
+    ]
+    for score in scores:
+        buckets[min(max(score, 0) // width, len(buckets) - 1)]["count"] += 1
+    return buckets
+
+
+def build_report(session: LiveSession, deck: Deck) -> Dict[str, Any]:
+    """Cavablar əvvəlcə flush olunmalıdır (finish_game bunu edir)."""
+    questions = {}
+    for index, dq in enumerate(deck.questions):
+        questions[dq.id] = {
+            "index": index + 1,
+            "dq": dq,
+            "answered": 0,
+            "correct": 0,
+            "ms_total": 0,
+            "counts": {oid: 0 for oid, _, _ in dq.options},
+        }
+
+    players: Dict[int, Dict[str, Any]] = {}
+    for pid, nickname, avatar_key, score in (
+        LivePlayer.objects
+        .filter(session_id=session.id)
+        .order_by("-score", "created_at")
+        .values_list("id", "nickname", "avatar_key", "score")
+    ):
+        players[pid] = {
+            "nickname": nickname,
+            "avatar_key": avatar_key,
+            "score": score,
+            "answered": 0,
+            "correct": 0,
+            "ms_total": 0,
+            "points": {},
+        }
+
+    answers = 0
+    rows = (
+        LiveAnswer.objects
+        .filter(session_id=session.id)
+        .values_list("player_id", "question_id", "choice_ids", "choice_id", "is_correct", "answer_ms", "awarded_points")
+        .iterator(chunk_size=2000)
+    )
+    for pid, qid, choice_ids, choice_id, ok, answer_ms, points in rows:
+        answers += 1
+        answer_ms = int(answer_ms or 0)
+        q = questions.get(qid)
+        if q is not None:
+            q["answered"] += 1
+            q["correct"] += 1 if ok else 0
+            q["ms_total"] += answer_ms
+            for oid in _answer_choices(choice_ids, choice_id):
+                q["counts"][oid] = q["counts"].get(oid, 0) + 1
+        p = players.get(pid)
+        if p is not None:
+            p["answered"] += 1
+            p["correct"] += 1 if ok else 0
+            p["ms_total"] += answer_ms
+            p["points"][qid] = int(points or 0)
+
+    # oynanmış suallar: cari indeksə qədər yayımlananlar + cavabı olanlar (vaxtından əvvəl finish)
+    played_upto = session.current_index if session.current_question_id else -1
+    played = [q for q in questions.values() if q["index"] - 1 <= played_upto or q["answered"]]
+    played_ids = [q["dq"].id for q in played]
+
+    question_rows = []
+    for q in played:
+        dq = q["dq"]
+        question_rows.append({
+            "question_id": dq.id,
+            "index": q["index"],
+            "text": dq.text,
+            "multi": dq.multi,
+            "answered": q["answered"],
+            "correct": q["correct"],
+            "accuracy": _ratio(q["correct"], q["answered"]),
+            "avg_answer_ms": q["ms_total"] // q["answered"] if q["answered"] else 0,
+            "options": [
+                {
+                    "id": oid,
+                    "label": label,
+                    "text": text,
+                    "count": q["counts"].get(oid, 0),
+                    "share": _ratio(q["counts"].get(oid, 0), q["answered"]),
+                    "is_correct": oid in dq.correct_ids,
+                }
+                for oid, label, text in dq.options
+            ],
+        })
+
+    hardest = sorted(
+        (row for row in question_rows if row["answered"]),
+        key=lambda row: (row["accuracy"], -row["avg_answer_ms"], row["index"]),
+    )[:HARDEST_LIMIT]
+
+    player_rows = []
+    for rank, p in enumerate(players.values(), start=1):
+        player_rows.append({
+            "rank": rank,
+            "nickname": p["nickname"],
+            "avatar_key": p["avatar_key"],
+            "score": p["score"],
+            "answered": p["answered"],
+            "correct": p["correct"],
+            "accuracy": _ratio(p["correct"], p["answered"]),
+            "avg_answer_ms": p["ms_total"] // p["answered"] if p["answered"] else 0,
+            # played_ids sırası ilə; cavab verilməyibsə None
+            "points": [p["points"].get(qid) for qid in played_ids],
+        })
+
+    total_correct = sum(row["correct"] for row in question_rows)
+    total_answered = sum(row["answered"] for row in question_rows)
+    return {
+        "version": REPORT_VERSION,
+        "pin": session.pin,
+        "exam": getattr(session.exam, "title", "") or "",
+        "generated_at": timezone.now().isoformat(),
+        "summary": {
+            "players": len(player_rows),
+            "questions": len(question_rows),
+            "answers": answers,
+            "accuracy": _ratio(total_correct, total_answered),
+            "avg_score": sum(p["score"] for p in player_rows) // len(player_rows) if player_rows else 0,
+        },
+        "questions": question_rows,
+        "hardest": [
+            {k: row[k] for k in ("question_id", "index", "text", "accuracy", "avg_answer_ms")}
+            for row in hardest
+        ],
+        "players": player_rows,
+        "score_buckets": _score_buckets([p["score"] for p in player_rows]),
+    }
+
+
+def store_report(session: LiveSession, deck: Optional[Deck] = None) -> Dict[str, Any]:
+    """
+    Hesabatı bir dəfə yazır: artıq varsa (təkrar finish, paralel çağırış)
+    mövcud olan qaytarılır.
+    """
+    if session.report:
+        return session.report
+    report = build_report(session, deck if deck is not None else session_deck(session))
+    if not LiveSession.objects.filter(pk=session.pk, report__isnull=True).update(report=report):
+        report = LiveSession.objects.filter(pk=session.pk).values_list("report", flat=True).first() or report
+    session.report = report
+    return report
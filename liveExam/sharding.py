@@ -0,0 +1,164 @@
+# liveExam/sharding.py
+"""
+Live sessiyaların PIN üzrə worker proseslərə bölünməsi (sharding).
+
+Engine / roster / clock / deck / event log proses daxilindədir: sessiyanın
+bütün HTTP və WS trafiki eyni prosesə düşməlidir. Bunun üçün:
+
+- LIVE_SHARDS = {"w1": "127.0.0.1:8001", "w2": "unix:/run/emsarena/w2.sock"}
+  (env: LIVE_SHARDS="w1=127.0.0.1:8001,w2=127.0.0.1:8002"), hər worker öz
+  adını LIVE_SHARD-da bilir
+- consistent hash ring (virtual node-larla): worker əlavə olunanda / çıxanda
+  yalnız ~1/N PIN yerini dəyişir
+- routing cədvəli = LiveSession.shard: ilk müraciətdə ring-dən seçilib DB-yə
+  yazılır və sessiya bitənə qədər dəyişmir (oyun ortasında LIVE_SHARDS
+  dəyişsə belə state itmir); worker konfiqdən çıxarılıbsa yenidən seçilir
+- front door (`manage.py live_frontdoor`): bağlantının ilk sətrindən PIN-i
+  oxuyub onu sahib worker-ə ötürür (WebSocket upgrade-i olduğu kimi,
+  HTTP-ni Connection: close ilə)
+- ShardAffinityMiddleware: worker-də səhv yerə düşmüş müraciət (front door
+  bypass / konfiq fərqi) HTTP-də 421, WS-də close 4421 alır
+
+LIVE_SHARDS boşdursa sharding söndürülüb: hər şey hər prosesdə işləyir.
+"""
+
+from __future__ import annotations
+
+import bisect
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+
+from liveExam.models import LiveSession
+
+
+SHARDS: Dict[str, str] = getattr(settings, "LIVE_SHARDS", {}) or {}
+SHARD: str = getattr(settings, "LIVE_SHARD", "") or ""
+VNODES = getattr(settings, "LIVE_SHARD_VNODES", 128)
+ROUTE_CACHE_SIZE = 10000
+
+# /live/join/123456/, /live/123456/start/, /live/qr/123456.png, /ws/live/123456/play/ ...
+PIN_PATH_RE = re.compile(r"^/(?:ws/)?live/(?:[a-z]+/)?(\d{6})(?:[/.?]|$)")
+
+MISDIRECTED_CLOSE_CODE = 4421
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    def __init__(self, names, vnodes: int = VNODES):
+        points: List[Tuple[int, str]] = sorted(
+            (_hash(f"{name}#{i}"), name) for name in names for i in range(vnodes)
+        )
+        self._keys = [h for h, _ in points]
+        self._names = [n for _, n in points]
+
+    def get(self, key: str) -> Optional[str]:
+        if not self._keys:
+            return None
+        i = bisect.bisect(self._keys, _hash(key)) % len(self._keys)
+        return self._names[i]
+
+
+_RING = HashRing(sorted(SHARDS))
+
+
+def pick(key: str) -> Optional[str]:
+    """Ring-dən birbaşa seçim (PIN-siz trafik üçün, məs. client IP-si ilə)."""
+    return _RING.get(key)
+
+
+def enabled() -> bool:
+    return bool(SHARDS)
+
+
+def pin_from_path(path: str) -> Optional[str]:
+    match = PIN_PATH_RE.match(path or "")
+    return match.group(1) if match else None
+
+
+# pin -> shard (sessiya boyu dəyişmir; front door hər bağlantıda DB-yə getməsin)
+_ROUTES: "OrderedDict[str, str]" = OrderedDict()
+_ROUTES_LOCK = threading.Lock()
+
+
+def _remember(pin: str, shard: str) -> None:
+    with _ROUTES_LOCK:
+        _ROUTES[pin] = shard
+        _ROUTES.move_to_end(pin)
+        while len(_ROUTES) > ROUTE_CACHE_SIZE:
+            _ROUTES.popitem(last=False)
+
+
+def shard_for(pin: str) -> Optional[str]:
+    """
+    PIN-in sahib worker-i (routing cədvəlindən; yoxdursa ring-dən seçib yazır).
+    Sharding sönülüdürsə və ya sessiya yoxdursa None (istənilən worker).
+    """
+    if not enabled() or not pin:
+        return None
+    with _ROUTES_LOCK:
+        shard = _ROUTES.get(pin)
+    if shard in SHARDS:
+        return shard
+
+    row = LiveSession.objects.filter(pin=pin).values_list("shard", flat=True).first()
+    if row is None:
+        return None
+    if row not in SHARDS:
+        # ilk müraciət (və ya worker konfiqdən çıxıb): yalnız köhnə dəyər hələ yerindədirsə yaz,
+        # paralel iki proses eyni anda seçsə də qalib birdir
+        LiveSession.objects.filter(pin=pin, shard=row).update(shard=_RING.get(pin))
+        row = LiveSession.objects.filter(pin=pin).values_list("shard", flat=True).first()
+    _remember(pin, row)
+    return row
+
+
+def owns(pin: str) -> bool:
+    """Bu proses PIN-in hot state-ini saxlaya bilərmi?"""
+    if not enabled() or not SHARD:
+        return True
+    shard = shard_for(pin)
+    return shard is None or shard == SHARD
+
+
+def parse_address(address: str) -> Tuple[str, object]:
+    """"unix:/path" -> ("unix", "/path"); "host:port" -> ("tcp", (host, port))."""
+    if address.startswith("unix:"):
+        return "unix", address[len("unix:"):]
+    host, _, port = address.rpartition(":")
+    return "tcp", (host or "127.0.0.1", int(port))
+
+
+class ShardAffinityMiddleware:
+    """asgi.py: PIN-li müraciət başqa worker-indirsə burada emal olunmur."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] in ("http", "websocket") and enabled() and SHARD:
+            pin = pin_from_path(scope.get("path", ""))
+            if pin and not await database_sync_to_async(owns)(pin):
+                return await self._misdirected(scope, receive, send)
+        return await self.app(scope, receive, send)
+
+    async def _misdirected(self, scope, receive, send):
+        if scope["type"] == "websocket":
+            await receive()  # websocket.connect
+            await send({"type": "websocket.close", "code": MISDIRECTED_CLOSE_CODE})
+            return
+        body = b"Misdirected request: session lives on another worker."
+        await send({
+            "type": "http.response.start",
+            "status": 421,
+            "headers": [(b"content-type", b"text/plain"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
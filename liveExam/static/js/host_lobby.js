@@ -40,6 +40,7 @@ const AVATARS = {
     qOptions: document.getElementById("qOptions"),
   
     leaderList: document.getElementById("leaderList"),
+    reportWrap: document.getElementById("reportWrap"),
   
     // ✅ yeni: debug toggle düyməsi (HTML-də əlavə et)
     debugBtn: document.getElementById("debugBtn"),
@@ -49,6 +50,9 @@ const AVATARS = {
   let qTimerInterval = null;
   let autoRevealTimer = null;
   let autoNextTimer = null;
+  // server saatı auto reveal/next edirsə brauzer timer-ləri qurulmur (yalnız fallback)
+  let serverClock = false;
+  let currentQuestionId = null;
   
 
 /* =========================
@@ -189,64 +193,127 @@ const AVATARS = {
      WEBSOCKETS
      ========================= */
   
-  // Lobby WS
-  const lobbyWs = new WebSocket(getWsUrl(`/ws/live/${GAME_CONFIG.pin}/lobby/`));
+  // Bir socket: lobby (oyunçu siyahısı) + host (play event-ləri, komandalar, ack) topic-ləri
+  const liveWs = LiveCodec.open(getWsUrl(`/ws/live/${GAME_CONFIG.pin}/?topics=lobby,host`));
+  let commandSeq = 0;
   
-  lobbyWs.onopen = () => log("Lobby WS connected", "debug");
-  lobbyWs.onclose = () => log("Lobby WS closed", "debug");
-  lobbyWs.onerror = () => log("Lobby WS error", "error", { force: true });
+  liveWs.onopen = () => log("Live WS connected", "debug");
+  liveWs.onclose = () => log("Live WS closed (HTTP fallback)", "debug");
+  liveWs.onerror = () => log("Live WS error", "error", { force: true });
   
-  lobbyWs.onmessage = (e) => {
-    const data = JSON.parse(e.data);
+  const LOBBY_TYPES = new Set(["lobby_state", "player_joined", "player_left", "game_started"]);
+  
+  liveWs.onmessage = (e) => {
+    const msg = LiveCodec.decode(e.data);
+    if (LOBBY_TYPES.has(msg.type)) onLobbyMessage(msg);
+    else onHostMessage(msg);
+  };
+  
+  // Lobby: snapshot yalnız connect/resync-də, sonra player_joined / player_left delta-ları
+  let lobbyVersion = -1;
+  const lobbyPlayers = new Map(); // id -> player (son qoşulan sonda)
+
+  function renderPlayerChip(p) {
+    const div = document.createElement("div");
+    div.className = "player-chip";
+    div.dataset.playerId = p.id;
+
+    const emoji = AVATARS[p.avatar_key] || "👤";
+
+    div.innerHTML = `
+      <span class="player-avatar">${emoji}</span>
+      <div class="player-name">${p.nickname}</div>
+    `;
+    return div;
+  }
+
+  function renderLobby(count) {
+    if (els.playersCount) els.playersCount.textContent = count || 0;
+    if (!els.playersList) return;
+    els.playersList.innerHTML = "";
+    // son qoşulan yuxarıda
+    Array.from(lobbyPlayers.values()).reverse().forEach(p => els.playersList.appendChild(renderPlayerChip(p)));
+  }
+
+  function onLobbyMessage(data) {
     log(`Lobby msg: ${data.type}`, "debug");
   
     if (data.type === "lobby_state") {
-        if (els.playersCount) els.playersCount.textContent = data.count || 0;
-      
-        if (els.playersList) {
-          els.playersList.innerHTML = "";
-          (data.players || []).forEach(p => {
-            const div = document.createElement("div");
-            div.className = "player-chip";
-      
-            const emoji = AVATARS[p.avatar_key] || "👤";
-      
-            div.innerHTML = `
-              <span class="player-avatar">${emoji}</span>
-              <div class="player-name">${p.nickname}</div>
-            `;
-            els.playersList.appendChild(div);
-          });
-        }
+      lobbyVersion = data.version ?? -1;
+      lobbyPlayers.clear();
+      (data.players || []).slice().reverse().forEach(p => lobbyPlayers.set(p.id, p));
+      renderLobby(data.count);
+    }
+
+    else if (data.type === "player_joined" || data.type === "player_left") {
+      if (data.version <= lobbyVersion) return;            // snapshot artıq daxildir
+      if (data.version !== lobbyVersion + 1) {             // boşluq -> tam state istə
+        liveWs.send(JSON.stringify({ type: "resync" }));
+        return;
+      }
+      lobbyVersion = data.version;
+
+      if (data.type === "player_joined") {
+        lobbyPlayers.delete(data.player.id);
+        lobbyPlayers.set(data.player.id, data.player);
+        const old = els.playersList?.querySelector(`[data-player-id="${data.player.id}"]`);
+        if (old) old.remove();
+        els.playersList?.prepend(renderPlayerChip(data.player));
+      } else {
+        lobbyPlayers.delete(data.player_id);
+        els.playersList?.querySelector(`[data-player-id="${data.player_id}"]`)?.remove();
       }
-      
+      if (els.playersCount) els.playersCount.textContent = data.count || 0;
+    }
   
     // istəsən: game_started redirect kimi mesajları da burada log edə bilərsən
-  };
+  }
   
   
-  // Play WS
-  const playWs = new WebSocket(getWsUrl(`/ws/live/${GAME_CONFIG.pin}/play/`));
+  // WS açıqdırsa komanda, yoxsa köhnə HTTP POST
+  function sendCommand(action, extra = {}, fallbackUrl = null, fallbackBody = null) {
+    if (liveWs.readyState === WebSocket.OPEN) {
+      const id = ++commandSeq;
+      log(`CMD -> ${action} #${id}`, "debug");
+      liveWs.send(JSON.stringify({ type: "command", action, id, ...extra }));
+      return;
+    }
+    if (!fallbackUrl) return;
+    sendAction(fallbackUrl, fallbackBody).then((res) => {
+      if (res && "auto" in res) onAutoAck(res);
+    });
+  }
+  
+  function onAutoAck(res) {
+    serverClock = !!res.auto;
+    if (serverClock || !els.autoMode?.checked) {
+      if (autoRevealTimer) clearTimeout(autoRevealTimer);
+      if (autoNextTimer) clearTimeout(autoNextTimer);
+    }
+  }
   
-  playWs.onopen = () => log("Play WS connected", "debug");
-  playWs.onclose = () => log("Play WS closed", "debug");
-  playWs.onerror = () => log("Play WS error", "error", { force: true });
+  // play event-ləri + komanda ack-ları
+  function onHostMessage(msg) {
+    log(`Host msg: ${msg.type}`, "debug");
   
-  playWs.onmessage = (e) => {
-    const msg = JSON.parse(e.data);
-    log(`Play msg: ${msg.type}`, "debug");
+    if (msg.type === "ack") {
+      if (msg.ok === false) log(`Action error: ${msg.message || msg.action}`, "error", { force: true });
+      else log(`Action OK: ${msg.action}`, "debug");
+      if (msg.action === "auto") onAutoAck(msg);
+    }
   
-    if (msg.type === "question_published") {
+    else if (msg.type === "question_published") {
       updateUIState("question");
       renderQuestion(msg.question);
       log(`Sual yayımlandı: ${msg.question.index}/${msg.question.total}`, "info", { force: true });
   
-      // Auto Reveal (vaxt bitəndə)
-      if (els.autoMode?.checked && msg.question.ends_at) {
+      // Auto Reveal (vaxt bitəndə) - server saatı yoxdursa
+      serverClock = !!msg.auto;
+      if (autoRevealTimer) clearTimeout(autoRevealTimer);
+      if (els.autoMode?.checked && !serverClock && msg.question.ends_at) {
         const ends = new Date(msg.question.ends_at).getTime();
         const ms = Math.max(0, ends - Date.now());
   
-        if (autoRevealTimer) clearTimeout(autoRevealTimer);
         autoRevealTimer = setTimeout(() => {
           if (state === "question") els.revealBtn?.click();
         }, ms + 500);
@@ -258,9 +325,10 @@ const AVATARS = {
       renderLeaderboard(msg.top || []);
       log("Nəticələr göstərildi", "info", { force: true });
   
-      // Auto Next (5 saniyə sonra)
-      if (els.autoMode?.checked) {
-        if (autoNextTimer) clearTimeout(autoNextTimer);
+      // Auto Next (5 saniyə sonra) - server saatı yoxdursa
+      serverClock = !!msg.auto_next_at;
+      if (autoNextTimer) clearTimeout(autoNextTimer);
+      if (els.autoMode?.checked && !serverClock) {
         autoNextTimer = setTimeout(() => {
           if (state === "reveal") els.nextBtn?.click();
         }, 5000);
@@ -271,13 +339,19 @@ const AVATARS = {
       updateUIState("finished");
       renderLeaderboard(msg.top || []);
       log("Oyun bitdi", "info", { force: true });
+      loadReport();
     }
   
     // əlavə debug event: answer_progress (istəsən burada izləyərsən)
     else if (msg.type === "answer_progress") {
       log(`Progress: ${msg.answered_count}/${msg.total_players}`, "debug");
     }
-  };
+
+    // canlı variant paylanması (server seyrək tick-lə, yalnız host-a göndərir)
+    else if (msg.type === "answer_histogram") {
+      if (msg.question_id === currentQuestionId) renderHistogram(msg.option_counts || {}, msg.total_players);
+    }
+  }
   
   /* =========================
      RENDER
@@ -285,6 +359,7 @@ const AVATARS = {
   function renderQuestion(q) {
     if (!els.qMeta || !els.qText || !els.qOptions) return;
   
+    currentQuestionId = q.id;
     els.qMeta.textContent = `Sual ${q.index} / ${q.total}`;
     els.qText.textContent = q.text;
     els.qOptions.innerHTML = "";
@@ -292,6 +367,7 @@ const AVATARS = {
     (q.options || []).forEach((opt, idx) => {
       const div = document.createElement("div");
       div.className = `opt-card opt-bg-${idx % 4}`;
+      div.dataset.optionId = opt.id;
   
       // UI üçün A,B,C,D sadəcə labeldır (backend artıq qarışdırır)
       const letter = String.fromCharCode(65 + idx);
@@ -300,6 +376,8 @@ const AVATARS = {
           ${letter}
         </span>
         ${opt.text}
+        <span class="opt-fill"></span>
+        <span class="opt-count">0</span>
       `;
       els.qOptions.appendChild(div);
     });
@@ -324,6 +402,18 @@ const AVATARS = {
     }
   }
   
+  function renderHistogram(counts, totalPlayers) {
+    if (!els.qOptions) return;
+    const total = Math.max(1, totalPlayers || 0);
+    els.qOptions.querySelectorAll(".opt-card").forEach(card => {
+      const n = counts[card.dataset.optionId] || 0;
+      const fill = card.querySelector(".opt-fill");
+      const count = card.querySelector(".opt-count");
+      if (fill) fill.style.width = `${Math.round((n / total) * 100)}%`;
+      if (count) count.textContent = n;
+    });
+  }
+
   function renderLeaderboard(topPlayers) {
     if (!els.leaderList) return;
   
@@ -342,18 +432,84 @@ const AVATARS = {
     });
   }
   
+  // Oyundan sonrakı hesabat (finish-də serverdə bir dəfə hesablanıb saxlanılır)
+  async function loadReport() {
+    if (!els.reportWrap || !GAME_CONFIG.urls.report) return;
+    try {
+      const res = await fetch(GAME_CONFIG.urls.report, { credentials: "same-origin" });
+      const json = await res.json();
+      if (json.ok) renderReport(json.report);
+      else log("Hesabat: " + (json.message || res.status), "debug");
+    } catch (e) {
+      log("Hesabat yüklənmədi: " + e.message, "error", { force: true });
+    }
+  }
+
+  function renderReport(report) {
+    const pct = (x) => `${Math.round((x || 0) * 100)}%`;
+    const sec = (ms) => `${((ms || 0) / 1000).toFixed(1)}s`;
+    const s = report.summary || {};
+
+    const wrap = els.reportWrap;
+    wrap.innerHTML = `
+      <h3 class="report-title"><i class="fas fa-chart-bar"></i> Hesabat</h3>
+      <div class="report-summary">
+        <span>Oyunçu: <b>${s.players || 0}</b></span>
+        <span>Sual: <b>${s.questions || 0}</b></span>
+        <span>Dəqiqlik: <b>${pct(s.accuracy)}</b></span>
+        <span>Orta bal: <b>${s.avg_score || 0}</b></span>
+      </div>
+      <div class="report-hardest"></div>
+      <div class="report-questions"></div>
+    `;
+
+    const hardest = wrap.querySelector(".report-hardest");
+    (report.hardest || []).forEach(q => {
+      const div = document.createElement("div");
+      div.className = "report-row report-hard";
+      div.innerHTML = `<span>🔥 ${q.index}. ${q.text}</span><span>${pct(q.accuracy)} · ${sec(q.avg_answer_ms)}</span>`;
+      hardest.appendChild(div);
+    });
+
+    const list = wrap.querySelector(".report-questions");
+    (report.questions || []).forEach(q => {
+      const div = document.createElement("div");
+      div.className = "report-row";
+      const opts = (q.options || [])
+        .map(o => `<span class="report-opt${o.is_correct ? " is-correct" : ""}">${o.text}: ${o.count}</span>`)
+        .join("");
+      div.innerHTML = `
+        <div><b>${q.index}. ${q.text}</b><div class="report-opts">${opts}</div></div>
+        <span>${pct(q.accuracy)} · ${sec(q.avg_answer_ms)}</span>
+      `;
+      list.appendChild(div);
+    });
+
+    wrap.style.display = "block";
+  }
+
   /* =========================
      BUTTON ACTIONS
      ========================= */
   els.startBtn && (els.startBtn.onclick = () => {
+    const count = els.qCountInput?.value || "";
+    const auto = !!els.autoMode?.checked;
+    const fd = new FormData();
+    if (count) fd.append("question_count", count);
+    fd.append("auto", auto ? "1" : "0");
+    sendCommand("start", { question_count: count, auto }, GAME_CONFIG.urls.start, fd);
+  });
+
+  // Auto dəyişəndə server saatına bildir; auto=false cavabı -> brauzer timer-ləri
+  els.autoMode && els.autoMode.addEventListener("change", () => {
     const fd = new FormData();
-    if (els.qCountInput?.value) fd.append("question_count", els.qCountInput.value);
-    sendAction(GAME_CONFIG.urls.start, fd);
+    fd.append("auto", els.autoMode.checked ? "1" : "0");
+    sendCommand("auto", { enabled: els.autoMode.checked }, GAME_CONFIG.urls.autoMode, fd);
   });
   
-  els.revealBtn && (els.revealBtn.onclick = () => sendAction(GAME_CONFIG.urls.endQuestion));
-  els.nextBtn && (els.nextBtn.onclick = () => sendAction(GAME_CONFIG.urls.nextQuestion));
-  els.finishBtn && (els.finishBtn.onclick = () => sendAction(GAME_CONFIG.urls.finish));
+  els.revealBtn && (els.revealBtn.onclick = () => sendCommand("reveal", {}, GAME_CONFIG.urls.endQuestion));
+  els.nextBtn && (els.nextBtn.onclick = () => sendCommand("next", {}, GAME_CONFIG.urls.nextQuestion));
+  els.finishBtn && (els.finishBtn.onclick = () => sendCommand("finish", {}, GAME_CONFIG.urls.finish));
 
 const qc = document.getElementById("questionCount");
 const maxQ = parseInt(qc.getAttribute("max") || "1", 10);
@@ -0,0 +1,137 @@
+/* live_codec.js
+   Live websocket-ləri üçün kompakt kodlaşdırma (msgpack + qısa açarlar).
+   - LiveCodec.open(url)  -> WebSocket (subprotocol təklif edir, binaryType=arraybuffer)
+   - LiveCodec.decode(e.data) -> köhnə JSON formatında obyekt (uzun açarlar, ISO tarixlər)
+   Server subprotocol-u qəbul etməsə mesajlar JSON text gəlir, decode onu da oxuyur.
+   Cədvəllər liveExam/codec.py ilə EYNİ olmalıdır.
+*/
+(function (global) {
+  "use strict";
+
+  const PROTOCOL = "emsarena.live.msgpack.1";
+
+  const KEYS = {
+    type: "t", question: "q", options: "o", id: "i", text: "x", label: "l",
+    time_limit: "tl", points: "p", multi: "m", max_select: "ms",
+    started_at: "sa", ends_at: "ea", index: "ix", total: "tt", auto: "au",
+    question_id: "qi", correct_option_ids: "co", results: "r", top: "tp",
+    nickname: "nk", avatar_key: "ak", score: "s", rank: "rk", delta: "dl",
+    is_correct: "ic", awarded_points: "ap", total_score: "ts",
+    revealed_at: "ra", auto_next_at: "na", finished_at: "fa",
+    answered_count: "ac", total_players: "tpl", player: "pl", player_id: "pi",
+    players: "ps", count: "c", version: "v", message: "mg",
+  };
+
+  const TYPES = {
+    question_published: "qp", reveal: "rv", finished: "fn", answer_progress: "pg",
+    answer_saved: "as", lobby_state: "ls", player_joined: "pj", player_left: "px",
+    game_started: "gs", error: "er", ack: "ak", snapshot: "sn",
+  };
+
+  const KEYS_BACK = {};
+  Object.keys(KEYS).forEach(k => { KEYS_BACK[KEYS[k]] = k; });
+  const TYPES_BACK = {};
+  Object.keys(TYPES).forEach(k => { TYPES_BACK[TYPES[k]] = k; });
+
+  /* ---------- msgpack decode (server-in göndərdiyi alt çoxluq) ---------- */
+  const utf8 = new TextDecoder();
+
+  function unpack(buffer) {
+    const view = new DataView(buffer);
+    const bytes = new Uint8Array(buffer);
+    let pos = 0;
+
+    function str(len) {
+      const s = utf8.decode(bytes.subarray(pos, pos + len));
+      pos += len;
+      return s;
+    }
+    function arr(len) {
+      const out = new Array(len);
+      for (let i = 0; i < len; i++) out[i] = read();
+      return out;
+    }
+    function map(len) {
+      const out = {};
+      for (let i = 0; i < len; i++) {
+        const k = read();
+        out[k] = read();
+      }
+      return out;
+    }
+    function bin(len) {
+      const b = bytes.slice(pos, pos + len);
+      pos += len;
+      return b;
+    }
+
+    function read() {
+      const b = bytes[pos++];
+      if (b <= 0x7f) return b;                       // positive fixint
+      if (b >= 0xe0) return b - 0x100;               // negative fixint
+      if ((b & 0xf0) === 0x80) return map(b & 0x0f); // fixmap
+      if ((b & 0xf0) === 0x90) return arr(b & 0x0f); // fixarray
+      if ((b & 0xe0) === 0xa0) return str(b & 0x1f); // fixstr
+
+      let v;
+      switch (b) {
+        case 0xc0: return null;
+        case 0xc2: return false;
+        case 0xc3: return true;
+        case 0xc4: v = bytes[pos]; pos += 1; return bin(v);
+        case 0xc5: v = view.getUint16(pos); pos += 2; return bin(v);
+        case 0xc6: v = view.getUint32(pos); pos += 4; return bin(v);
+        case 0xca: v = view.getFloat32(pos); pos += 4; return v;
+        case 0xcb: v = view.getFloat64(pos); pos += 8; return v;
+        case 0xcc: v = bytes[pos]; pos += 1; return v;
+        case 0xcd: v = view.getUint16(pos); pos += 2; return v;
+        case 0xce: v = view.getUint32(pos); pos += 4; return v;
+        case 0xcf: v = Number(view.getBigUint64(pos)); pos += 8; return v;
+        case 0xd0: v = view.getInt8(pos); pos += 1; return v;
+        case 0xd1: v = view.getInt16(pos); pos += 2; return v;
+        case 0xd2: v = view.getInt32(pos); pos += 4; return v;
+        case 0xd3: v = Number(view.getBigInt64(pos)); pos += 8; return v;
+        case 0xd9: v = bytes[pos]; pos += 1; return str(v);
+        case 0xda: v = view.getUint16(pos); pos += 2; return str(v);
+        case 0xdb: v = view.getUint32(pos); pos += 4; return str(v);
+        case 0xdc: v = view.getUint16(pos); pos += 2; return arr(v);
+        case 0xdd: v = view.getUint32(pos); pos += 4; return arr(v);
+        case 0xde: v = view.getUint16(pos); pos += 2; return map(v);
+        case 0xdf: v = view.getUint32(pos); pos += 4; return map(v);
+      }
+      throw new Error("msgpack: unsupported byte 0x" + b.toString(16));
+    }
+
+    return read();
+  }
+
+  /* ---------- qısa açar -> uzun açar ---------- */
+  function expand(obj) {
+    if (Array.isArray(obj)) return obj.map(expand);
+    if (obj === null || typeof obj !== "object" || obj instanceof Uint8Array) return obj;
+
+    const out = {};
+    Object.keys(obj).forEach(k => {
+      const key = KEYS_BACK[k] || k;
+      let value = obj[k];
+      if (key === "type" && typeof value === "string") value = TYPES_BACK[value] || value;
+      else if (key.endsWith("_at") && typeof value === "number") value = new Date(value).toISOString();
+      else value = expand(value);
+      out[key] = value;
+    });
+    return out;
+  }
+
+  function decode(data) {
+    if (typeof data === "string") return JSON.parse(data);
+    return expand(unpack(data));
+  }
+
+  function open(url) {
+    const ws = new WebSocket(url, [PROTOCOL]);
+    ws.binaryType = "arraybuffer";
+    return ws;
+  }
+
+  global.LiveCodec = { PROTOCOL, open, decode };
+})(window);
@@ -259,7 +259,16 @@ function renderReveal(msg){
         resultList.appendChild(li);
     });
 
-    metaLine.textContent = "Növbəti sual hazırlanır...";
+    metaLine.textContent = standingText(msg.me) || "Növbəti sual hazırlanır...";
+}
+
+// Server hər oyunçuya öz yerini göndərir: { rank, delta, score, total }
+function standingText(me){
+    if (!me || !me.rank) return "";
+    let arrow = "";
+    if (me.delta > 0) arrow = ` ▲${me.delta}`;
+    else if (me.delta < 0) arrow = ` ▼${Math.abs(me.delta)}`;
+    return `Sən #${me.rank} / ${me.total}${arrow} · ${me.score} xal`;
 }
 
 function renderFinished(msg){
@@ -279,35 +288,106 @@ function renderFinished(msg){
         lbList.appendChild(li);
     });
     resultList.innerHTML = "";
+    metaLine.textContent = standingText(msg.me);
 }
 
 // WebSocket Initialization
+// Bir socket: lobby (wait room paneli) + play topic-ləri. game_started-də
+// səhifə və bağlantı dəyişmir - lobby paneli gizlənir, suallar eyni socket-dən gəlir.
+// Oyun event-ləri seq ilə gəlir: reconnect-də ?since=<lastSeq> -> server yalnız
+// buraxılmışları (və ya log-da yoxdursa snapshot) göndərir.
 // DİQQƏT: pin dəyişəni HTML-dən CONFIG obyekti ilə gələcək
-const playWs = new WebSocket(wsUrl(`/ws/live/${GAME_CONFIG.pin}/play/`));
+let inLobby = !!(GAME_CONFIG.inLobby && window.LobbyPanel);
+let playWs = null;
+let reconnectTimer = null;
+let lastSeq = null;
 
-playWs.onopen = async () => {
-    setConn(true);
-    // Fallback state fetch
-    try {
-        const res = await fetch(`/live/state/${GAME_CONFIG.pin}/`, { headers: { "Accept": "application/json" }});
-        const st = await res.json();
-        if (st.ok && st.question) {
-            resetUIForQuestion(st.question);
-            if (st.state === "reveal") {
-                renderReveal({ correct_option_ids: st.correct_option_ids || [], top: [], results: [] });
-            }
+function wsSend(obj){
+    if (playWs && playWs.readyState === WebSocket.OPEN) playWs.send(JSON.stringify(obj));
+}
+
+function leaveLobby(){
+    if (!inLobby) return;
+    inLobby = false;
+    LobbyPanel.hide();
+    document.getElementById("mainCard").style.display = "";
+    wsSend({ type: "unsubscribe", topic: "lobby" });
+}
+
+// Eyni sual artıq ekrandadır (snapshot + event üst-üstə düşüb) -> cavab itməsin
+function isCurrentQuestion(q){
+    if (!currentQuestion || !q || currentQuestion.id !== q.id) return false;
+    // JSON (ISO, mikrosaniyə) və msgpack (epoch ms) formatları fərqlidir -> ms ilə müqayisə
+    return new Date(currentQuestion.started_at).getTime() === new Date(q.started_at).getTime();
+}
+
+// Tam state (ilk açılış və ya server-in event log-u kifayət etməyəndə).
+// HTTP cavabı WS event-lərindən köhnə ola bilər; server-in WS snapshot-u isə həmişə tətbiq olunur.
+function applySnapshot(st, fromServer = false){
+    if (!st || !st.ok) return;
+    if (!fromServer && lastSeq !== null && st.seq <= lastSeq) return;
+    lastSeq = st.seq;
+
+    if (st.state === "finished") {
+        leaveLobby();
+        renderFinished({ top: st.top || [], me: st.me });
+    } else if (st.question && (st.state === "question" || st.state === "reveal")) {
+        leaveLobby();
+        if (!isCurrentQuestion(st.question)) resetUIForQuestion(st.question);
+        if (st.state === "reveal") {
+            renderReveal({ correct_option_ids: st.correct_option_ids || [], top: [], results: [], me: st.me });
         }
-    } catch(e){}
-};
+    }
+}
 
-playWs.onclose = () => setConn(false);
-playWs.onerror = () => setConn(false);
+function connectWs(){
+    if (reconnectTimer) clearTimeout(reconnectTimer);
+    const topics = inLobby ? "lobby,play" : "play";
+    const since = lastSeq !== null ? `&since=${lastSeq}` : "";
+    playWs = LiveCodec.open(wsUrl(`/ws/live/${GAME_CONFIG.pin}/?topics=${topics}${since}`));
+
+    playWs.onopen = async () => {
+        setConn(true);
+        if (lastSeq !== null) return;   // reconnect: catch-up server-dən gəlir
+        // İlk açılış: state fetch
+        try {
+            const res = await fetch(`/live/state/${GAME_CONFIG.pin}/`, { headers: { "Accept": "application/json" }});
+            applySnapshot(await res.json());
+        } catch(e){}
+    };
 
-playWs.onmessage = (e) => {
-    const msg = JSON.parse(e.data);
+    playWs.onclose = () => {
+        setConn(false);
+        reconnectTimer = setTimeout(connectWs, 2000);
+    };
+    playWs.onerror = () => setConn(false);
+    playWs.onmessage = onWsMessage;
+}
+
+function onWsMessage(e){
+    const msg = LiveCodec.decode(e.data);
+
+    if (msg.type === "snapshot") {
+        applySnapshot(msg, true);
+        return;
+    }
+
+    // oyun event-i: təkrarı (catch-up ilə qrup mesajı üst-üstə düşəndə) at
+    if (typeof msg.seq === "number") {
+        if (lastSeq !== null && msg.seq <= lastSeq) return;
+        lastSeq = msg.seq;
+    }
+
+    if (msg.type === "game_started") {
+        leaveLobby();
+        return;
+    }
+
+    if (inLobby && LobbyPanel.handle(msg, wsSend)) return;
 
     if (msg.type === "question_published") {
-        resetUIForQuestion(msg.question);
+        leaveLobby();
+        if (!isCurrentQuestion(msg.question)) resetUIForQuestion(msg.question);
         return;
     }
 
@@ -325,4 +405,6 @@ playWs.onmessage = (e) => {
         renderFinished(msg);
         return;
     }
-};
\ No newline at end of file
+}
+
+connectWs();
@@ -1,4 +1,7 @@
-/* wait_room.js */
+/* wait_room.js
+   Player səhifəsinin lobby paneli. Öz socket-i yoxdur: player.js-in tək
+   socket-indən gələn lobby mesajlarını LobbyPanel.handle(msg, send) ilə ötürür.
+*/
 
 // Emojilər (Digər fayllarla eyni olmalıdır)
 const AVATARS = {
@@ -7,96 +10,90 @@ const AVATARS = {
     'avatar_9': '🐵', 'avatar_10': '🦄', 'avatar_11': '🐰', 'avatar_12': '🐹'
 };
 
-const els = {
-    myAvatar: document.getElementById("myAvatar"),
-    myNickname: document.getElementById("myNickname"),
-    list: document.getElementById("playersList"),
-    count: document.getElementById("count"),
-    wsStatus: document.getElementById("wsStatus")
-};
-
-// 1. Mənim Avatarımı Render Et
-// HTML-dən gələn açarı (məs: 'avatar_2') emojiyə çevirir
-const myKey = CONFIG.myAvatarKey; 
-const myEmoji = AVATARS[myKey] || '👤';
-if(els.myAvatar) els.myAvatar.textContent = myEmoji;
-
-// 2. Oyunçuları Render Et
-function renderPlayers(players) {
-    const arr = Array.isArray(players) ? players : [];
-    if(els.count) els.count.textContent = arr.length;
-
-    if(els.list) {
-        els.list.innerHTML = "";
-        arr.forEach(p => {
-            // Özümüzü siyahıda göstərmirik (artıq yuxarıda böyük şəkildə var)
-            if (p.nickname === CONFIG.myNickname) return; 
+const LobbyPanel = (() => {
+    const els = {
+        panel: document.getElementById("lobbyPanel"),
+        myAvatar: document.getElementById("myAvatar"),
+        list: document.getElementById("playersList"),
+        count: document.getElementById("count")
+    };
 
-            const div = document.createElement("div");
-            div.className = "mini-player";
-            const emoji = AVATARS[p.avatar_key] || '👤';
-            div.innerHTML = `<div style="font-size:1.5rem">${emoji}</div><div>${p.nickname}</div>`;
-            els.list.appendChild(div);
-        });
+    // 1. Mənim Avatarımı Render Et
+    // HTML-dən gələn açarı (məs: 'avatar_2') emojiyə çevirir
+    if(els.myAvatar) els.myAvatar.textContent = AVATARS[GAME_CONFIG.myAvatarKey] || '👤';
+
+    // 2. Oyunçuları Render Et
+    // Server yalnız subscribe/resync-də tam siyahı (lobby_state) göndərir,
+    // sonra player_joined / player_left delta-ları (version ardıcıl artır)
+    let lobbyVersion = -1;
+
+    function playerNode(p) {
+        const div = document.createElement("div");
+        div.className = "mini-player";
+        div.dataset.playerId = p.id;
+        const emoji = AVATARS[p.avatar_key] || '👤';
+        div.innerHTML = `<div style="font-size:1.5rem">${emoji}</div><div>${p.nickname}</div>`;
+        return div;
     }
-}
-
-// İlkin yükləmə
-try {
-    const initial = JSON.parse(document.getElementById("initialPlayers").textContent || "[]");
-    renderPlayers(initial);
-} catch (e) {
-    console.error("Initial parsing error", e);
-}
-
-// 3. WebSocket Logic
-function wsUrl() {
-    const proto = location.protocol === "https:" ? "wss" : "ws";
-    return `${proto}://${location.host}${CONFIG.wsPath}`;
-}
-
-let socket = null;
-let reconnectTimer = null;
-
-function connectWs() {
-    if (reconnectTimer) clearTimeout(reconnectTimer);
 
-    if(els.wsStatus) els.wsStatus.textContent = "Bağlantı qurulur...";
-    
-    socket = new WebSocket(wsUrl());
+    function renderPlayers(players, count) {
+        const arr = Array.isArray(players) ? players : [];
+        if(els.count) els.count.textContent = (count ?? arr.length);
+
+        if(els.list) {
+            els.list.innerHTML = "";
+            arr.forEach(p => {
+                // Özümüzü siyahıda göstərmirik (artıq yuxarıda böyük şəkildə var)
+                if (p.nickname === GAME_CONFIG.myNickname) return;
+                els.list.appendChild(playerNode(p));
+            });
+        }
+    }
 
-    socket.onopen = () => {
-        if(els.wsStatus) {
-            els.wsStatus.textContent = "Onlayn ✅";
-            els.wsStatus.style.color = "#00c853";
+    function applyDelta(payload, send) {
+        if (payload.version <= lobbyVersion) return;          // snapshot artıq daxildir
+        if (payload.version !== lobbyVersion + 1) {           // boşluq -> tam state istə
+            send({ type: "resync" });
+            return;
         }
-    };
+        lobbyVersion = payload.version;
+        if(els.count) els.count.textContent = payload.count;
+        if(!els.list) return;
+
+        if (payload.type === "player_joined") {
+            const p = payload.player;
+            els.list.querySelector(`[data-player-id="${p.id}"]`)?.remove();
+            if (p.nickname !== GAME_CONFIG.myNickname) els.list.prepend(playerNode(p));
+        } else {
+            els.list.querySelector(`[data-player-id="${payload.player_id}"]`)?.remove();
+        }
+    }
 
-    socket.onmessage = (e) => {
-        try {
-            const msg = JSON.parse(e.data);
-            const payload = msg.data ? msg.data : msg;
+    // İlkin yükləmə
+    try {
+        const initial = JSON.parse(document.getElementById("initialPlayers").textContent || "[]");
+        renderPlayers(initial);
+    } catch (e) {
+        console.error("Initial parsing error", e);
+    }
 
-            // OYUN BAŞLADI -> Redirect
-            if (payload.type === "game_started" && payload.redirect) {
-                window.location.href = payload.redirect;
-                return;
+    return {
+        // lobby mesajıdırsa emal edib true qaytarır
+        handle(msg, send) {
+            if (msg.type === "lobby_state" && Array.isArray(msg.players)) {
+                lobbyVersion = msg.version ?? -1;
+                renderPlayers(msg.players, msg.count);
+                return true;
             }
-
-            // LOBBY UPDATE -> Siyahını yenilə
-            if (payload.type === "lobby_state" && Array.isArray(payload.players)) {
-                renderPlayers(payload.players);
+            if (msg.type === "player_joined" || msg.type === "player_left") {
+                applyDelta(msg, send);
+                return true;
             }
-        } catch (_) {}
-    };
+            return false;
+        },
 
-    socket.onclose = () => {
-        if(els.wsStatus) {
-            els.wsStatus.textContent = "Bağlantı kəsildi ❌";
-            els.wsStatus.style.color = "#ff4081";
+        hide() {
+            if (els.panel) els.panel.style.display = "none";
         }
-        reconnectTimer = setTimeout(connectWs, 2000);
     };
-}
-
-connectWs();
\ No newline at end of file
+})();
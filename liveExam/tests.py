@@ -1,3 +1,406 @@
-from django.test import TestCase
+import asyncio
+import os
+import random
+import shutil
+import tempfile
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from channels.layers import DEFAULT_CHANNEL_LAYER, channel_layers
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from blog.models import Exam, ExamQuestion, ExamQuestionOption
+from liveExam.channel_layer import _HEADER, UnixSocketChannelLayer
+from liveExam.deck import drop_deck
+from liveExam.engine import drop_engine, get_engine, host_group, persist_answers, replay_journal
+from liveExam.events import drop_log
+from liveExam.engine import ANSWER_GRACE_SECONDS
+from liveExam.game import finish_game, next_question, reveal_question, start_game
+from liveExam.leaderboard import Leaderboard
+from liveExam.lobby import LobbyRoster, drop_roster, mark_left, rejoin_player
+from liveExam.models import LiveAnswer, LivePlayer, LiveSession
+
+
+class LiveGameTestCase(TestCase):
+    """Bir imtahan (3 sual x 4 variant, 1-ci variant doğru), sessiya və 3 oyunçu."""
+
+    def setUp(self):
+        # cavab journal-ı test üçün ayrıca qovluqda
+        journal = tempfile.mkdtemp()
+        override = override_settings(LIVE_JOURNAL_DIR=journal)
+        override.enable()
+        self.addCleanup(shutil.rmtree, journal, ignore_errors=True)
+        self.addCleanup(override.disable)
+
+        teacher = User.objects.create_user(username="teacher", password="p")
+        self.exam = Exam.objects.create(title="Live", author=teacher)
+        for i in range(3):
+            q = ExamQuestion.objects.create(exam=self.exam, text=f"Q{i}", order=(i + 1) * 1024, points=1000)
+            for j in range(4):
+                ExamQuestionOption.objects.create(question=q, text=f"o{i}{j}", is_correct=(j == 0))
+        self.session = LiveSession.objects.create(exam=self.exam, host_user=teacher)
+        self.pin = self.session.pin
+        self.players = [
+            LivePlayer.objects.create(session=self.session, nickname=f"p{i}", client_id=f"cid{i}")
+            for i in range(3)
+        ]
+
+    def tearDown(self):
+        drop_engine(self.pin)
+        drop_deck(self.pin)
+        drop_roster(self.pin)
+        drop_log(self.pin)
+
+    def start(self):
+        """1-ci sualı yayımlayır (event-lər göndərilmir, siyahıya yığılır) və engine-i yükləyir."""
+        start_game(self.session, "3", False, out=[])
+        self.session.refresh_from_db()
+        engine = get_engine(self.pin)
+        self.assertTrue(engine.load())
+        return engine
+
+    def at(self, engine, answer_ms):
+        """Sual başlayandan answer_ms sonrakı an (submit-in `now`-u)."""
+        return engine.question.started_at + answer_ms / 1000
+
+    def options(self, question_id):
+        correct = ExamQuestionOption.objects.get(question_id=question_id, is_correct=True).id
+        wrong = list(
+            ExamQuestionOption.objects
+            .filter(question_id=question_id, is_correct=False)
+            .values_list("id", flat=True)
+        )
+        return correct, wrong
+
+
+class LiveEngineTests(LiveGameTestCase):
+    def expected_points(self, engine, fraction, answer_ms):
+        q = engine.question
+        bonus = int(((q.total_ms - answer_ms) / q.total_ms) * 500) if q.total_ms > 0 else 0
+        return int((q.base_points + bonus) * fraction)
+
+    def test_submit_scores_in_memory_and_flush_persists(self):
+        engine = self.start()
+        qid = self.session.current_question_id
+        correct, wrong = self.options(qid)
+        p0, p1, p2 = self.players
+
+        ok, result = engine.submit(p0.id, qid, [correct], now=self.at(engine, 1000))
+        self.assertTrue(ok)
+        self.assertTrue(result["is_correct"])
+        self.assertEqual(result["awarded_points"], self.expected_points(engine, 1.0, 1000))
+        self.assertEqual(result["score"], result["awarded_points"])
+        engine.submit(p1.id, qid, [correct], now=self.at(engine, 5000))
+        engine.submit(p2.id, qid, [wrong[0]], now=self.at(engine, 500))
+
+        # write-behind: flush-a qədər DB-yə heç nə yazılmır
+        self.assertFalse(LiveAnswer.objects.filter(session=self.session).exists())
+        self.assertEqual(LivePlayer.objects.get(id=p0.id).score, 0)
+
+        self.assertEqual(engine.flush(), 3)
+        self.assertEqual(engine.flush(), 0)
+
+        rows = {
+            a.player_id: a for a in LiveAnswer.objects.filter(session=self.session, question_id=qid)
+        }
+        self.assertEqual(set(rows), {p0.id, p1.id, p2.id})
+        self.assertEqual((rows[p2.id].is_correct, rows[p2.id].awarded_points), (False, 0))
+        self.assertEqual(rows[p0.id].choice_ids, [correct])
+        self.assertEqual(rows[p0.id].answer_ms, 1000)
+        for p in self.players:
+            self.assertEqual(LivePlayer.objects.get(id=p.id).score, rows[p.id].awarded_points)
+
+        # leaderboard yaddaşdadır: tez cavab verən önə
+        self.assertEqual([row["nickname"] for row in engine.top_players(3)], ["p0", "p1", "p2"])
+        self.assertEqual(engine.player_standing(p2.id)["rank"], 3)
+
+    def test_submit_rejects_invalid_and_is_idempotent(self):
+        engine = self.start()
+        qid = self.session.current_question_id
+        correct, _ = self.options(qid)
+        player = self.players[0]
+
+        self.assertEqual(engine.submit(player.id, qid + 10_000, [correct]), (False, "Question not found"))
+        self.assertEqual(engine.submit(10_000_000, qid, [correct]), (False, "Player not found"))
+        self.assertEqual(engine.submit(player.id, qid, [10_000_000]), (False, "Invalid option"))
+
+        ok, first = engine.submit(player.id, qid, [correct])
+        ok_again, again = engine.submit(player.id, qid, [correct])
+        self.assertTrue(ok and ok_again)
+        self.assertEqual(again, {"message": "Already answered", "score": first["score"]})
+        self.assertEqual(len(engine.pending), 1)
+
+    def test_partial_scoring_penalises_wrong_picks(self):
+        # hər sualda iki doğru variant -> multi
+        for q in ExamQuestion.objects.filter(exam=self.exam):
+            second = q.options.order_by("id")[1]
+            ExamQuestionOption.objects.filter(id=second.id).update(is_correct=True)
+        engine = self.start()
+        qid = self.session.current_question_id
+        opts = list(ExamQuestionOption.objects.filter(question_id=qid).order_by("id").values_list("id", flat=True))
+        c1, c2, w1 = opts[0], opts[1], opts[2]
+
+        _, half = engine.submit(self.players[0].id, qid, [c1], now=self.at(engine, 0))
+        _, zero = engine.submit(self.players[1].id, qid, [c1, w1], now=self.at(engine, 0))
+        _, full = engine.submit(self.players[2].id, qid, [c1, c2], now=self.at(engine, 0))
+
+        self.assertEqual((half["fraction"], half["is_correct"]), (0.5, False))
+        self.assertEqual(half["awarded_points"], self.expected_points(engine, 0.5, 0))
+        self.assertEqual((zero["fraction"], zero["awarded_points"]), (0.0, 0))
+        self.assertEqual((full["fraction"], full["is_correct"]), (1.0, True))
+
+    def test_answers_after_deadline_or_reveal_are_rejected(self):
+        engine = self.start()
+        qid = self.session.current_question_id
+        correct, _ = self.options(qid)
+        late = self.at(engine, engine.question.total_ms) + ANSWER_GRACE_SECONDS + 0.1
+
+        self.assertEqual(engine.submit(self.players[0].id, qid, [correct], now=late), (False, "Question closed"))
+        ok, _ = engine.submit(self.players[1].id, qid, [correct])
+        self.assertTrue(ok)
+
+        # reveal correct_option_ids-i yayımlayır -> deadline-dan əvvəl də bağlıdır
+        reveal_question(self.session, out=[])
+        self.assertEqual(engine.submit(self.players[2].id, qid, [correct]), (False, "Question closed"))
+        self.assertEqual(LiveAnswer.objects.filter(session=self.session).count(), 1)
+
+    def test_finished_game_does_not_score_late_answers(self):
+        engine = self.start()
+        qid = self.session.current_question_id
+        correct, _ = self.options(qid)
+        finish_game(self.session, out=[])
+
+        # drop_engine-dən sonra gələn cavab engine-i yenidən yaradır: bağlı yüklənir
+        fresh = get_engine(self.pin)
+        self.assertIsNot(fresh, engine)
+        self.assertTrue(async_to_sync(fresh.ensure_loaded)(qid))
+        self.assertEqual(fresh.submit(self.players[0].id, qid, [correct]), (False, "Question closed"))
+        self.assertEqual(fresh.flush(), 0)
+        self.assertFalse(LiveAnswer.objects.filter(session=self.session).exists())
+
+    def test_stale_question_ids_do_not_reload(self):
+        engine = self.start()
+        old_qid = self.session.current_question_id
+        correct, _ = self.options(old_qid)
+        reveal_question(self.session, out=[])
+        next_question(self.session, out=[])
+        new_qid = self.session.current_question_id
+        self.assertTrue(async_to_sync(engine.ensure_loaded)(new_qid))
+
+        loads = []
+        original = engine.load
+        engine.load = lambda *a: loads.append(a) or original(*a)
+        for _ in range(5):
+            self.assertTrue(async_to_sync(engine.ensure_loaded)(old_qid))
+        self.assertEqual(loads, [])
+        self.assertEqual(engine.submit(self.players[0].id, old_qid, [correct]), (False, "Question not found"))
+
+        # deck-də irəlidəki id (başqa prosesdə keçid) -> bir reload, sonra throttle
+        ahead = next(iter(engine.ahead))
+        engine._loaded_at -= 60
+        async_to_sync(engine.ensure_loaded)(ahead)
+        async_to_sync(engine.ensure_loaded)(ahead)
+        self.assertEqual(len(loads), 1)
+
+    def test_journal_replay_recovers_unflushed_answers_once(self):
+        engine = self.start()
+        qid = self.session.current_question_id
+        correct, _ = self.options(qid)
+        for p in self.players[:2]:
+            engine.submit(p.id, qid, [correct])
+        batch = list(engine.pending)
+
+        # proses çökdü: yaddaş itdi, journal qaldı
+        engine.pending.clear()
+        self.assertEqual(replay_journal(self.pin), 2)
+        self.assertEqual(replay_journal(self.pin), 0)
+
+        # təkrar persist (məs. flush + replay) ikiqat yazmır, balı ikiqat artırmır
+        self.assertEqual(persist_answers(self.session.id, batch), 0)
+        self.assertEqual(LiveAnswer.objects.filter(session=self.session).count(), 2)
+        p0 = LivePlayer.objects.get(id=self.players[0].id)
+        self.assertEqual(p0.score, batch[0]["awarded_points"])
+
+
+class LiveStateJsonTests(LiveGameTestCase):
+    def test_transition_by_another_worker_invalidates_etag_and_body(self):
+        self.start()
+        url = reverse("liveExam:state_json", args=[self.pin])
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.json()["state"], "question")
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 304)
+
+        # başqa worker: DB yenilənir, bu prosesin cache-inə heç nə yazılmır
+        LiveSession.objects.filter(pk=self.session.pk).update(
+            state=LiveSession.STATE_REVEAL, state_version=self.session.state_version + 1,
+        )
+
+        second = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second["ETag"], first["ETag"])
+        self.assertEqual(second.json()["state"], "reveal")
+
+
+class LobbyRosterTests(LiveGameTestCase):
+    """Roster-in həqiqət mənbəyi DB-dir; hər proses (burada ayrıca LobbyRoster) onun cache-idir."""
+
+    def join(self, nickname):
+        response = self.client.post(
+            reverse("liveExam:join_enter", args=[self.pin]), {"nickname": nickname, "avatar_key": "avatar_2"},
+        )
+        self.assertEqual(response.status_code, 200)
+        return LivePlayer.objects.get(session=self.session, nickname=nickname)
+
+    def test_http_join_is_seen_by_another_process(self):
+        ws_worker = LobbyRoster(self.pin)
+        self.assertTrue(ws_worker.refresh())
+        self.assertEqual(ws_worker.snapshot()["count"], 3)
+
+        # join başqa prosesdə (HTTP worker): bu cache-ə heç bir delta çatmır
+        self.join("newbie")
+
+        self.assertTrue(ws_worker.refresh())
+        snapshot = ws_worker.snapshot()
+        self.assertEqual(snapshot["count"], 4)
+        self.assertEqual(snapshot["players"][0]["nickname"], "newbie")
+        self.assertEqual(snapshot["version"], LiveSession.objects.get(pk=self.session.pk).lobby_version)
+
+    def test_deltas_from_any_process_share_one_version_sequence(self):
+        ws_worker = LobbyRoster(self.pin)
+        ws_worker.refresh()
+        p0 = self.players[0]
+
+        left = mark_left(self.pin, p0.id)
+        self.assertEqual((left["type"], left["count"]), ("player_left", 2))
+        self.assertIsNone(mark_left(self.pin, p0.id))  # artıq çıxıb -> delta yoxdur
+        back = rejoin_player(self.pin, p0.id)
+        self.assertEqual((back["type"], back["count"], back["version"]), ("player_joined", 3, left["version"] + 1))
+        self.assertIsNone(rejoin_player(self.pin, p0.id))
+
+        # delta-lar (hər consumer eyni event-i alır) bir dəfə tətbiq olunur
+        for event in (left, left, back, back):
+            ws_worker.apply(event)
+        self.assertEqual(ws_worker.version, back["version"])
+        self.assertIn(p0.id, ws_worker.players)
+
+        # boşluq (buraxılmış delta) -> cache köhnəlib, refresh DB-dən oxuyur
+        gone = mark_left(self.pin, self.players[1].id)
+        ws_worker.apply({**gone, "version": gone["version"] + 1})
+        self.assertFalse(ws_worker.loaded)
+        ws_worker.refresh()
+        self.assertNotIn(self.players[1].id, ws_worker.players)
+        self.assertEqual(ws_worker.snapshot()["count"], 2)
+
+
+class AnswerHistogramTests(LiveGameTestCase):
+    def test_histogram_passes_through_configured_layer(self):
+        engine = self.start()
+        qid = self.session.current_question_id
+        correct, wrong = self.options(qid)
+        engine.submit(self.players[0].id, qid, [correct])
+        engine.submit(self.players[1].id, qid, [correct])
+        engine.submit(self.players[2].id, qid, [wrong[0]])
+
+        histogram = engine.answer_histogram()
+        self.assertEqual(histogram["option_counts"][str(correct)], 2)
+        self.assertEqual(histogram["option_counts"][str(wrong[0])], 1)
+
+        async def roundtrip():
+            layer = channel_layers.make_backend(DEFAULT_CHANNEL_LAYER)
+            try:
+                channel = await layer.new_channel()
+                await layer.group_add(host_group(self.pin), channel)
+                # consumer kimi: receive əvvəl başlayır (kanal broker-də qeydiyyatdan keçir)
+                received = asyncio.ensure_future(layer.receive(channel))
+                await asyncio.sleep(0.2)
+                await layer.group_send(host_group(self.pin), {"type": "play_event", "data": histogram})
+                return await asyncio.wait_for(received, 5)
+            finally:
+                await layer.close()
+
+        message = async_to_sync(roundtrip)()
+        self.assertEqual(message["data"], histogram)
+
+
+class LeaderboardTests(SimpleTestCase):
+    def test_matches_full_sort_under_random_updates(self):
+        board, keys = Leaderboard(), {}
+        rnd = random.Random(7)
+        for step in range(3000):
+            pid = rnd.randrange(200)
+            score, join_key = rnd.randrange(40), float(pid % 13)  # bərabər ballar çox olsun
+            board.set_score(pid, score, join_key)
+            keys[pid] = (-score, join_key, pid)
+            if step % 250 == 0:
+                expected = [pid for _, _, pid in sorted(keys.values())]
+                self.assertEqual(len(board), len(expected))
+                self.assertEqual(board.top(15), expected[:15])
+                self.assertEqual([board.rank(pid) for pid in expected], list(range(1, len(expected) + 1)))
+
+    def test_clear_scores_keeps_round_standing_for_delta(self):
+        board = Leaderboard()
+        for pid, score in ((1, 10), (2, 20), (3, 30)):
+            board.set_score(pid, score, float(pid))
+        self.assertEqual(board.standing(1, "q1"), (3, None))
+
+        board.clear_scores()
+        for pid, score in ((1, 50), (2, 20), (3, 30)):
+            board.set_score(pid, score, float(pid))
+        self.assertEqual(board.top(3), [1, 3, 2])
+        self.assertEqual(board.standing(1, "q2"), (1, 2))
+        self.assertIsNone(board.rank(99))
+
+
+class UnixSocketChannelLayerTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "channels.sock")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_layer(self, scenario):
+        async def main():
+            layer = UnixSocketChannelLayer(path=self.path)
+            try:
+                return await scenario(layer)
+            finally:
+                await layer.close()
+
+        return async_to_sync(main)()
+
+    async def subscribe(self, layer, group):
+        channel = await layer.new_channel()
+        await layer.group_add(group, channel)
+        received = asyncio.ensure_future(layer.receive(channel))
+        await asyncio.sleep(0.2)  # receive kanalı broker-də qeydiyyatdan keçirir
+        return channel, received
+
+    def test_int_map_keys_are_delivered(self):
+        async def scenario(layer):
+            channel, received = await self.subscribe(layer, "g")
+            await layer.group_send("g", {"type": "x", "counts": {5: 1}})
+            via_group = await asyncio.wait_for(received, 5)
+            # öz prosesinin kanalı: broker-siz lokal yol
+            await layer.send(channel, {"type": "x", "counts": {6: 2}})
+            local = await asyncio.wait_for(layer.receive(channel), 5)
+            return via_group, local
+
+        via_group, local = self.run_layer(scenario)
+        self.assertEqual(via_group["counts"], {5: 1})
+        self.assertEqual(local["counts"], {6: 2})
+
+    def test_bad_frame_does_not_detach_worker(self):
+        async def scenario(layer):
+            channel, received = await self.subscribe(layer, "g")
+            conn = await layer._connection()
+            # 0xc1 msgpack-də istifadə olunmayan baytdır; ardınca formasız, amma açılan frame
+            conn.writer.write(_HEADER.pack(3) + b"\xc1\xc1\xc1")
+            conn.writer.write(_HEADER.pack(1) + b"\x05")
+            await conn.drain()
+            await layer.group_send("g", {"type": "x", "ok": True})
+            return await asyncio.wait_for(received, 5)
+
+        self.assertEqual(self.run_layer(scenario), {"type": "x", "ok": True})
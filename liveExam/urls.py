@@ -15,6 +15,8 @@ urlpatterns = [
     path("live/host/<str:pin>/next/", views.host_next_question, name="host_next_question"),
     path("live/host/<str:pin>/reveal/", views.host_reveal, name="host_reveal"),
     path("live/host/<str:pin>/finish/", views.host_finish, name="host_finish"),
+    path("live/host/<str:pin>/auto/", views.host_auto_mode, name="host_auto_mode"),
+    path("live/host/<str:pin>/report/", views.host_report, name="host_report"),
 
     # Player (anonim)
     path("live/join/<str:pin>/", views.live_join_page, name="join_page"),